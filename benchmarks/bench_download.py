@@ -0,0 +1,190 @@
+# bench_download.py – Durchsatz, erstes Byte, ffmpeg-Zeit und Speicherspitze gegen einen lokalen Fixture-Server
+#   python benchmarks/bench_download.py                          (alle Szenarien, Worker 1 und 4)
+#   python benchmarks/bench_download.py --workers 1 2 4 --jobs 12 --runs 3 --save base.json
+#   python benchmarks/bench_download.py --compare base.json      (Exit 1 bei Regression > --tolerance)
+# Läuft komplett offline: jede Messung ist ein eigener Prozess mit leerem Home-Ordner, ohne Cache,
+# Archiv und Journal, und Verbindungen außerhalb von 127.0.0.1 werden dort verweigert.
+import os, sys, json, time, socket, argparse, statistics, subprocess, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.dirname(os.path.abspath(__file__))]
+from fixture_server import FixtureServer, find_ffmpeg
+
+# (Quelle, Format, braucht echte Medien + ffmpeg)
+SCENARIOS = [
+    ("prog", "MP4", False),   # progressiv, nur umbenennen
+    ("hls",  "MP4", False),   # HLS-Fragmente, nur umbenennen
+    ("dash", "M4A", False),   # DASH-Audio (AAC) direkt übernommen
+    ("dash", "MP4", True),    # DASH Video+Audio -> Mux
+    ("prog", "MP3", True),    # Transcode
+]
+
+# -------- Kindprozess: ein Szenario mit der echten Queue --------
+def _offline_only():
+    """Jede Verbindung außer zu 127.0.0.1 schlägt fehl – ein Benchmark darf nie ins Netz."""
+    real = socket.socket.connect
+    def connect(self, addr):
+        if self.family in (socket.AF_INET, socket.AF_INET6) and addr[0] not in ("127.0.0.1", "::1", "localhost"):
+            raise OSError(f"Benchmark offline: Verbindung zu {addr[0]} verweigert")
+        return real(self, addr)
+    socket.socket.connect = connect
+
+def _peak_rss_mb():
+    """(Spitze Hauptprozess, Spitze der beendeten Kindprozesse = ffmpeg-Pool) in MB."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+        class PMC(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        pmc = PMC(cb=ctypes.sizeof(PMC))
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(pmc), pmc.cb)
+        return pmc.PeakWorkingSetSize / 2**20, None
+    import resource
+    unit = 1 if sys.platform == "darwin" else 1024      # ru_maxrss: macOS Bytes, Linux KB
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 2**20
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit / 2**20
+    return own, kids or None
+
+def run_child(spec):
+    _offline_only()
+    from ytdl_core import DEFAULT_CFG, DEFAULT_QUALITY
+    from ytdl_queue import DownloadQueue, DONE
+    out = tempfile.mkdtemp(prefix="ytdl-bench-")
+    cfg = dict(DEFAULT_CFG, music_dir=out, video_dir=out, use_archive=False, fragments=spec["fragments"],
+               fragments_auto=False)
+    queue = DownloadQueue(cfg, workers=spec["workers"])
+    t0 = time.perf_counter()
+    for url in spec["urls"]:
+        queue.submit(url, spec["fmt"], DEFAULT_QUALITY[spec["fmt"]])
+    while not queue.idle():
+        time.sleep(0.02)
+    wall = time.perf_counter() - t0
+    queue.shutdown(cancel_running=False)
+    recs = queue.metrics.records()
+    own, kids = _peak_rss_mb()
+    errors = [r["error"] for r in recs if r["state"] != DONE]
+    return {"wall": wall, "ok": len(recs) - len(errors), "errors": errors[:3],
+            "bytes": sum(r["bytes"] for r in recs),
+            "ttfb": [r["first_byte"] for r in recs if "first_byte" in r],
+            "download": [r["download"] for r in recs if "download" in r],
+            "postprocess": [r["postprocess"] for r in recs if "postprocess" in r],
+            "rss_mb": own, "rss_pool_mb": kids}
+
+# -------- Elternprozess: Server, Matrix, Auswertung --------
+def _median(vals):
+    return statistics.median(vals) if vals else None
+
+def _p95(vals):
+    s = sorted(vals)
+    return s[min(len(s) - 1, int(round(0.95 * (len(s) - 1))))] if s else None
+
+def run_scenario(srv, kind, fmt, workers, jobs, runs, fragments):
+    spec = {"fmt": fmt, "workers": workers, "fragments": fragments,
+            "urls": [srv.url(kind, i) for i in range(jobs)]}
+    res = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as home:
+            env = dict(os.environ, HOME=home, USERPROFILE=home, NO_PROXY="*", no_proxy="*")
+            for k in ("HTTP_PROXY", "HTTPS_PROXY", "http_proxy", "https_proxy", "ALL_PROXY", "all_proxy"):
+                env.pop(k, None)
+            p = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec)],
+                               cwd=ROOT, env=env, capture_output=True, text=True)
+            if p.returncode:
+                raise RuntimeError(f"{kind}/{fmt}: Kindprozess fehlgeschlagen\n{p.stderr[-2000:]}")
+            res.append(json.loads(p.stdout.strip().splitlines()[-1]))
+    best = sorted(res, key=lambda r: r["wall"])[len(res) // 2]   # Median-Lauf nach Gesamtzeit
+    ttfb = [t for r in res for t in r["ttfb"]]
+    pp = [t for r in res for t in r["postprocess"]]
+    return {"kind": kind, "fmt": fmt, "workers": workers, "jobs": jobs, "ok": best["ok"], "errors": best["errors"],
+            "wall_s": best["wall"], "mb_s": best["bytes"] / best["wall"] / 2**20 if best["wall"] else 0,
+            "ttfb_ms": (_median(ttfb) or 0) * 1000, "ttfb_p95_ms": (_p95(ttfb) or 0) * 1000,
+            "pp_s": _median(pp), "pp_p95_s": _p95(pp),
+            "rss_mb": max(r["rss_mb"] for r in res),
+            "rss_pool_mb": max((r["rss_pool_mb"] or 0) for r in res) or None}
+
+def _key(r):
+    return f"{r['kind']}/{r['fmt']}/w{r['workers']}"
+
+def compare(results, baseline, tol):
+    """Regressionen gegenüber einer gespeicherten Messung (nur gleiche Szenarien)."""
+    base = {_key(r): r for r in baseline}
+    bad = []
+    for r in results:
+        b = base.get(_key(r))
+        if not b:
+            continue
+        if b["mb_s"] and r["mb_s"] < b["mb_s"] * (1 - tol):
+            bad.append(f"{_key(r)}: Durchsatz {r['mb_s']:.1f} MB/s statt {b['mb_s']:.1f}")
+        if b["ttfb_ms"] and r["ttfb_ms"] > b["ttfb_ms"] * (1 + tol) and r["ttfb_ms"] - b["ttfb_ms"] > 5:
+            bad.append(f"{_key(r)}: erstes Byte {r['ttfb_ms']:.0f} ms statt {b['ttfb_ms']:.0f}")
+        if b["pp_s"] and r["pp_s"] and r["pp_s"] > b["pp_s"] * (1 + tol):
+            bad.append(f"{_key(r)}: ffmpeg {r['pp_s']:.2f} s statt {b['pp_s']:.2f}")
+        if r["rss_mb"] > b["rss_mb"] * (1 + tol):
+            bad.append(f"{_key(r)}: Speicher {r['rss_mb']:.0f} MB statt {b['rss_mb']:.0f}")
+    return bad
+
+def print_table(results):
+    print(f"\n{'Szenario':<18}{'ok':>6}{'Zeit s':>9}{'MB/s':>9}{'1. Byte ms':>12}{'p95':>7}"
+          f"{'ffmpeg s':>10}{'RSS MB':>9}{'Pool MB':>9}")
+    for r in results:
+        pp = f"{r['pp_s']:.2f}" if r["pp_s"] is not None else "–"
+        pool = f"{r['rss_pool_mb']:.0f}" if r["rss_pool_mb"] else "–"
+        print(f"{_key(r):<18}{r['ok']:>3}/{r['jobs']:<2}{r['wall_s']:>9.2f}{r['mb_s']:>9.1f}{r['ttfb_ms']:>12.1f}"
+              f"{r['ttfb_p95_ms']:>7.0f}{pp:>10}{r['rss_mb']:>9.0f}{pool:>9}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Download-Benchmark gegen lokale Fixture-Medien")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    ap.add_argument("--jobs", type=int, default=8, help="Downloads je Szenario")
+    ap.add_argument("--runs", type=int, default=3, help="Wiederholungen je Szenario (Median)")
+    ap.add_argument("--only", nargs="+", metavar="QUELLE/FORMAT", help="z. B. hls/mp4 dash/m4a")
+    ap.add_argument("--fragments", type=int, default=4, help="Fragment-Verbindungen (fest, ohne Auto-Tuning)")
+    ap.add_argument("--duration", type=int, default=30, help="Länge der Fixture-Medien in s")
+    ap.add_argument("--latency", type=int, default=0, help="Server-Latenz je Anfrage in ms")
+    ap.add_argument("--rate", type=int, default=0, help="Server-Rate je Verbindung in KB/s (0 = frei)")
+    ap.add_argument("--save", metavar="DATEI", help="Ergebnisse als JSON speichern")
+    ap.add_argument("--compare", metavar="DATEI", help="mit gespeicherten Ergebnissen vergleichen")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="erlaubte Verschlechterung (0.25 = 25 %%)")
+    args = ap.parse_args(argv)
+    if args.child:
+        print(json.dumps(run_child(json.loads(args.child))))
+        return 0
+
+    ffmpeg = find_ffmpeg()
+    only = {s.upper() for s in args.only or ()}
+    todo = [(k, f, real) for k, f, real in SCENARIOS if not only or f"{k}/{f}".upper() in only]
+    results = []
+    with FixtureServer(latency_ms=args.latency, rate_kb=args.rate, duration=args.duration, ffmpeg=ffmpeg) as srv:
+        print(f"Fixtures: {'echte Medien' if srv.info['real'] else 'synthetisch'}, {args.duration} s, "
+              f"http://127.0.0.1:{srv.port}/")
+        for kind, fmt, needs_real in todo:
+            if needs_real and not srv.info["real"]:
+                print(f"{kind}/{fmt}: übersprungen (kein ffmpeg)")
+                continue
+            for w in args.workers:
+                r = run_scenario(srv, kind, fmt, w, args.jobs, args.runs, args.fragments)
+                results.append(r)
+                if r["errors"]:
+                    print(f"{_key(r)}: {r['jobs'] - r['ok']} Fehler, z. B. {r['errors'][0]}")
+    print_table(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"t": time.time(), "python": sys.version.split()[0], "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            bad = compare(results, json.load(f)["results"], args.tolerance)
+        for line in bad:
+            print("REGRESSION", line)
+        if bad:
+            return 1
+    return 1 if any(r["errors"] for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# bench_startup.py – Kaltstart-Messung: Import-Zeit und erstes Zeichnen des Tk-Fensters
+#   python benchmarks/bench_startup.py            (5 Läufe, Median, Budget 1,0 s)
+#   python benchmarks/bench_startup.py --runs 10 --budget 0.8
+# Jeder Lauf ist ein frischer Interpreter mit leerem Home-Ordner (keine Konfig, kein Archiv).
+import os, sys, json, argparse, statistics, subprocess, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# läuft im Kindprozess; gibt eine JSON-Zeile aus
+_PROBE = r"""
+import sys, time, json
+t0 = time.perf_counter()
+import downloader_tk
+t_import = time.perf_counter() - t0
+res = {"import": t_import, "yt_dlp_loaded": "yt_dlp" in sys.modules, "paint": None}
+try:
+    cfg = downloader_tk.load_config()
+    app = downloader_tk.App(cfg)
+    app.update_idletasks(); app.update()       # erstes Zeichnen = Fenster bedienbar
+    res["paint"] = time.perf_counter() - t0
+    res["yt_dlp_at_paint"] = "yt_dlp" in sys.modules
+    app.queue.shutdown(); app.destroy()
+except Exception as e:                          # z. B. kein Display (CI/Server)
+    res["error"] = f"{type(e).__name__}: {e}"
+print(json.dumps(res))
+"""
+
+def run_once(home):
+    env = dict(os.environ, HOME=home, USERPROFILE=home, PYTHONDONTWRITEBYTECODE="1")
+    out = subprocess.run([sys.executable, "-c", _PROBE], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Startzeit von downloader_tk messen")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget", type=float, default=1.0, help="max. Sekunden bis zum ersten Zeichnen")
+    args = ap.parse_args(argv)
+
+    results = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as home:
+            results.append(run_once(home))
+    imp = statistics.median(r["import"] for r in results)
+    paints = [r["paint"] for r in results if r["paint"] is not None]
+    print(f"Import downloader_tk : {imp * 1000:7.1f} ms (Median aus {len(results)})")
+    if paints:
+        print(f"Erstes Zeichnen      : {statistics.median(paints) * 1000:7.1f} ms")
+    else:
+        print(f"Erstes Zeichnen      : übersprungen ({results[0].get('error')})")
+
+    ok = True
+    if any(r["yt_dlp_loaded"] for r in results):
+        print("FEHLER: yt_dlp wird schon beim Import geladen", file=sys.stderr); ok = False
+    worst = max(paints) if paints else imp
+    if worst > args.budget:
+        print(f"FEHLER: {worst:.2f} s über dem Budget von {args.budget:.2f} s", file=sys.stderr); ok = False
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+# fixture_server.py – lokaler Medien-Server für Benchmarks: progressive Dateien, HLS und DASH, mit Range
+#   python benchmarks/fixture_server.py                    (erzeugt Fixtures in einem Temp-Ordner, Port 8766)
+#   python benchmarks/fixture_server.py --latency 50 --rate 4096
+# URLs: /prog/clip<N>.mp4, /hls/clip<N>.m3u8, /dash/clip<N>.mpd – <N> ist beliebig und liefert denselben
+# Inhalt; so bekommt jeder Job einen eigenen Titel (= Dateinamen), ohne dass Fixtures kopiert werden.
+import os, re, sys, time, random, shutil, argparse, threading, subprocess, tempfile
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+SEG_S = 2                      # Segmentlänge (s) für HLS und DASH
+CTYPES = {".m3u8": "application/vnd.apple.mpegurl", ".mpd": "application/dash+xml", ".ts": "video/mp2t",
+          ".m4s": "video/iso.segment", ".mp4": "video/mp4", ".m4a": "audio/mp4"}
+
+def find_ffmpeg():
+    return shutil.which("ffmpeg")
+
+# -------- Fixtures erzeugen --------
+def _blob(rnd, n):
+    return rnd.getrandbits(8 * n).to_bytes(n, "little") if n else b""
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = "w" if isinstance(data, str) else "wb"
+    with open(path, mode, **({"encoding": "utf-8"} if mode == "w" else {})) as f:
+        f.write(data)
+
+def _master_m3u8(bandwidth):
+    # mit RESOLUTION/CODECS, damit die Formatwahl (ytdl_formats) den Stream als Video+Ton erkennt
+    return ("#EXTM3U\n#EXT-X-VERSION:3\n"
+            f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION=1280x720,CODECS="avc1.64001f,mp4a.40.2"\n'
+            "v720.m3u8\n")
+
+def _media_m3u8(segments):
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{SEG_S}", "#EXT-X-MEDIA-SEQUENCE:0"]
+    for name in segments:
+        lines += [f"#EXTINF:{SEG_S:.1f},", name]
+    return "\n".join(lines + ["#EXT-X-ENDLIST", ""])
+
+def _mpd(duration, vbw, abw):
+    tmpl = 'initialization="init-$RepresentationID$.m4s" media="chunk-$RepresentationID$-$Number%05d$.m4s"'
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" profiles="urn:mpeg:dash:profile:isoff-live:2011"
+     mediaPresentationDuration="PT{duration}S" minBufferTime="PT{SEG_S}S">
+  <Period start="PT0S">
+    <AdaptationSet contentType="video" mimeType="video/mp4">
+      <Representation id="0" codecs="avc1.64001f" width="1280" height="720" bandwidth="{vbw}">
+        <SegmentTemplate timescale="1" duration="{SEG_S}" startNumber="1" {tmpl}/>
+      </Representation>
+    </AdaptationSet>
+    <AdaptationSet contentType="audio" mimeType="audio/mp4" lang="und">
+      <Representation id="1" codecs="mp4a.40.2" audioSamplingRate="44100" bandwidth="{abw}">
+        <SegmentTemplate timescale="1" duration="{SEG_S}" startNumber="1" {tmpl}/>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""
+
+def make_synthetic(root, duration=30, video_kbps=4000, audio_kbps=128, seed=1):
+    """
+    Zufallsbytes in fester Größe (Seed -> reproduzierbar). Reicht für alles, was nur lädt und umbenennt
+    (progressiv MP4, HLS, DASH-M4A); Transcode/Mux braucht echte Medien, siehe make_real().
+    """
+    rnd = random.Random(seed)
+    n_seg = duration // SEG_S
+    vseg, aseg = video_kbps * 125 * SEG_S, audio_kbps * 125 * SEG_S
+    _write(os.path.join(root, "prog", "clip.mp4"), _blob(rnd, (vseg + aseg) * n_seg))
+    _write(os.path.join(root, "hls", "clip.m3u8"), _master_m3u8((video_kbps + audio_kbps) * 1000))
+    _write(os.path.join(root, "hls", "v720.m3u8"), _media_m3u8([f"seg{i}.ts" for i in range(n_seg)]))
+    for i in range(n_seg):
+        _write(os.path.join(root, "hls", f"seg{i}.ts"), _blob(rnd, vseg + aseg))
+    _write(os.path.join(root, "dash", "clip.mpd"), _mpd(duration, video_kbps * 1000, audio_kbps * 1000))
+    for rep, size in (("0", vseg), ("1", aseg)):
+        _write(os.path.join(root, "dash", f"init-{rep}.m4s"), _blob(rnd, 1024))
+        for i in range(1, n_seg + 1):
+            _write(os.path.join(root, "dash", f"chunk-{rep}-{i:05d}.m4s"), _blob(rnd, size))
+    return {"real": False, "duration": duration}
+
+def make_real(root, ffmpeg, duration=30, video_kbps=4000, audio_kbps=128):
+    """Echte 720p-Medien (Testbild + Sinuston) per ffmpeg – damit auch MP3-Transcode und Mux messbar sind."""
+    run = lambda *a: subprocess.run([ffmpeg, "-y", "-hide_banner", "-loglevel", "error", *a], check=True)
+    for d in ("prog", "hls", "dash"):
+        os.makedirs(os.path.join(root, d), exist_ok=True)
+    clip = os.path.join(root, "prog", "clip.mp4")
+    run("-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=30:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={duration}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-b:v", f"{video_kbps}k", "-g", str(30 * SEG_S),
+        "-c:a", "aac", "-b:a", f"{audio_kbps}k", "-movflags", "+faststart", clip)
+    run("-i", clip, "-c", "copy", "-f", "hls", "-hls_time", str(SEG_S), "-hls_list_size", "0",
+        "-hls_segment_filename", os.path.join(root, "hls", "seg%d.ts"), os.path.join(root, "hls", "v720.m3u8"))
+    _write(os.path.join(root, "hls", "clip.m3u8"), _master_m3u8((video_kbps + audio_kbps) * 1000))
+    run("-i", clip, "-map", "0:v", "-map", "0:a", "-c", "copy", "-f", "dash", "-seg_duration", str(SEG_S),
+        "-use_template", "1", "-use_timeline", "0",
+        "-init_seg_name", "init-$RepresentationID$.m4s",
+        "-media_seg_name", "chunk-$RepresentationID$-$Number%05d$.m4s", os.path.join(root, "dash", "clip.mpd"))
+    return {"real": True, "duration": duration}
+
+def make_fixtures(root, duration=30, ffmpeg=None, **kw):
+    """Mit ffmpeg echte Medien, sonst synthetische; gibt {"real": bool, "duration": s} zurück."""
+    return make_real(root, ffmpeg, duration, **kw) if ffmpeg else make_synthetic(root, duration, **kw)
+
+# -------- Server --------
+class _Handler(SimpleHTTPRequestHandler):
+    """Statische Dateien mit Range-Support, optionaler Latenz (vor den Headern) und Rate je Verbindung."""
+    protocol_version = "HTTP/1.1"
+    latency = 0.0     # s
+    rate = 0          # B/s je Verbindung, 0 = frei
+    CHUNK = 64 * 1024
+
+    def log_message(self, *a):
+        pass
+
+    def translate_path(self, path):
+        path = re.sub(r"/clip\d+\.", "/clip.", path.split("?", 1)[0])
+        return super().translate_path(path)
+
+    def guess_type(self, path):
+        return CTYPES.get(os.path.splitext(path)[1], "application/octet-stream")
+
+    def send_head(self):
+        if self.latency:
+            time.sleep(self.latency)
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return None
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        m = re.match(r"bytes=(\d*)-(\d*)$", self.headers.get("Range", ""))
+        if m and (m.group(1) or m.group(2)):
+            if m.group(1):
+                start = int(m.group(1))
+                end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+            else:
+                start = max(0, size - int(m.group(2)))
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        f = open(path, "rb")
+        f.seek(start)
+        self._left = end - start + 1
+        return f
+
+    def copyfile(self, src, dst):
+        t0, sent = time.monotonic(), 0
+        while self._left > 0:
+            buf = src.read(min(self.CHUNK, self._left))
+            if not buf:
+                break
+            dst.write(buf)
+            self._left -= len(buf)
+            sent += len(buf)
+            if self.rate:
+                ahead = sent / self.rate - (time.monotonic() - t0)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):   # Client bricht ab (Cancel, Range-Wechsel)
+            super().handle_error(request, client_address)
+
+class FixtureServer:
+    """
+    Fixtures erzeugen und auf 127.0.0.1 ausliefern (Thread im selben Prozess):
+        with FixtureServer(ffmpeg=find_ffmpeg()) as srv:
+            srv.url("hls", 3)   # -> http://127.0.0.1:<port>/hls/clip3.m3u8
+    """
+    EXT = {"prog": "mp4", "hls": "m3u8", "dash": "mpd"}
+
+    def __init__(self, root=None, port=0, latency_ms=0, rate_kb=0, duration=30, ffmpeg=None):
+        self._tmp = None if root else tempfile.TemporaryDirectory(prefix="ytdl-fixtures-")
+        self.root = root or self._tmp.name
+        self.info = make_fixtures(self.root, duration, ffmpeg)
+        handler = type("Handler", (_Handler,), {"latency": latency_ms / 1000, "rate": rate_kb * 1024})
+        self.httpd = _Server(("127.0.0.1", port), lambda *a: handler(*a, directory=self.root))
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, kind, n=0):
+        return f"http://127.0.0.1:{self.port}/{kind}/clip{n}.{self.EXT[kind]}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._tmp:
+            self._tmp.cleanup()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Fixture-Medien lokal ausliefern")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--root", help="Ordner für die Fixtures (Standard: temporär)")
+    ap.add_argument("--latency", type=int, default=0, help="ms vor jeder Antwort")
+    ap.add_argument("--rate", type=int, default=0, help="KB/s je Verbindung (0 = frei)")
+    ap.add_argument("--synthetic", action="store_true", help="auch mit ffmpeg nur Zufallsbytes erzeugen")
+    args = ap.parse_args(argv)
+    ffmpeg = None if args.synthetic else find_ffmpeg()
+    with FixtureServer(args.root, args.port, args.latency, args.rate, ffmpeg=ffmpeg) as srv:
+        kind = "echte Medien" if srv.info["real"] else "synthetisch (kein ffmpeg)"
+        print(f"Fixtures ({kind}) unter {srv.root}")
+        for k in FixtureServer.EXT:
+            print("  ", srv.url(k, 1))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,78 +1,107 @@
-import os, sys, PySimpleGUI as sg
-from yt_dlp import YoutubeDL
+import os, multiprocessing, PySimpleGUI as sg
+from ytdl_core import load_config, target_dir
+from ytdl_queue import DownloadQueue, DONE, FAILED, WAITING, FINAL_STATES
+from ytdl_cache import cache_from_cfg
+from ytdl_archive import DownloadArchive
+from ytdl_journal import open_journal
+from ytdl_state import get_store
+from ytdl_progress import ProgressBus, fmt_speed, fmt_eta
+from ytdl_formats import ACTION_SHORT
 
-HOME = os.path.expanduser("~")
-MUSIC_DIR = os.path.join(HOME, "Music")
-VIDEO_DIR = os.path.join(HOME, "Videos")
+TICK_MS = 50  # so oft holt die Event-Schleife Fortschritt aus dem Bus (coalesced pro Job)
 
-def ffmpeg_dir():
-    base = getattr(sys, "_MEIPASS", os.path.dirname(__file__))
-    d = os.path.join(base, "ffmpeg")
-    return d if os.path.isdir(d) else None
+# Downloads laufen in den Worker-Threads der Queue; die Fenster-Schleife zeichnet nur.
+# Alles in main(), damit die ffmpeg-Prozesse (spawn unter Windows) beim Import kein Fenster öffnen.
+def main():
+    cfg = load_config()
+    bus = ProgressBus()
+    queue = DownloadQueue(cfg, workers=cfg.get("workers", 3), cache=cache_from_cfg(cfg), bus=bus,
+                          archive=DownloadArchive() if cfg.get("use_archive", True) else None,
+                          journal=open_journal(), history=get_store())
 
-def build_opts(fmt, quality):
-    opts = {"quiet": True, "noprogress": True}
-    ffd = ffmpeg_dir()
-    if ffd: opts["ffmpeg_location"] = ffd
+    # Theme nur setzen, wenn die Funktion existiert (sonst überspringen)
+    if hasattr(sg, "theme"):
+        sg.theme("SystemDefault")
+    # bei manchen 5.x-Builds gibt's set_options, aber ohne 'theme' -> also nicht verwenden
 
-    if fmt == "MP3":
-        opts.update({
-            "outtmpl": os.path.join(MUSIC_DIR, "%(title)s.%(ext)s"),
-            "format": "bestaudio/best",
-            "postprocessors": [{
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": quality  # "128"/"192"/"256"/"320"
-            }]
-        })
-    else:
-        vf = f"bestvideo[height<={quality}]+bestaudio/best"
-        opts.update({
-            "outtmpl": os.path.join(VIDEO_DIR, "%(title)s.%(ext)s"),
-            "format": vf,
-            "merge_output_format": "mp4"
-        })
-    return opts
+    layout = [
+        [sg.Text("YouTube-URL"), sg.Input(key="-URL-", expand_x=True)],
+        [sg.Text("Format"), sg.Combo(["MP3","M4A","MP4"], default_value="MP3", key="-FMT-", readonly=True, enable_events=True),
+         sg.Text("Qualität"),
+         sg.Combo(["128","192","256","320"], key="-QMP3-", default_value="192", readonly=True, visible=True),
+         sg.Combo(["480","720","1080","1440","2160"], key="-QMP4-", default_value="1080", readonly=True, visible=False)],
+        [sg.Button("Download starten", bind_return_key=True), sg.Text("", key="-STATUS-", expand_x=True)],
+        [sg.ProgressBar(100, orientation="h", key="-PROG-", expand_x=True, size=(20, 16))],
+        [sg.Table(values=[], headings=["#", "Titel / URL", "Format", "Status", "%", "Tempo / ETA"],
+                  key="-JOBS-", auto_size_columns=False, col_widths=[4, 40, 18, 14, 5, 16],
+                  justification="left", num_rows=10, expand_x=True, expand_y=True,
+                  select_mode=sg.TABLE_SELECT_MODE_EXTENDED)],
+        [sg.Button("Abbrechen"), sg.Button("Wiederholen")],
+    ]
+    win = sg.Window("YouTube Downloader", layout, finalize=True, resizable=True)
 
-# Theme nur setzen, wenn die Funktion existiert (sonst überspringen)
-if hasattr(sg, "theme"):
-    sg.theme("SystemDefault")
-# bei manchen 5.x-Builds gibt's set_options, aber ohne 'theme' -> also nicht verwenden
+    def switch_dropdown(fmt):
+        win["-QMP3-"].update(visible = (fmt!="MP4"))   # MP3 und M4A: Bitrate
+        win["-QMP4-"].update(visible = (fmt=="MP4"))
 
-layout = [
-    [sg.Text("YouTube-URL"), sg.Input(key="-URL-", expand_x=True)],
-    [sg.Text("Format"), sg.Combo(["MP3","MP4"], default_value="MP3", key="-FMT-", readonly=True, enable_events=True),
-     sg.Text("Qualität"),
-     sg.Combo(["128","192","256","320"], key="-QMP3-", default_value="192", readonly=True, visible=True),
-     sg.Combo(["480","720","1080","1440","2160"], key="-QMP4-", default_value="1080", readonly=True, visible=False)],
-    [sg.Button("Download starten", bind_return_key=True), sg.Text("", key="-STATUS-", expand_x=True)]
-]
-win = sg.Window("YouTube Downloader", layout, finalize=True)
+    switch_dropdown("MP3")
+    queue.resume_unfinished()   # beim letzten Mal unterbrochene Downloads fortsetzen
 
-def switch_dropdown(fmt):
-    win["-QMP3-"].update(visible = (fmt=="MP3"))
-    win["-QMP4-"].update(visible = (fmt=="MP4"))
+    rows, row_ids, speeds = {}, [], {}   # job_id -> Tabellenzeile, Reihenfolge, Tempo-Text
 
-switch_dropdown("MP3")
+    def row_for(job):
+        state = f"{job.state}: {job.error}" if job.state in (FAILED, WAITING) and job.error else job.state
+        if job.skipped: state = "done (Archiv)"
+        title = f"📃 {job.title or job.url}" if job.children else (job.title or job.url)
+        if job.resumed: title = f"↻ {title}"
+        pct = f"{len(job.children)}" if job.children else f"{job.percent:.0f}"
+        fmt = f"{job.fmt} {job.quality}" + (f" · {ACTION_SHORT[job.choice.action]}" if job.choice else "")
+        return [job.id, title, fmt, state, pct, speeds.get(job.id, "")]
 
-while True:
-    ev, val = win.read()
-    if ev in (sg.WIN_CLOSED, "Exit"): break
-    if ev == "-FMT-":
-        switch_dropdown(val["-FMT-"])
-    if ev == "Download starten":
-        url = (val["-URL-"] or "").strip()
-        if not url:
-            win["-STATUS-"].update("Bitte URL eingeben.", text_color="red"); continue
-        fmt = val["-FMT-"]
-        q   = val["-QMP3-"] if fmt=="MP3" else val["-QMP4-"]
-        try:
-            win["-STATUS-"].update("Lade...", text_color="black")
-            with YoutubeDL(build_opts(fmt, q)) as ydl:
-                ydl.download([url])
-            target = MUSIC_DIR if fmt=="MP3" else VIDEO_DIR
-            win["-STATUS-"].update(f"Fertig ✅  Gespeichert in: {target}", text_color="green")
-        except Exception as e:
-            win["-STATUS-"].update(f"Fehler: {e}", text_color="red")
+    def apply_events():
+        events, _ = bus.drain()
+        if not events: return
+        for jid, ev in events.items():
+            job = queue.get(jid)
+            if job is None: continue
+            speeds[jid] = f"{fmt_speed(ev['speed'])} · {fmt_eta(ev.get('eta'))}" \
+                if ev.get("speed") and job.state not in FINAL_STATES else ""
+            if jid not in rows: row_ids.append(jid)
+            rows[jid] = row_for(job)
+            if job.state == DONE and job.filepath and not job.children:
+                win["-STATUS-"].update(f"Fertig ✅  {os.path.basename(job.filepath)} → {target_dir(job.fmt, cfg)}",
+                                       text_color="green")
+        win["-JOBS-"].update(values=[rows[i] for i in row_ids])
+        active = [queue.get(i) for i in row_ids]
+        active = [j for j in active if j and j.state not in FINAL_STATES and not j.children]
+        win["-PROG-"].update(int(sum(j.percent for j in active) / len(active)) if active else 100)
 
-win.close()
+    def selected_ids(val):
+        return [row_ids[i] for i in (val.get("-JOBS-") or []) if i < len(row_ids)]
+
+    while True:
+        ev, val = win.read(timeout=TICK_MS)
+        if ev in (sg.WIN_CLOSED, "Exit"): break
+        if ev == "-FMT-":
+            switch_dropdown(val["-FMT-"])
+        if ev == "Download starten":
+            url = (val["-URL-"] or "").strip()
+            if not url:
+                win["-STATUS-"].update("Bitte URL eingeben.", text_color="red"); continue
+            fmt = val["-FMT-"]
+            q   = val["-QMP3-"] if fmt!="MP4" else val["-QMP4-"]
+            job = queue.submit(url, fmt, q)
+            win["-URL-"].update("")
+            win["-STATUS-"].update(f"Eingereiht: #{job.id}", text_color="black")
+        if ev == "Abbrechen":
+            for jid in selected_ids(val): queue.cancel(jid)
+        if ev == "Wiederholen":
+            for jid in selected_ids(val): queue.retry(jid)
+        apply_events()
+
+    queue.shutdown()
+    win.close()
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # ffmpeg-Prozess-Pool in der PyInstaller-EXE
+    main()
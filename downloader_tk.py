@@ -1,44 +1,23 @@
 # downloader_tk.py – Modern GUI, echte Qualitäten, Settings, Windows-Theme, klickbarer Dateilink
-import os, sys, json, threading, platform
-from tkinter import messagebox, filedialog
+import os, sys, time, threading, platform
+from tkinter import messagebox, filedialog, TclError
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
-from yt_dlp import YoutubeDL
+from ytdl_core import (load_config, save_config, available_resolutions, target_dir, prewarm,
+                       AUDIO_FORMATS)
+from ytdl_formats import choose_format, ACTION_SHORT
+from ytdl_queue import DownloadQueue, DONE, FAILED, CANCELLED, WAITING, FINAL_STATES
+from ytdl_cache import cache_from_cfg, describe_stats
+from ytdl_archive import DownloadArchive
+from ytdl_journal import open_journal
+from ytdl_state import get_store
+from ytdl_probe import ProbeService
+from ytdl_ingest import Ingestor, ClipboardWatcher
+from ytdl_progress import ProgressBus, fmt_speed, fmt_eta
+from ytdl_metrics import PHASES, PHASE_TEXT, TASKS, TASK_TEXT
 
 APP_NAME = "YTDL-Modern"
-
-# -------- Konfig (persistiert unter ~/.ytdl-modern/config.json) --------
-DEFAULT_CFG = {
-    "music_dir": os.path.join(os.path.expanduser("~"), "Music"),
-    "video_dir": os.path.join(os.path.expanduser("~"), "Videos"),
-    "last_theme": None,  # light/dark; wenn None -> Windows-Theme
-}
-def _config_dir():
-    home = os.path.expanduser("~")
-    path = os.path.join(home, ".ytdl-modern")
-    os.makedirs(path, exist_ok=True)
-    return path
-CFG_PATH = os.path.join(_config_dir(), "config.json")
-
-def load_config():
-    cfg = DEFAULT_CFG.copy()
-    try:
-        if os.path.isfile(CFG_PATH):
-            with open(CFG_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            for k in DEFAULT_CFG:
-                if k in data:
-                    cfg[k] = data[k]
-    except Exception:
-        pass
-    return cfg
-
-def save_config(cfg):
-    try:
-        with open(CFG_PATH, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print("Config speichern fehlgeschlagen:", e, file=sys.stderr)
+UI_TICK_MS = 16  # ~60 fps: so oft holt der Tk-Hauptthread Fortschritts-Events ab
 
 # -------- Windows-Theme erkennen --------
 def detect_windows_theme():
@@ -62,77 +41,6 @@ def get_start_theme(cfg):
 def theme_to_bootstrap(kind: str):
     return "flatly" if kind == "light" else "darkly"
 
-# -------- ffmpeg (falls mit PyInstaller gebündelt) --------
-def get_ffmpeg_location():
-    base = getattr(sys, "_MEIPASS", None)
-    if base:
-        cand = os.path.join(base, "ffmpeg")
-        if os.path.isdir(cand):
-            return cand
-    return None
-
-def ydl_basic_opts():
-    opts = {"quiet": True, "noprogress": True}
-    ffdir = get_ffmpeg_location()
-    if ffdir:
-        opts["ffmpeg_location"] = ffdir
-    return opts
-
-# -------- Qualitäten pro URL ermitteln --------
-def probe_available_resolutions(url: str):
-    """
-    Liefert Liste vorhandener Video-Höhen (als Strings), z. B. ['480','720','1080'].
-    """
-    opts = ydl_basic_opts()
-    with YoutubeDL(opts) as ydl:
-        info = ydl.extract_info(url, download=False)
-    heights = set()
-    for f in info.get("formats", []):
-        if f.get("vcodec") and f.get("vcodec") != "none":
-            h = f.get("height")
-            if isinstance(h, int) and h > 0:
-                heights.add(h)
-    vals = sorted(heights)  # aufsteigend
-    # Optional auf gängige Raster filtern, Reihenfolge erhalten
-    common = ["2160","1440","1080","720","480","360","240"]
-    if vals:
-        s = [str(v) for v in vals]
-        filtered = [v for v in common if v in s]
-        return filtered or s
-    return []
-
-# -------- yt-dlp Optionen --------
-def build_opts(fmt: str, quality: str, progress_hook, post_hook, cfg):
-    opts = {
-        "quiet": True,
-        "noprogress": False,
-        "progress_hooks": [progress_hook],          # Download-Status
-        "postprocessor_hooks": [post_hook],         # finaler Dateipfad
-        "outtmpl": None,
-    }
-    ffdir = get_ffmpeg_location()
-    if ffdir:
-        opts["ffmpeg_location"] = ffdir
-
-    if fmt == "MP3":
-        opts["outtmpl"] = os.path.join(cfg["music_dir"], "%(title)s.%(ext)s")
-        opts.update({
-            "format": "bestaudio/best",
-            "postprocessors": [{
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": quality  # "128","192","256","320"
-            }]
-        })
-    else:
-        opts["outtmpl"] = os.path.join(cfg["video_dir"], "%(title)s.%(ext)s")
-        vfmt = f"bestvideo[height<={quality}]+bestaudio/best"
-        opts.update({
-            "format": vfmt,
-            "merge_output_format": "mp4"
-        })
-    return opts
-
 # -------- Settings Dialog --------
 class SettingsDialog(tb.Toplevel):
     def __init__(self, master, cfg):
@@ -157,7 +65,58 @@ class SettingsDialog(tb.Toplevel):
         tb.Radiobutton(self, text="Hell",   variable=self.theme_var, value="light").grid(row=2, column=1, sticky="w", **p)
         tb.Radiobutton(self, text="Dunkel", variable=self.theme_var, value="dark").grid(row=2, column=2, sticky="w", **p)
 
-        bar = tb.Frame(self); bar.grid(row=3, column=0, columnspan=3, sticky="e", **p)
+        tb.Label(self, text="Parallele Downloads").grid(row=3, column=0, sticky="w", **p)
+        self.workers_var = tb.IntVar(value=cfg.get("workers", 3))
+        tb.Spinbox(self, from_=1, to=16, textvariable=self.workers_var, width=6).grid(row=3, column=1, sticky="w", **p)
+
+        self.archive_var = tb.BooleanVar(value=cfg.get("use_archive", True))
+        tb.Checkbutton(self, text="Bereits geladene Videos überspringen (Archiv)", variable=self.archive_var)\
+            .grid(row=4, column=0, columnspan=3, sticky="w", **p)
+
+        tb.Label(self, text="Fragment-Verbindungen").grid(row=5, column=0, sticky="w", **p)
+        self.frag_var = tb.IntVar(value=cfg.get("fragments", 4))
+        tb.Spinbox(self, from_=1, to=32, textvariable=self.frag_var, width=6).grid(row=5, column=1, sticky="w", **p)
+        self.frag_auto_var = tb.BooleanVar(value=cfg.get("fragments_auto", True))
+        tb.Checkbutton(self, text="automatisch", variable=self.frag_auto_var).grid(row=5, column=2, sticky="w", **p)
+
+        tb.Label(self, text="Chunk-Größe (MB, 0 = aus)").grid(row=6, column=0, sticky="w", **p)
+        self.chunk_var = tb.IntVar(value=cfg.get("chunk_mb", 10))
+        tb.Spinbox(self, from_=0, to=512, textvariable=self.chunk_var, width=6).grid(row=6, column=1, sticky="w", **p)
+
+        tb.Label(self, text="Bandbreite gesamt (KB/s, 0 = frei)").grid(row=7, column=0, sticky="w", **p)
+        self.rate_var = tb.IntVar(value=cfg.get("rate_limit_kb", 0))
+        tb.Spinbox(self, from_=0, to=1000000, increment=256, textvariable=self.rate_var, width=10)\
+            .grid(row=7, column=1, sticky="w", **p)
+
+        tb.Label(self, text="Bandbreite je Download (KB/s)").grid(row=8, column=0, sticky="w", **p)
+        self.job_rate_var = tb.IntVar(value=cfg.get("job_rate_kb", 0))
+        tb.Spinbox(self, from_=0, to=1000000, increment=256, textvariable=self.job_rate_var, width=10)\
+            .grid(row=8, column=1, sticky="w", **p)
+        tb.Label(self, text="Zeitfenster: rate_schedule in config.json", bootstyle=SECONDARY)\
+            .grid(row=8, column=2, sticky="w", **p)
+
+        tb.Label(self, text="Drop-Ordner (URL-Listen)").grid(row=9, column=0, sticky="w", **p)
+        self.ingest_var = tb.StringVar(value=cfg.get("ingest_dir", ""))
+        tb.Entry(self, textvariable=self.ingest_var, width=54).grid(row=9, column=1, **p)
+        tb.Button(self, text="Wählen…", bootstyle=SECONDARY, command=self.pick_ingest).grid(row=9, column=2, **p)
+
+        tb.Label(self, text="URL-Port (0 = aus)").grid(row=10, column=0, sticky="w", **p)
+        self.port_var = tb.IntVar(value=cfg.get("ingest_port", 0))
+        tb.Spinbox(self, from_=0, to=65535, textvariable=self.port_var, width=8).grid(row=10, column=1, sticky="w", **p)
+        self.clip_var = tb.BooleanVar(value=cfg.get("ingest_clipboard", False))
+        tb.Checkbutton(self, text="Links aus Zwischenablage", variable=self.clip_var)\
+            .grid(row=10, column=2, sticky="w", **p)
+
+        # läuft im selben ffmpeg-Durchgang wie die Umwandlung mit
+        tb.Label(self, text="Nachbearbeitung").grid(row=11, column=0, sticky="w", **p)
+        pp = tb.Frame(self); pp.grid(row=11, column=1, columnspan=2, sticky="w", **p)
+        self.pp_vars = {}
+        for key, text in (("pp_loudnorm", "Lautheit angleichen"), ("pp_tags", "Tags"),
+                          ("pp_cover", "Cover einbetten"), ("pp_thumb", "Vorschaubild")):
+            self.pp_vars[key] = tb.BooleanVar(value=cfg.get(key, False))
+            tb.Checkbutton(pp, text=text, variable=self.pp_vars[key]).pack(side="left", padx=(0, 10))
+
+        bar = tb.Frame(self); bar.grid(row=12, column=0, columnspan=3, sticky="e", **p)
         tb.Button(bar, text="Abbrechen", bootstyle=SECONDARY, command=self.destroy).pack(side="right", padx=6)
         tb.Button(bar, text="Speichern",  bootstyle=SUCCESS,   command=self.save).pack(side="right")
 
@@ -171,13 +130,195 @@ class SettingsDialog(tb.Toplevel):
         path = filedialog.askdirectory(title="Ordner für MP4 wählen")
         if path: self.video_var.set(path)
 
+    def pick_ingest(self):
+        path = filedialog.askdirectory(title="Drop-Ordner wählen")
+        if path: self.ingest_var.set(path)
+
     def save(self):
         self.cfg["music_dir"] = self.music_var.get().strip() or self.cfg["music_dir"]
         self.cfg["video_dir"] = self.video_var.get().strip() or self.cfg["video_dir"]
         self.cfg["last_theme"] = self.theme_var.get()
+        self.cfg["use_archive"] = bool(self.archive_var.get())
+        self.cfg["fragments_auto"] = bool(self.frag_auto_var.get())
+        self.cfg["ingest_dir"] = self.ingest_var.get().strip()
+        self.cfg["ingest_clipboard"] = bool(self.clip_var.get())   # greift sofort (App fragt cfg ab)
+        for key, var in self.pp_vars.items():
+            self.cfg[key] = bool(var.get())                        # ab dem nächsten Job
+        try:
+            self.cfg["workers"] = max(1, min(16, int(self.workers_var.get())))
+            self.cfg["fragments"] = max(1, min(32, int(self.frag_var.get())))
+            self.cfg["chunk_mb"] = max(0, int(self.chunk_var.get()))
+            self.cfg["rate_limit_kb"] = max(0, int(self.rate_var.get()))   # greift sofort (Planer liest cfg)
+            self.cfg["job_rate_kb"] = max(0, int(self.job_rate_var.get()))
+            self.cfg["ingest_port"] = max(0, min(65535, int(self.port_var.get())))
+        except Exception:
+            pass
         save_config(self.cfg)
+        if hasattr(self.master, "queue"):
+            self.master.queue.set_workers(self.cfg["workers"])
+            if not self.cfg["use_archive"]:
+                self.master.queue.archive = None
+            elif self.master.queue.archive is None:
+                self.master.archive = self.master.queue.archive = DownloadArchive()
         self.destroy()
-        messagebox.showinfo("Einstellungen", "Gespeichert. Theme greift beim nächsten Start.")
+        messagebox.showinfo("Einstellungen", "Gespeichert. Theme, Drop-Ordner und Port greifen beim nächsten Start.")
+
+# -------- Statistik --------
+class StatsDialog(tb.Toplevel):
+    """Zeit je Phase über alle abgeschlossenen Jobs, dazu Engpass und Info-Cache; aktualisiert sich jede Sekunde."""
+    def __init__(self, master, metrics, cache=None):
+        super().__init__(master)
+        self.title("Statistik")
+        self.metrics, self.cache = metrics, cache
+        p = {"padx": 10, "pady": 8}
+
+        cols = ("phase", "n", "avg", "p95", "sum", "share")
+        self.view = tb.Treeview(self, columns=cols, show="headings", height=len(PHASES) + len(TASKS), bootstyle=INFO)
+        for c, text, w in (("phase","Phase",160), ("n","Jobs",60), ("avg","Ø s",80), ("p95","p95 s",80),
+                           ("sum","Summe s",90), ("share","Anteil",80)):
+            self.view.heading(c, text=text)
+            self.view.column(c, width=w, anchor=("w" if c == "phase" else "e"))
+        self.view.grid(row=0, column=0, columnspan=3, sticky="nsew", **p)
+
+        self.bottleneck = tb.Label(self, text="", bootstyle=SECONDARY)
+        self.bottleneck.grid(row=1, column=0, columnspan=3, sticky="w", **p)
+        self.cache_lbl = tb.Label(self, text="", bootstyle=SECONDARY)
+        self.cache_lbl.grid(row=2, column=0, columnspan=3, sticky="w", padx=10)
+
+        bar = tb.Frame(self); bar.grid(row=3, column=0, columnspan=3, sticky="e", **p)
+        tb.Button(bar, text="Schließen", bootstyle=SECONDARY, command=self.destroy).pack(side="right", padx=6)
+        tb.Button(bar, text="Prometheus…", bootstyle=INFO, command=self.export_prom).pack(side="right", padx=6)
+        tb.Button(bar, text="JSON-Zeilen…", bootstyle=INFO, command=self.export_jsonl).pack(side="right")
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self._tick = None
+        self.refresh()
+
+    def destroy(self):
+        if self._tick is not None:   # sonst läuft refresh nach dem Schließen ins Leere ("invalid command name")
+            self.after_cancel(self._tick)
+            self._tick = None
+        super().destroy()
+
+    def refresh(self):
+        summary = self.metrics.summary()
+        total = sum(s["sum"] for p, s in summary.items() if p != "first_byte") or 1.0
+        self.view.delete(*self.view.get_children())
+        for p in PHASES:
+            s = summary.get(p)
+            if s:
+                share = "–" if p == "first_byte" else f"{s['sum'] / total:.0%}"   # erstes Byte steckt im Download
+                self.view.insert("", "end", values=(PHASE_TEXT[p], s["count"], f"{s['avg']:.2f}",
+                                                    f"{s['p95']:.2f}", f"{s['sum']:.1f}", share))
+        tasks = self.metrics.task_summary()   # Aufschlüsselung der Nachbearbeitung
+        for t in TASKS:
+            s = tasks.get(t)
+            if s:
+                self.view.insert("", "end", values=(f"   ↳ {TASK_TEXT[t]}", s["count"], f"{s['avg']:.2f}",
+                                                    f"{s['p95']:.2f}", f"{s['sum']:.1f}", "–"))
+        bound, share = self.metrics.bottleneck()
+        self.bottleneck.configure(text=f"Engpass: {bound} ({share:.0%} der Zeit)" if bound else "Noch keine Jobs abgeschlossen.")
+        self.cache_lbl.configure(text=describe_stats(self.cache.stats()) if self.cache is not None else "Info-Cache: aus")
+        self._tick = self.after(1000, self.refresh)
+
+    def export_jsonl(self):
+        path = filedialog.asksaveasfilename(title="Job-Zeiten speichern", defaultextension=".jsonl",
+                                            filetypes=[("JSON-Zeilen", "*.jsonl")])
+        if path:
+            self.metrics.write_jsonl(path)
+
+    def export_prom(self):
+        path = filedialog.asksaveasfilename(title="Metriken speichern", defaultextension=".prom",
+                                            filetypes=[("Prometheus-Text", "*.prom *.txt")])
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.metrics.prometheus(self.master.queue))
+
+# -------- Verlauf --------
+class HistoryDialog(tb.Toplevel):
+    """
+    Abgeschlossene Downloads aus dem Zustandsspeicher, neueste zuerst. Geladen wird seitenweise
+    beim Scrollen (über den Primärschlüssel), damit auch sehr lange Verläufe sofort öffnen.
+    """
+    def __init__(self, master, store):
+        super().__init__(master)
+        self.title("Verlauf")
+        self.geometry("820x480")
+        self.store = store
+        self._last_id = None   # kleinste geladene id (für die nächste Seite)
+        self._done = False
+        p = {"padx": 10, "pady": 8}
+
+        top = tb.Frame(self); top.grid(row=0, column=0, sticky="ew", **p)
+        self.search_var = tb.StringVar()
+        ent = tb.Entry(top, textvariable=self.search_var, width=40)
+        ent.pack(side="left")
+        ent.bind("<Return>", lambda e: self.reload())
+        self.state_var = tb.StringVar(value="alle")
+        cb = tb.Combobox(top, textvariable=self.state_var, values=["alle", DONE, FAILED, CANCELLED],
+                         width=12, state="readonly")
+        cb.pack(side="left", padx=6)
+        cb.bind("<<ComboboxSelected>>", lambda e: self.reload())
+        tb.Button(top, text="Suchen", bootstyle=SECONDARY, command=self.reload).pack(side="left")
+
+        cols = ("t", "title", "fmt", "state", "size")
+        self.view = tb.Treeview(self, columns=cols, show="headings", bootstyle=INFO)
+        for c, text, w in (("t","Zeit",130), ("title","Titel",330), ("fmt","Format",90),
+                           ("state","Status",110), ("size","Größe",80)):
+            self.view.heading(c, text=text)
+            self.view.column(c, width=w, stretch=(c=="title"), anchor=("w" if c in ("title","state") else "center"))
+        sb = tb.Scrollbar(self, orient="vertical", command=self.view.yview)
+        self.view.configure(yscrollcommand=lambda lo, hi: (sb.set(lo, hi), self._maybe_more(float(hi))))
+        self.view.grid(row=1, column=0, sticky="nsew", padx=(10,0))
+        sb.grid(row=1, column=1, sticky="ns", padx=(0,10))
+        self.view.bind("<Double-1>", lambda e: self._open_selected())
+
+        self.summary = tb.Label(self, text="", bootstyle=SECONDARY)
+        self.summary.grid(row=2, column=0, columnspan=2, sticky="w", **p)
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+        self._paths = {}
+        self.reload()
+
+    def reload(self):
+        self.view.delete(*self.view.get_children())
+        self._paths.clear()
+        self._last_id, self._done = None, False
+        self._load_page()
+        days = self.store.daily(30)
+        done, mb = sum(d["done"] for d in days), sum(d["bytes"] for d in days) / 1024 / 1024
+        self.summary.configure(text=f"{self.store.history_count():,} Einträge  ·  letzte 30 Tage: "
+                                    f"{done} fertig, {mb:,.0f} MB".replace(",", "."))
+
+    def _load_page(self):
+        state = self.state_var.get()
+        rows = self.store.history(before=self._last_id, state=None if state == "alle" else state,
+                                  search=self.search_var.get().strip() or None)
+        if not rows:
+            self._done = True
+            return
+        for r in rows:
+            size = f"{r['bytes'] / 1024 / 1024:.1f} MB" if r["bytes"] else ""
+            state = f"{r['state']}: {r['error']}" if r["error"] else r["state"]
+            self.view.insert("", "end", iid=str(r["id"]), values=(
+                time.strftime("%d.%m.%Y %H:%M", time.localtime(r["t"])), r["title"] or r["url"],
+                f"{r['format']} {r['quality']}", state, size))
+            if r["filepath"]:
+                self._paths[str(r["id"])] = r["filepath"]
+        self._last_id = rows[-1]["id"]
+
+    def _maybe_more(self, hi):
+        if hi > 0.95 and not self._done and self._last_id is not None:
+            self._load_page()
+
+    def _open_selected(self):
+        for iid in self.view.selection():
+            path = self._paths.get(iid)
+            if path and os.path.isfile(path):
+                self.master._set_file_link(path)
+                self.master._open_last_file()
+                return
 
 # -------- Haupt-App --------
 class App(tb.Window):
@@ -185,10 +326,31 @@ class App(tb.Window):
         self.cfg = cfg
         start_kind = get_start_theme(cfg)  # 'light'/'dark'
         super().__init__(title="YouTube Downloader", themename=theme_to_bootstrap(start_kind))
-        self.geometry("800x360"); self.minsize(740, 320)
+        self.geometry("800x600"); self.minsize(740, 520)
         self.available_res = []
+        self.probed = None   # Info-Dict der letzten Analyse (für Formatwahl/Größe)
         self.last_file = None
+        self._states = {}    # job_id -> letzter bekannter Zustand
+        self._percent = {}   # job_id -> Prozent (nur offene Einzel-Jobs)
+        self.bus = ProgressBus()
+        self.info_cache = cache_from_cfg(cfg)
+        self.archive = DownloadArchive() if cfg.get("use_archive", True) else None
+        self.queue = DownloadQueue(cfg, workers=cfg.get("workers", 3), cache=self.info_cache,
+                                   archive=self.archive, bus=self.bus, journal=open_journal(),
+                                   history=get_store())
+        # Analyse und Downloads teilen sich die Host-Pausen: gedrosselt ist gedrosselt
+        self.prober = ProbeService(self.info_cache, workers=cfg.get("probe_workers", 6),
+                                   breaker=self.queue.breaker, retries=cfg.get("retries", 5))
+        self._probe_url = None
         self.place_widgets(start_kind)
+        self.after(UI_TICK_MS, self._tick)
+        self.queue.resume_unfinished()   # beim letzten Mal unterbrochene Downloads fortsetzen
+        # erst danach einspeisen: Drop-Ordner/Port sehen die fortgesetzten Jobs als Duplikate
+        self.ingest = Ingestor(self.queue, cfg.get("ingest_format", "MP3"),
+                               on_ingest=lambda n, d, src: self.bus.call_soon(self._ingested, n, d, src))
+        self._start_ingest()
+        # erst zeichnen, dann yt-dlp im Hintergrund laden (after_idle läuft nach dem ersten Paint)
+        self.after_idle(lambda: threading.Thread(target=prewarm, daemon=True).start())
 
     def place_widgets(self, start_kind):
         p = {"padx": 10, "pady": 8}
@@ -205,13 +367,18 @@ class App(tb.Window):
 
         tb.Label(self, text="Format").grid(row=2, column=0, sticky="w", **p)
         self.fmt_var = tb.StringVar(value="MP3")
-        self.fmt_combo = tb.Combobox(self, textvariable=self.fmt_var, values=["MP3","MP4"], state="readonly", width=10)
+        self.fmt_combo = tb.Combobox(self, textvariable=self.fmt_var, values=["MP3","M4A","MP4"], state="readonly", width=10)
         self.fmt_combo.grid(row=2, column=1, sticky="w", **p); self.fmt_combo.bind("<<ComboboxSelected>>", self.refresh_quality)
 
         tb.Label(self, text="Qualität").grid(row=2, column=2, sticky="e", **p)
         self.q_var = tb.StringVar(value="320")
         self.q_combo = tb.Combobox(self, textvariable=self.q_var, state="readonly", width=12)
         self.q_combo.grid(row=2, column=3, sticky="w", **p)
+        self.q_combo.bind("<<ComboboxSelected>>", self.refresh_plan)
+
+        # Ergebnis der Formatwahl: Quelle, erwartete Größe, Transcode ja/nein
+        self.plan_lbl = tb.Label(self, text="", bootstyle=SECONDARY)
+        self.plan_lbl.grid(row=2, column=4, columnspan=2, sticky="w", **p)
 
         self.dark_var = tb.BooleanVar(value=(start_kind=="dark"))
         tb.Checkbutton(self, text="Dark Mode", variable=self.dark_var,
@@ -238,8 +405,27 @@ class App(tb.Window):
         self.settings_btn = tb.Button(self, text="⚙️  Einstellungen", bootstyle=SECONDARY, command=self.open_settings)
         self.settings_btn.grid(row=6, column=6, columnspan=2, sticky="e", **p)
 
+        # Warteschlange
+        cols = ("id", "title", "fmt", "state", "progress", "speed")
+        self.jobs_view = tb.Treeview(self, columns=cols, show="headings", height=8, bootstyle="info")
+        for c, text, w in (("id","#",40), ("title","Titel / URL",320), ("fmt","Format",130),
+                           ("state","Status",120), ("progress","Fortschritt",90), ("speed","Tempo / ETA",130)):
+            self.jobs_view.heading(c, text=text)
+            self.jobs_view.column(c, width=w, stretch=(c=="title"), anchor=("w" if c=="title" else "center"))
+        self.jobs_view.grid(row=7, column=0, columnspan=8, sticky="nsew", padx=10)
+        self.jobs_view.bind("<Double-1>", lambda e: self._open_selected_file())
+
+        qbar = tb.Frame(self); qbar.grid(row=8, column=0, columnspan=8, sticky="w", **p)
+        tb.Button(qbar, text="✖ Abbrechen",  bootstyle=DANGER,    command=self.on_cancel).pack(side="left", padx=(0,6))
+        tb.Button(qbar, text="↻ Wiederholen", bootstyle=WARNING,   command=self.on_retry).pack(side="left")
+        tb.Button(qbar, text="📊 Statistik", bootstyle=INFO,
+                  command=lambda: StatsDialog(self, self.queue.metrics, self.info_cache)).pack(side="left", padx=(6,0))
+        tb.Button(qbar, text="🕘 Verlauf", bootstyle=INFO,
+                  command=lambda: HistoryDialog(self, self.queue.history)).pack(side="left", padx=(6,0))
+
         for c in (1,2,3,4,5):
             self.columnconfigure(c, weight=1)
+        self.rowconfigure(7, weight=1)
 
         self.refresh_quality()
         self.url_entry.focus()
@@ -249,7 +435,7 @@ class App(tb.Window):
         self.style.theme_use("darkly" if self.dark_var.get() else "flatly")
 
     def open_target(self):
-        path = self.cfg["music_dir"] if self.fmt_var.get()=="MP3" else self.cfg["video_dir"]
+        path = target_dir(self.fmt_var.get(), self.cfg)
         try:
             if sys.platform.startswith("win"): os.startfile(path)
             elif sys.platform=="darwin": os.system(f'open "{path}"')
@@ -259,7 +445,7 @@ class App(tb.Window):
 
     def open_settings(self):
         SettingsDialog(self, self.cfg)
-        self.status.config(text=f"MP3 → {self.cfg['music_dir']}  |  MP4 → {self.cfg['video_dir']}")
+        self.status.config(text=f"MP3/M4A → {self.cfg['music_dir']}  |  MP4 → {self.cfg['video_dir']}")
 
     def _set_file_link(self, path: str):
         self.last_file = path
@@ -277,14 +463,21 @@ class App(tb.Window):
 
     # ----- Qualitäten -----
     def refresh_quality(self, *_):
-        if self.fmt_var.get()=="MP3":
+        fmt = self.fmt_var.get()
+        if fmt in AUDIO_FORMATS:
             vals = ["128","192","256","320"]
             self.q_combo.config(values=vals)
-            if self.q_var.get() not in vals: self.q_var.set("192")
+            if self.q_var.get() not in vals: self.q_var.set("192" if fmt == "MP3" else "128")
         else:
             vals = self.available_res or ["480","720","1080","1440","2160"]
             self.q_combo.config(values=vals)
             if self.q_var.get() not in vals: self.q_var.set(vals[-1])
+        self.refresh_plan()
+
+    def refresh_plan(self, *_):
+        """Nach einer Analyse: welche Formate geladen würden, wie groß, ob umgewandelt wird."""
+        choice = choose_format(self.probed, self.fmt_var.get(), self.q_var.get()) if self.probed else None
+        self.plan_lbl.config(text=choice.describe() if choice else "")
 
     def on_probe(self):
         url = self.url_var.get().strip()
@@ -292,72 +485,141 @@ class App(tb.Window):
             messagebox.showerror("Fehler", "Bitte eine YouTube-URL eingeben."); return
         self.status.config(text="🔎 Analysiere Video-Qualitäten…")
         self.progress["value"] = 0
-        self.available_res = []
-        def worker():
-            try:
-                res = probe_available_resolutions(url)
-                self.available_res = res
-                self.status.config(text=f"✅ Gefundene Auflösungen: {', '.join(res) if res else 'keine'}")
-                self.refresh_quality()
-            except Exception as e:
-                self.status.config(text=f"❌ Analyse fehlgeschlagen: {e}")
-        threading.Thread(target=worker, daemon=True).start()
-
-    # ----- yt-dlp Hooks -----
-    def progress_hook(self, d):
-        if d.get("status") == "downloading":
-            p = d.get("_percent_str", "").strip().replace("%","")
-            try: self.progress["value"] = float(p)
-            except: pass
-            self.status.config(text=f"📥 Lädt… {d.get('_percent_str','')}")
-        elif d.get("status") == "finished":
-            self.status.config(text="🔁 Verarbeite… (ffmpeg)")
-            self.progress["value"] = 100
-
-    def post_hook(self, d):
-        fp = d.get("filepath") or d.get("info_dict", {}).get("filepath")
-        if fp and os.path.isfile(fp):
-            self._set_file_link(fp)
-
-    # ----- Download -----
+        self.available_res, self.probed = [], None
+        self._probe_url = url
+        # mehrfaches Klicken hängt sich an dieselbe laufende Analyse
+        self.prober.probe(url).add_done_callback(lambda f: self.bus.call_soon(self._probe_done, url, f))
+
+    def _probe_done(self, url, fut):
+        if url != self._probe_url:
+            return   # inzwischen andere URL analysiert
+        if fut.exception() is not None:
+            self.status.config(text=f"❌ Analyse fehlgeschlagen: {fut.exception()}")
+            return
+        self.probed = info = fut.result()
+        self.available_res = res = available_resolutions(info)
+        self.status.config(text=f"✅ Gefundene Auflösungen: {', '.join(res) if res else 'keine'}")
+        self.refresh_quality()
+
+    # ----- Einspeisen (Drop-Ordner, Port, Zwischenablage) -----
+    def _start_ingest(self):
+        try:
+            if self.cfg.get("ingest_dir"):
+                self.ingest.watch_dir(self.cfg["ingest_dir"])
+            if self.cfg.get("ingest_port"):
+                self.ingest.listen(self.cfg["ingest_port"])
+        except OSError as e:
+            self.status.config(text=f"❌ Einspeisen nicht möglich: {e}")
+        self.clip = ClipboardWatcher(self.ingest, initial=self._clipboard())
+        self.after(1000, self._poll_clipboard)
+
+    def _clipboard(self):
+        try:
+            return self.clipboard_get()
+        except TclError:   # leer oder kein Text
+            return None
+
+    def _poll_clipboard(self):
+        # Tk ist nicht thread-sicher -> im UI-Takt statt im Watcher-Thread abfragen
+        if self.cfg.get("ingest_clipboard"):
+            self.clip.check(self._clipboard())
+        self.after(1000, self._poll_clipboard)
+
+    def _ingested(self, new, dup, source):
+        text = f"📥 {new} eingereiht" + (f", {dup} schon vorhanden" if dup else "")
+        self.status.config(text=f"{text} ({source})" if source else text)
+
+    # ----- Download / Warteschlange -----
     def on_download(self):
         url = self.url_var.get().strip()
         if not url:
             messagebox.showerror("Fehler", "Bitte eine YouTube-URL eingeben."); return
-        fmt, qual = self.fmt_var.get(), self.q_var.get()
-        self.progress["value"] = 0
-        self.file_link.configure(text="")
-        self.open_btn.configure(state=DISABLED)
-        self.dl_btn.configure(state=DISABLED)
-        self.status.config(text="Startet…")
-
-        def worker():
-            try:
-                opts = build_opts(fmt, qual, self.progress_hook, self.post_hook, self.cfg)
-                with YoutubeDL(opts) as ydl:
-                    ydl.download([url])
-
-                # Fallback, falls Post-Hook keinen Pfad lieferte
-                if not self.last_file:
-                    target = self.cfg["music_dir"] if fmt=="MP3" else self.cfg["video_dir"]
-                    try:
-                        files = [os.path.join(target, f) for f in os.listdir(target)]
-                        files = [p for p in files if os.path.isfile(p)]
-                        if files:
-                            latest = max(files, key=os.path.getmtime)
-                            self._set_file_link(latest)
-                    except Exception:
-                        pass
-
-                target_dir = self.cfg["music_dir"] if fmt=="MP3" else self.cfg["video_dir"]
-                self.status.config(text=f"✅ Fertig! Gespeichert in: {target_dir}")
-                self.open_btn.configure(state=NORMAL)
-            except Exception as e:
-                self.status.config(text=f"❌ Fehler: {e}")
-            finally:
-                self.dl_btn.configure(state=NORMAL)
-
-        threading.Thread(target=worker, daemon=True).start()
+        job = self.queue.submit(url, self.fmt_var.get(), self.q_var.get())
+        self.status.config(text=f"➕ Eingereiht: #{job.id}")
+        self.url_var.set("")
+        self.probed = None
+        self.refresh_plan()
+        self.url_entry.focus()
+
+    def _selected_ids(self):
+        return [int(i) for i in self.jobs_view.selection()]
+
+    def on_cancel(self):
+        for jid in self._selected_ids():
+            self.queue.cancel(jid)
+
+    def on_retry(self):
+        for jid in self._selected_ids():
+            self.queue.retry(jid)
+
+    def _open_selected_file(self):
+        for jid in self._selected_ids():
+            job = self.queue.get(jid)
+            if job and job.filepath:
+                self._set_file_link(job.filepath)
+                self._open_last_file()
+                return
+
+    def _tick(self):
+        """
+        Fester UI-Takt: Events vom ProgressBus abholen und pro Job nur einmal zeichnen.
+        Einziger Ort, an dem Job-Änderungen in Tk-Widgets landen (immer im Hauptthread).
+        """
+        try:
+            events, calls = self.bus.drain()
+            for fn, args in calls:
+                fn(*args)
+            for jid, ev in events.items():
+                self._update_row(jid, ev)
+            if events:
+                self._update_summary()
+        finally:
+            self.after(UI_TICK_MS, self._tick)
+
+    def _update_row(self, jid, ev):
+        job = self.queue.get(jid)
+        if job is None:
+            return
+        state = job.state
+        text = f"{state} (#{job.attempts})" if job.attempts > 1 else state
+        if state in (FAILED, WAITING) and job.error:
+            text = f"{state}: {job.error}"
+        elif job.skipped:
+            text = "done (Archiv)"
+        title = f"📃 {job.title or job.url}" if job.children else (job.title or job.url)
+        if job.resumed:
+            title = f"↻ {title}"
+        prog = f"{len(job.children)} Einträge" if job.children else f"{job.percent:.0f}%"
+        speed = ""
+        if state not in FINAL_STATES and ev.get("speed"):
+            speed = f"{fmt_speed(ev['speed'])}  ·  {fmt_eta(ev.get('eta'))}"
+        fmt = f"{job.fmt} {job.quality}" + (f" · {ACTION_SHORT[job.choice.action]}" if job.choice else "")
+        row = (job.id, title, fmt, text, prog, speed)
+        iid = str(jid)
+        if self.jobs_view.exists(iid):
+            self.jobs_view.item(iid, values=row)
+        else:
+            self.jobs_view.insert("", "end", iid=iid, values=row)
+
+        prev, self._states[jid] = self._states.get(jid), state
+        if state in FINAL_STATES or job.children:
+            self._percent.pop(jid, None)
+        else:
+            self._percent[jid] = job.percent
+        if state == DONE and prev != DONE and job.filepath and not job.children:
+            self._set_file_link(job.filepath)
+            self.open_btn.configure(state=NORMAL)
+
+    def _update_summary(self):
+        counts = {}
+        for st in self._states.values():
+            counts[st] = counts.get(st, 0) + 1
+        active = self._percent
+        self.progress["value"] = (sum(active.values()) / len(active)) if active else 100
+        paused = "".join(f"  ·  ⏸ {h} pausiert ({s:.0f} s)" for h, s in self.queue.paused_hosts().items())
+        self.status.config(text=(f"▶ {len(active)} offen  ·  ✅ {counts.get(DONE, 0)} fertig  ·  "
+                                 f"❌ {counts.get(FAILED, 0)} Fehler  ·  ✖ {counts.get(CANCELLED, 0)} abgebrochen"
+                                 + paused))
 
 # -------- Entry Point --------
 def main():
@@ -365,6 +627,9 @@ def main():
     cfg["last_theme"] = get_start_theme(cfg)
     app = App(cfg)
     app.mainloop()
+    app.ingest.stop()
+    app.queue.shutdown()
+    app.prober.shutdown()
     # gewähltes Theme fürs nächste Mal merken
     try:
         current_theme = app.style.theme.name
@@ -374,6 +639,8 @@ def main():
         pass
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # ffmpeg-Prozess-Pool in der PyInstaller-EXE
     try:
         main()
     except Exception:
@@ -1,74 +1,88 @@
 import os
+from functools import partial
 import streamlit as st
-from yt_dlp import YoutubeDL
-import sys
-_bundle = getattr(sys, "_MEIPASS", None)
-if _bundle:
-    FF_DIR = os.path.join(_bundle, "ffmpeg")
-else:
-    FF_DIR = None
-# wenn gebundelt, yt-dlp sagen wo ffmpeg liegt:
-# in build_opts(...) jeweils: if FF_DIR: ydl_opts["ffmpeg_location"] = FF_DIR
-
+from ytdl_core import load_config, target_dir
+from ytdl_queue import DownloadQueue, DONE, FAILED, CANCELLED, WAITING, FINAL_STATES
+from ytdl_cache import cache_from_cfg
+from ytdl_archive import DownloadArchive
+from ytdl_journal import open_journal
+from ytdl_state import get_store
+from ytdl_progress import fmt_speed, fmt_eta
 
-# Standardordner (plattformabhängig)
-MUSIC_DIR = os.path.join(os.path.expanduser("~"), "Music")
-VIDEO_DIR = os.path.join(os.path.expanduser("~"), "Videos")
+# Eine Queue für alle Sitzungen: überlebt Reruns, Downloads laufen in ihren Worker-Threads
+# (ffmpeg-Pfad bei PyInstaller-Bundles ermittelt ytdl_core.get_ffmpeg_location)
+@st.cache_resource
+def get_queue():
+    cfg = load_config()
+    archive = DownloadArchive() if cfg.get("use_archive", True) else None
+    queue = DownloadQueue(cfg, workers=cfg.get("workers", 3), cache=cache_from_cfg(cfg), archive=archive,
+                          journal=open_journal(), history=get_store())
+    queue.resume_unfinished()   # läuft im Hintergrund weiter, auch ohne Browser-Sitzung
+    return queue
 
 st.set_page_config(page_title="YouTube Downloader", page_icon="🎵", layout="centered")
+
+queue = get_queue()
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = []   # Jobs dieser Browser-Sitzung
+
 st.title("🎥 YouTube Downloader")
-st.write("URL einfügen, Format & Qualität auswählen. MP3 → Musik, MP4 → Videos.")
+st.write("URL einfügen, Format & Qualität auswählen. MP3/M4A → Musik, MP4 → Videos.")
 
 url = st.text_input("YouTube-URL", placeholder="https://www.youtube.com/watch?v=...")
-fmt = st.radio("Format", ["mp3", "mp4"], horizontal=True)
+fmt = st.radio("Format", ["mp3", "m4a", "mp4"], horizontal=True,
+               help="m4a übernimmt die AAC-Spur ohne Neu-Kodieren (schneller, keine Qualitätsverluste)")
 
 # Dropdown abhängig vom Format
-if fmt == "mp3":
+if fmt != "mp4":
     qual = st.selectbox("Qualität (kbps)", ["128", "192", "256", "320"], index=1)
 else:
     qual = st.selectbox("Maximale Auflösung (px)", ["480", "720", "1080", "1440", "2160"], index=2)
 
-status = st.empty()
-
-def build_opts(fmt: str, qual: str):
-    if fmt == "mp3":
-        output = os.path.join(MUSIC_DIR, "%(title)s.%(ext)s")
-        ydl_opts = {
-            "outtmpl": output,
-            "format": "bestaudio/best",
-            "postprocessors": [{
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": qual
-            }],
-            "quiet": True,
-            "noprogress": True,
-        }
-    else:  # mp4
-        output = os.path.join(VIDEO_DIR, "%(title)s.%(ext)s")
-        vfmt = f"bestvideo[height<={qual}]+bestaudio/best"
-        ydl_opts = {
-            "outtmpl": output,
-            "format": vfmt,
-            "merge_output_format": "mp4",
-            "quiet": True,
-            "noprogress": True,
-        }
-    return ydl_opts, output
-
 if st.button("Download starten"):
     if not url.strip():
         st.error("Bitte eine gültige URL eingeben.")
     else:
-        opts, outtmpl = build_opts(fmt, qual)
-        try:
-            status.info("📥 Download läuft...")
-            with YoutubeDL(opts) as ydl:
-                ydl.download([url.strip()])
-            st.success(f"✅ Fertig! Gespeichert in:\n{outtmpl}")
-            if fmt == "mp3":
-                st.write(f"📂 Ordner: {MUSIC_DIR}")
-            else:
-                st.write(f"📂 Ordner: {VIDEO_DIR}")
-        except Exception as e:
-            st.error(f"❌ Fehler: {e}")
+        job = queue.submit(url.strip(), fmt.upper(), qual)
+        st.session_state.job_ids.append(job.id)
+        st.info(f"📥 Eingereiht (#{job.id}) – Ziel: {target_dir(fmt.upper(), queue.cfg)}")
+
+def _read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+STATE_TEXT = {DONE: "✅ Fertig", FAILED: "❌ Fehler", CANCELLED: "✖ Abgebrochen"}
+
+# Nur dieser Teil wird jede Sekunde neu gezeichnet, nicht das ganze Skript
+@st.fragment(run_every=1.0)
+def show_jobs():
+    ids = st.session_state.job_ids
+    jobs = [j for j in (queue.get(i) for i in ids) if j is not None]
+    # Einträge aus Playlists dieser Sitzung mit anzeigen
+    for j in list(jobs):
+        jobs.extend(c for c in (queue.get(i) for i in j.children) if c is not None and c.id not in ids)
+    if not jobs:
+        return
+    st.subheader("Downloads")
+    for job in jobs:
+        label = f"#{job.id} {job.title or job.url}"
+        if job.children:
+            st.write(f"📃 {label} – {len(job.children)} Einträge ({job.state})")
+            continue
+        if job.state in FINAL_STATES:
+            st.write(f"{STATE_TEXT[job.state]}: {label}" + (f" – {job.error}" if job.error else ""))
+            if job.state == DONE and job.filepath and os.path.isfile(job.filepath):
+                # Datei erst beim Klick lesen (Callable), nicht bei jedem Neuzeichnen
+                st.download_button("⭳ Datei herunterladen", data=partial(_read_file, job.filepath),
+                                   key=f"dl-{job.id}", file_name=os.path.basename(job.filepath))
+        else:
+            speed = f" · {fmt_speed(job.speed)} · {fmt_eta(job.eta)}" if job.speed else ""
+            st.progress(min(int(job.percent), 100), text=f"{label} – {job.state}{speed}")
+            if job.state == WAITING and job.error:
+                st.caption(f"⏳ {job.error}")
+            if job.choice is not None:
+                st.caption(job.choice.describe())
+            if st.button("Abbrechen", key=f"cancel-{job.id}"):
+                queue.cancel(job.id)
+
+show_jobs()
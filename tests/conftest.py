@@ -0,0 +1,8 @@
+# tests/conftest.py – Modulpfad und ein eigenes HOME, damit kein Test ~/.ytdl-modern anfasst
+import os, sys, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))   # fixture_server
+# vor dem ersten Import von ytdl_core (CFG_DIR wird beim Import bestimmt)
+os.environ["HOME"] = os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="ytdl-test-home-")
@@ -0,0 +1,81 @@
+# HTTP-API über einen echten asyncio-Server, Queue als Stub (kein Download)
+import json, asyncio, threading
+import pytest
+from ytdl_api import JobAPI
+from ytdl_metrics import Metrics
+from ytdl_bandwidth import BandwidthScheduler
+from ytdl_queue import Job
+
+class StubQueue:
+    def __init__(self):
+        self.submitted, self.fail, self.history, self.cache = [], None, None, None
+        self.metrics = Metrics()
+        self.bandwidth = BandwidthScheduler({"rate_limit_kb": 100})
+        self.loop_thread = None
+
+    def submit(self, url, fmt, quality, limit_kb=None):
+        self.loop_thread = threading.current_thread()
+        if self.fail:
+            raise self.fail
+        job = Job(url, fmt, quality)
+        job.limit_kb = limit_kb
+        self.submitted.append(job)
+        return job
+
+    def jobs(self):
+        return list(self.submitted)
+
+def request(api, raw):
+    async def go():
+        server = await asyncio.start_server(api.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        data = await asyncio.wait_for(reader.read(), 5)   # liest bis zum Schließen durch den Server
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return data
+    data = asyncio.run(go())
+    head, _, body = data.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+def post(api, body):
+    body = body if isinstance(body, bytes) else json.dumps(body).encode()
+    return request(api, b"POST /jobs HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+
+@pytest.fixture
+def api():
+    return JobAPI(StubQueue())
+
+def test_submit_runs_off_the_event_loop(api):
+    status, job = post(api, {"url": "https://example.com/a", "format": "m4a", "quality": 256, "limit_kb": 100})
+    assert status == 201 and (job["format"], job["quality"], job["limit_kb"]) == ("M4A", "256", 100)
+    assert api.queue.loop_thread is not threading.main_thread()
+
+@pytest.mark.parametrize("body", [b"[]", b'"x"', b"42", b"null", b"{kaputt"])
+def test_non_object_body_is_400(api, body):
+    assert post(api, body)[0] == 400
+
+@pytest.mark.parametrize("req", [{"url": "https://e.com/a", "quality": "hoch"},
+                                 {"url": "https://e.com/a", "quality": -1},
+                                 {"url": "https://e.com/a", "quality": [320]},
+                                 {"url": ["https://e.com/a"]},
+                                 {"url": "https://e.com/a", "format": "flac"},
+                                 {"url": "https://e.com/a", "limit_kb": "viel"}])
+def test_invalid_fields_are_400(api, req):
+    assert post(api, req)[0] == 400
+    assert not api.queue.submitted
+
+def test_internal_error_is_500_and_connection_closed(api):
+    api.queue.fail = OSError(28, "No space left on device")
+    status, payload = post(api, {"url": "https://example.com/a"})
+    assert status == 500 and "No space" in payload["error"]
+
+def test_stats_include_cache_and_bandwidth(api):
+    api.queue.bandwidth.consume(7, 1, 2.0)
+    status, payload = request(api, b"GET /stats HTTP/1.1\r\n\r\n")
+    assert status == 200 and payload["cache"] is None and "phases" in payload
+    assert payload["bandwidth"]["limit"] == 100 * 1024
+    assert payload["bandwidth"]["flows"]["7"]["weight"] == 2.0
@@ -0,0 +1,56 @@
+import time
+from ytdl_core import DEFAULT_CFG
+from ytdl_archive import DownloadArchive, archive_key
+from ytdl_queue import DownloadQueue, DONE
+
+W = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+def test_key_is_video_format_quality():
+    assert archive_key("https://youtu.be/dQw4w9WgXcQ?t=3", "MP3", "192") == "Youtube_dQw4w9WgXcQ|MP3|192"
+
+def test_lookup_by_any_url_form(tmp_path):
+    f = tmp_path / "clip.mp3"
+    f.write_bytes(b"x")
+    a = DownloadArchive(str(tmp_path / "a.sqlite3"))
+    a.add(W, "MP3", "192", str(f), "abc", "Youtube", "dQw4w9WgXcQ")
+    assert a.lookup("https://youtu.be/dQw4w9WgXcQ", "MP3", "192") == str(f)
+    assert a.lookup(W, "MP3", "320") is None          # andere Qualität = anderer Eintrag
+    assert a.lookup(W, "M4A", "192") is None
+    assert a.find_by_hash("abc") == [str(f)]
+    a.close()
+
+def test_deleted_file_does_not_count(tmp_path):
+    f = tmp_path / "clip.mp3"
+    f.write_bytes(b"x")
+    a = DownloadArchive(str(tmp_path / "a.sqlite3"))
+    a.add(W, "MP3", "192", str(f), "abc")
+    f.unlink()
+    assert a.lookup(W, "MP3", "192") is None and a.find_by_hash("abc") == []
+    a.close()
+
+def test_queue_skips_archived_without_network(tmp_path):
+    f = tmp_path / "clip.mp3"
+    f.write_bytes(b"x")
+    a = DownloadArchive(str(tmp_path / "a.sqlite3"))
+    a.add(W, "MP3", "192", str(f))
+    q = DownloadQueue(dict(DEFAULT_CFG, music_dir=str(tmp_path)), workers=1, archive=a)
+    try:
+        job = q.submit("https://youtu.be/dQw4w9WgXcQ", "MP3", "192")
+        end = time.monotonic() + 5
+        while not q.idle():
+            assert time.monotonic() < end
+            time.sleep(0.01)
+        assert job.state == DONE and job.skipped and job.filepath == str(f)
+        assert "extract" not in job.timings       # kein Abruf
+    finally:
+        q.shutdown()
+        a.close()
+
+def test_hash_only_with_archive(tmp_path):
+    from ytdl_postproc import with_hash, without_hash, file_sha256
+    f = tmp_path / "out.mp3"
+    f.write_bytes(b"abc")
+    dst, sha, tasks = with_hash(str, str(f))
+    assert dst == str(f) and sha == file_sha256(str(f)) and set(tasks) == {"ffmpeg", "hash"}
+    dst, sha, tasks = without_hash(str, str(f))
+    assert sha is None and set(tasks) == {"ffmpeg"}
@@ -0,0 +1,55 @@
+from datetime import datetime
+import pytest
+from ytdl_bandwidth import BandwidthScheduler, _Flow, global_limit_kb, KB
+
+def sched(limit_kb, *flows):
+    """flows: (Gewicht, Bedarf B/s, Job-Limit KB/s)"""
+    s = BandwidthScheduler({"rate_limit_kb": limit_kb})
+    for i, (w, demand, cap) in enumerate(flows):
+        f = s._flows[i] = _Flow(w, cap * KB, 0.0)
+        f.demand = demand
+    s._allocate()
+    return [s._flows[i].rate for i in range(len(flows))]
+
+INF = float("inf")
+
+def test_unlimited_uses_job_caps_only():
+    assert sched(0, (1, INF, 0), (1, INF, 100)) == [0.0, 100 * KB]
+
+def test_weighted_split():
+    a, v = sched(1000, (4, INF, 0), (1, INF, 0))
+    assert a == pytest.approx(800 * KB) and v == pytest.approx(200 * KB)
+
+def test_water_filling_gives_leftover_to_others():
+    slow, fast = sched(1000, (1, 100 * KB, 0), (1, INF, 0))
+    assert slow == pytest.approx(100 * KB) and fast == pytest.approx(900 * KB)
+
+def test_job_cap_respected_and_rest_redistributed():
+    capped, free = sched(1000, (1, INF, 200), (1, INF, 0))
+    assert capped == pytest.approx(200 * KB) and free == pytest.approx(800 * KB)
+
+def test_schedule_windows():
+    cfg = {"rate_limit_kb": 50, "rate_schedule": [{"from": "22:00", "to": "06:00", "limit_kb": 0},
+                                                  {"from": "08:00", "to": "18:00", "limit_kb": 2000}]}
+    assert global_limit_kb(cfg, datetime(2026, 1, 1, 9, 0)) == 2000
+    assert global_limit_kb(cfg, datetime(2026, 1, 1, 23, 30)) == 0
+    assert global_limit_kb(cfg, datetime(2026, 1, 1, 3, 0)) == 0
+    assert global_limit_kb(cfg, datetime(2026, 1, 1, 19, 0)) == 50
+
+def test_enabled_only_while_a_limit_applies():
+    now = datetime.now()
+    other = f"{(now.hour + 2) % 24:02d}:00"
+    s = BandwidthScheduler({"rate_schedule": [{"from": other, "to": f"{(now.hour + 3) % 24:02d}:00",
+                                               "limit_kb": 100}]})
+    assert not s.enabled()
+    assert s.enabled(cap_kb=50)
+
+def test_snapshot_lists_active_jobs():
+    s = BandwidthScheduler({"rate_limit_kb": 1000})
+    s.consume("a", 1, 4.0)
+    s.consume("v", 1, 1.0)
+    snap = s.snapshot()
+    assert snap["limit"] == 1000 * KB
+    assert snap["flows"]["a"]["rate"] == pytest.approx(800 * KB)
+    s.release("a")
+    assert list(s.snapshot()["flows"]) == ["v"] and s.snapshot()["flows"]["v"]["rate"] == pytest.approx(1000 * KB)
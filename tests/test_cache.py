@@ -0,0 +1,66 @@
+import os
+import pytest
+import ytdl_cache
+from ytdl_cache import InfoCache, canonical_key, describe_stats, _safe_name
+
+class Clock:
+    def __init__(self, t=1_000_000.0):
+        self.t = t
+    def time(self):
+        return self.t
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(ytdl_cache, "time", c)
+    return c
+
+def info(vid, pad=0):
+    return {"id": vid, "title": vid, "formats": [], "description": "x" * pad}
+
+def test_canonical_key_ignores_url_form():
+    k = canonical_key("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+    assert k == "Youtube_dQw4w9WgXcQ"
+    assert canonical_key("https://youtu.be/dQw4w9WgXcQ?t=42") == k
+    assert canonical_key("https://example.com/a.mp4").startswith("url_")
+
+def test_hit_miss_and_stats(tmp_path, clock):
+    c = InfoCache(str(tmp_path))
+    assert c.get("https://example.com/a") is None
+    c.put("https://example.com/a", info("a"))
+    assert c.get("https://example.com/a")["id"] == "a"
+    st = c.stats()
+    assert (st["hits"], st["misses"], st["entries"]) == (1, 1, 1) and st["bytes"] > 0
+    assert describe_stats(st).startswith("Info-Cache: 1 Treffer, 1 Fehlgriffe (50%), 1 Einträge")
+
+def test_ttl_expiry_drops_file(tmp_path, clock):
+    c = InfoCache(str(tmp_path), ttl=60)
+    c.put("https://example.com/a", info("a"))
+    clock.t += 61
+    assert c.get("https://example.com/a") is None
+    assert c.stats()["entries"] == 0 and not os.listdir(tmp_path)
+
+def test_lru_evicts_least_recently_used(tmp_path, clock):
+    urls = [f"https://example.com/{n}" for n in "abc"]
+    c = InfoCache(str(tmp_path), max_bytes=10**9)
+    c.put(urls[0], info("a", 1000))
+    size = c.stats()["bytes"]
+    c.max_bytes = int(size * 2.5)          # Platz für zwei Einträge
+    clock.t += 1; c.put(urls[1], info("b", 1000))
+    clock.t += 1; assert c.get(urls[0])    # a wieder benutzt -> b ist am längsten unbenutzt
+    clock.t += 1; c.put(urls[2], info("c", 1000))
+    assert c.get(urls[1]) is None
+    assert c.get(urls[0]) and c.get(urls[2])
+
+def test_index_survives_restart_and_corrupt_entry_is_a_miss(tmp_path, clock):
+    InfoCache(str(tmp_path)).put("https://example.com/a", info("a"))
+    c = InfoCache(str(tmp_path))
+    assert c.get("https://example.com/a")["id"] == "a"
+    name = _safe_name(canonical_key("https://example.com/a"))
+    (tmp_path / name).write_text("{kaputt", encoding="utf-8")
+    assert c.get("https://example.com/a") is None and c.stats()["entries"] == 0
+
+def test_playlists_are_not_cached(tmp_path, clock):
+    c = InfoCache(str(tmp_path))
+    c.put("https://example.com/list", {"_type": "playlist", "entries": []})
+    assert c.stats()["entries"] == 0
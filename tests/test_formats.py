@@ -0,0 +1,54 @@
+from ytdl_formats import rank_formats, choose_format, post_action, NONE, COPY, TRANSCODE
+
+def fmt(fid, ext, vcodec="none", acodec="none", **kw):
+    return dict(format_id=fid, url=f"https://x/{fid}", ext=ext, vcodec=vcodec, acodec=acodec, **kw)
+
+AAC = fmt("140", "m4a", acodec="mp4a.40.2", abr=128)
+OPUS = fmt("251", "webm", acodec="opus", abr=160)
+V1080 = fmt("137", "mp4", vcodec="avc1.640028", height=1080, tbr=4000)
+V1080_VP9 = fmt("248", "webm", vcodec="vp9", height=1080, tbr=3000)
+V720 = fmt("136", "mp4", vcodec="avc1.4d401f", height=720, tbr=2000)
+MUXED = fmt("18", "mp4", vcodec="avc1.42001E", acodec="mp4a.40.2", height=360, abr=96, filesize=9_000_000)
+
+def info(*formats, duration=100):
+    return {"duration": duration, "formats": list(formats)}
+
+def test_post_action_audio():
+    assert post_action("M4A", [AAC]) == NONE
+    assert post_action("M4A", [OPUS]) == TRANSCODE
+    assert post_action("MP3", [AAC]) == TRANSCODE
+    assert post_action("M4A", [fmt("x", "mp4", acodec="mp4a.40.2")]) == COPY
+
+def test_post_action_muxed_audio_is_never_a_rename():
+    # nur gemuxte Formate: die Tonspur muss herauskopiert werden, sonst landet das Video in der .m4a
+    assert post_action("M4A", [MUXED]) == COPY
+    assert post_action("M4A", [dict(MUXED, ext="m4a")]) == COPY
+
+def test_post_action_video():
+    assert post_action("MP4", [V1080, AAC]) == COPY
+    assert post_action("MP4", [MUXED]) == NONE
+
+def test_m4a_prefers_aac_passthrough():
+    c = choose_format(info(OPUS, AAC, V1080), "M4A", "128")
+    assert c.spec == "140" and c.action == NONE
+
+def test_muxed_fallback_size_counts_audio_only():
+    c = choose_format(info(MUXED), "M4A", "128")
+    assert c.spec == "18" and c.action == COPY
+    assert c.size == 96 * 125 * 100
+
+def test_mp4_height_limit_and_h264_preference():
+    c = choose_format(info(V1080_VP9, V1080, V720, OPUS, AAC), "MP4", "1080")
+    assert c.spec == "137+140"
+    assert choose_format(info(V1080, V720, AAC), "MP4", "720").spec == "136+140"
+
+def test_mp4_below_smallest_takes_smallest():
+    assert choose_format(info(V1080, V720, AAC), "MP4", "480").spec == "136+140"
+
+def test_drm_and_storyboards_are_skipped():
+    drm = dict(AAC, has_drm=True)
+    sb = fmt("sb0", "mhtml", protocol="mhtml")
+    assert [c.spec for c in rank_formats(info(drm, sb, OPUS), "M4A", "128")] == ["251"]
+
+def test_no_formats_returns_none():
+    assert choose_format({}, "MP3", "192") is None
@@ -0,0 +1,90 @@
+import pytest
+from ytdl_ingest import normalize_url, parse_text
+
+W = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+@pytest.mark.parametrize("raw", [
+    "https://youtu.be/dQw4w9WgXcQ",
+    "youtu.be/dQw4w9WgXcQ?si=abc&t=42",
+    "https://m.youtube.com/watch?v=dQw4w9WgXcQ&feature=share",
+    "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ",
+    "HTTPS://WWW.YOUTUBE.COM/watch?utm_source=x&v=dQw4w9WgXcQ#frag",
+    "<https://www.youtube.com/watch?v=dQw4w9WgXcQ>.",
+])
+def test_youtube_forms_collapse(raw):
+    assert normalize_url(raw) == W
+
+def test_playlist_param_kept_after_v():
+    assert normalize_url("https://youtube.com/watch?list=PL1&v=dQw4w9WgXcQ") == W + "&list=PL1"
+
+def test_other_hosts_keep_t_and_port():
+    assert normalize_url("http://127.0.0.1:8765/a.mp4?t=5&utm_medium=m") == "http://127.0.0.1:8765/a.mp4?t=5"
+
+@pytest.mark.parametrize("raw", ["", "müll", "https://localhost/x"])
+def test_invalid(raw):
+    assert normalize_url(raw) is None
+
+def test_parse_text_prefix_and_default():
+    out = parse_text("mp4 720 https://youtu.be/a1\nSiehe youtu.be/b2 und https://x.org/c\n", "MP3")
+    assert out == [("https://youtu.be/a1", "MP4", "720"), ("youtu.be/b2", "MP3", None),
+                   ("https://x.org/c", "MP3", None)]
+
+# -------- Entdoppeln gegen die Queue (Archiv-Stub hält die Jobs an, kein Netzwerk) --------
+import json, threading
+from ytdl_core import DEFAULT_CFG
+from ytdl_queue import DownloadQueue
+from ytdl_journal import JobJournal
+from ytdl_ingest import Ingestor
+
+class HoldArchive:
+    def __init__(self, done):
+        self.done, self.gate = done, threading.Event()
+    def lookup(self, url, fmt, quality):
+        self.gate.wait(5)
+        return self.done
+
+@pytest.fixture
+def queue(tmp_path):
+    done = tmp_path / "x.mp3"
+    done.write_bytes(b"x")
+    archive = HoldArchive(str(done))
+    journal = tmp_path / "journal.jsonl"
+    journal.write_text(json.dumps({"op": "add", "key": "k1", "url": "https://youtu.be/resumed0001",
+                                   "fmt": "MP3", "quality": "192", "parent": None}) + "\n", encoding="utf-8")
+    q = DownloadQueue(dict(DEFAULT_CFG, music_dir=str(tmp_path)), workers=1, archive=archive,
+                      journal=JobJournal(str(journal)))
+    yield q
+    archive.gate.set()
+    q.shutdown()
+
+def feed(ing, text, fmt=None):
+    return ing.feed_text(text, fmt).result(5)
+
+def test_dedup_against_jobs_added_later(queue):
+    ing = Ingestor(queue, "MP3")
+    try:
+        queue.submit("https://youtu.be/dQw4w9WgXcQ", "MP3", "192")          # z. B. aus der Oberfläche
+        assert feed(ing, "https://www.youtube.com/watch?v=dQw4w9WgXcQ&si=x") == (0, 1, 0)
+        assert feed(ing, "https://www.youtube.com/watch?v=dQw4w9WgXcQ", "MP4") == (1, 0, 0)
+    finally:
+        ing.stop()
+
+def test_dedup_against_resumed_and_within_text(queue):
+    queue.resume_unfinished()
+    ing = Ingestor(queue, "MP3")
+    try:
+        assert feed(ing, "https://www.youtube.com/watch?v=resumed0001") == (0, 1, 0)
+        assert feed(ing, "https://x.org/a\nhttps://x.org/a?utm_source=y\nnix") == (1, 1, 0)
+    finally:
+        ing.stop()
+
+def test_cancelled_job_can_be_ingested_again(queue):
+    queue.submit("https://x.org/blocker", "MP3", "192")   # belegt den einzigen Worker
+    ing = Ingestor(queue, "MP3")
+    try:
+        assert feed(ing, "https://x.org/a") == (1, 0, 0)
+        queue.cancel(queue.find("https://x.org/a", "mp3").id)
+        assert feed(ing, "https://x.org/a") == (1, 0, 0)
+    finally:
+        ing.stop()
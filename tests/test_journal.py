@@ -0,0 +1,36 @@
+import json
+from ytdl_journal import _fold, JobJournal
+
+def write(path, *recs, tail=""):
+    path.write_text("".join(json.dumps(r) + "\n" for r in recs) + tail, encoding="utf-8")
+
+def add(key, url="u"):
+    return {"op": "add", "key": key, "url": url, "fmt": "MP3", "quality": "192", "parent": None}
+
+def test_missing_file(tmp_path):
+    assert _fold(str(tmp_path / "nope.jsonl")) == []
+
+def test_ended_jobs_are_dropped_and_parts_kept(tmp_path):
+    p = tmp_path / "j.jsonl"
+    write(p, add("a"), add("b"), {"op": "part", "key": "a", "file": "a.part", "bytes": 10},
+          {"op": "part", "key": "a", "file": "a.part", "bytes": 20}, {"op": "end", "key": "b", "state": "done"})
+    (rec,) = _fold(str(p))
+    assert rec["key"] == "a" and rec["parts"] == {"a.part": 20}
+
+def test_readd_moves_to_end_and_keeps_parts(tmp_path):
+    p = tmp_path / "j.jsonl"
+    write(p, add("a"), {"op": "part", "key": "a", "file": "a.part", "bytes": 5}, add("b"), add("a"))
+    recs = _fold(str(p))
+    assert [r["key"] for r in recs] == ["b", "a"] and recs[1]["parts"] == {"a.part": 5}
+
+def test_torn_last_line_ignored(tmp_path):
+    p = tmp_path / "j.jsonl"
+    write(p, add("a"), tail='{"op": "end", "key": "a"')
+    assert [r["key"] for r in _fold(str(p))] == ["a"]
+
+def test_open_compacts(tmp_path):
+    p = tmp_path / "j.jsonl"
+    write(p, add("a"), add("b"), {"op": "end", "key": "a", "state": "done"})
+    j = JobJournal(str(p))
+    j.close()
+    assert [json.loads(l)["key"] for l in p.read_text().splitlines()] == ["b"]
@@ -0,0 +1,65 @@
+import json
+import pytest
+from ytdl_metrics import Metrics, _pct
+from ytdl_queue import Job, DONE, FAILED, WAITING
+
+def job(state=DONE, **timings):
+    j = Job("https://example.com/a", "MP3", "192")
+    j.state, j.attempts, j.timings = state, 1, dict(timings)
+    return j
+
+def test_pct():
+    assert _pct([], 95) == 0.0
+    assert _pct(list(range(1, 101)), 50) == 51 and _pct(list(range(1, 101)), 95) == 95
+
+def test_record_throughput_and_total():
+    rec = Metrics().record(job(queue_wait=1.0, download=2.0, first_byte=0.5, bytes=4000))
+    assert rec["throughput"] == 2000
+    assert rec["total"] == 3.0              # erstes Byte steckt im Download, zählt nicht doppelt
+
+def test_summary_and_bottleneck():
+    m = Metrics()
+    for d in (1.0, 2.0, 3.0):
+        m.record(job(extract=0.5, download=d, postprocess=1.0))
+    s = m.summary()
+    assert s["download"]["count"] == 3 and s["download"]["avg"] == pytest.approx(2.0)
+    assert s["download"]["max"] == 3.0 and "move" not in s
+    assert m.bottleneck() == ("Netzwerk", pytest.approx(6.0 / 10.5))
+    assert Metrics().bottleneck() == (None, 0.0)
+
+def test_task_summary_counts_steps():
+    m = Metrics()
+    j = job(postprocess=2.0)
+    j.pp_tasks, j.pp_steps = {"ffmpeg": 1.5, "cover": 0.5}, ["loudnorm", "cover"]
+    m.record(j)
+    m.record(job())
+    t = m.task_summary()
+    assert t["ffmpeg"]["sum"] == 1.5 and t["cover"]["count"] == 1 and "hash" not in t
+    assert t["steps"] == {"loudnorm": 1, "cover": 1}
+
+def test_prometheus_counts_states_and_bytes():
+    m = Metrics()
+    m.record(job(download=1.0, bytes=100))
+    m.record(job(FAILED))
+    m.record(job(WAITING))
+    text = m.prometheus()
+    assert 'ytdl_jobs_total{state="done"} 1' in text and 'ytdl_jobs_total{state="waiting"} 1' in text
+    assert 'ytdl_phase_seconds_count{phase="download"} 1' in text
+    assert "ytdl_downloaded_bytes_total 100" in text
+
+def test_jsonl_log_and_export(tmp_path):
+    log = tmp_path / "m.jsonl"
+    m = Metrics(log_path=str(log))
+    m.record(job(download=1.0))
+    m.record(job(FAILED))
+    assert [json.loads(l)["state"] for l in log.read_text().splitlines()] == [DONE, FAILED]
+    out = tmp_path / "out.jsonl"
+    m.write_jsonl(str(out))
+    assert out.read_text() == log.read_text()
+
+def test_ring_buffer_keeps_counters():
+    m = Metrics(maxlen=2)
+    for _ in range(5):
+        m.record(job(download=1.0))
+    assert len(m.records()) == 2
+    assert 'ytdl_jobs_total{state="done"} 5' in m.prometheus()
@@ -0,0 +1,84 @@
+# ffmpeg-Aufgaben mit einem Stub-ffmpeg: schreibt jede absolute Ausgabe-Datei und merkt sich die Argumente
+import os, sys, json, stat
+import pytest
+from ytdl_postproc import claim_path, extras_steps, remux, merge_av, transcode_mp3
+
+FAKE = """#!{python}
+import os, sys, json
+args = sys.argv[1:]
+with open({log!r}, "a") as f:
+    f.write(json.dumps(args) + "\\n")
+for prev, a in zip([""] + args, args):
+    if os.path.isabs(a) and prev != "-i" and not os.path.exists(a):
+        open(a, "wb").write(b"neu")
+"""
+
+@pytest.fixture
+def ff(tmp_path):
+    log = tmp_path / "ffmpeg.log"
+    exe = tmp_path / "ffmpeg"
+    exe.write_text(FAKE.format(python=sys.executable, log=str(log)))
+    exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+    ff = lambda: [json.loads(l) for l in log.read_text().splitlines()]
+    ff.exe = str(exe)
+    return ff
+
+@pytest.fixture
+def out(tmp_path):
+    d = tmp_path / "out"
+    d.mkdir()
+    return d
+
+def test_claim_path_never_reuses_a_name(out):
+    (out / "Titel.mp3").write_bytes(b"alt")
+    assert claim_path(str(out / "Titel.mp3")) == str(out / "Titel (2).mp3")
+    assert claim_path(str(out / "Titel.mp3")) == str(out / "Titel (3).mp3")
+    assert (out / "Titel.mp3").read_bytes() == b"alt"
+
+def test_extras_steps():
+    assert extras_steps(None) == [] and extras_steps({}) == []
+    assert extras_steps({"tags": {"title": "x"}, "loudnorm": -14, "thumb": True, "key": "k"}) == \
+        ["loudnorm", "tags", "thumb"]
+
+def test_thumbnail_and_media_never_overwrite(ff, out):
+    for name, data in (("Titel.m4a", b"alt"), ("Titel.jpg", b"mein Bild")):
+        (out / name).write_bytes(data)
+    src, cover = out / "raw.webm", out / "Titel.k1.cover.webp"
+    src.write_bytes(b"roh"); cover.write_bytes(b"img")
+    dst = remux(ff.exe, str(src), str(out / "Titel.m4a"),
+                {"cover": str(cover), "embed": True, "thumb": True, "key": "k1"}, "m4a")
+    assert dst == str(out / "Titel (2).m4a")
+    assert (out / "Titel (2).jpg").read_bytes() == b"neu"
+    assert (out / "Titel.jpg").read_bytes() == b"mein Bild" and (out / "Titel.m4a").read_bytes() == b"alt"
+    assert sorted(os.listdir(out)) == ["Titel (2).jpg", "Titel (2).m4a", "Titel.jpg", "Titel.m4a"]
+    (args,) = ff()
+    assert args[args.index("-map") + 1] == "0:a:0"          # nur die Tonspur, auch aus gemuxter Quelle
+
+def test_thumbnail_name_taken_by_other_file(ff, out):
+    (out / "Clip.jpg").write_bytes(b"fremd")
+    v, a = out / "v.mp4", out / "a.m4a"
+    v.write_bytes(b"v"); a.write_bytes(b"a")
+    dst = merge_av(ff.exe, str(v), str(a), str(out / "Clip.mp4"), {"thumb": True, "thumb_at": 3, "key": "k2"})
+    assert dst == str(out / "Clip.mp4")
+    assert (out / "Clip (2).jpg").read_bytes() == b"neu" and (out / "Clip.jpg").read_bytes() == b"fremd"
+    assert not v.exists() and not a.exists()
+
+@pytest.mark.parametrize("abr, expect", [(128, "128k"), (None, "192k")])
+def test_loudnorm_reencodes_copied_audio_at_given_bitrate(ff, out, abr, expect):
+    v, a = out / "v.mp4", out / "a.m4a"
+    v.write_bytes(b"v"); a.write_bytes(b"a")
+    merge_av(ff.exe, str(v), str(a), str(out / "Clip.mp4"), {"loudnorm": -14, "abr": abr, "key": "k"})
+    (args,) = ff()
+    assert args[args.index("-c:a") + 1] == "aac" and args[args.index("-b:a") + 1] == expect
+    assert any(x.startswith("loudnorm=I=-14") for x in args)
+
+def test_transcode_uses_job_quality_and_tags(ff, out):
+    src = out / "raw.webm"
+    src.write_bytes(b"roh")
+    dst = transcode_mp3(ff.exe, str(src), str(out / "Lied.mp3"), "320",
+                        {"loudnorm": -14, "tags": {"title": "Lied", "album": None}, "key": "k"})
+    (args,) = ff()
+    assert dst == str(out / "Lied.mp3") and not src.exists()
+    assert args[args.index("-b:a") + 1] == "320k" and args.count("-b:a") == 1
+    assert "title=Lied" in args and not any(a.startswith("album=") for a in args)
+    assert not [n for n in os.listdir(out) if ".pp." in n]     # Temp-Datei umbenannt
@@ -0,0 +1,79 @@
+# ProbeService ohne Netzwerk: probe_info wird ersetzt, Schlüssel kommen aus yt-dlps Extractor-Liste
+import time, threading
+import pytest
+import ytdl_probe
+from ytdl_probe import ProbeService
+from ytdl_cache import canonical_key
+
+A1 = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+A2 = "https://youtu.be/dQw4w9WgXcQ?t=5"     # dasselbe Video
+B = "https://www.youtube.com/watch?v=9bZkp7q19f0"
+
+class FakeProbe:
+    def __init__(self, errors=()):
+        self.calls, self.gate, self.errors = [], threading.Event(), list(errors)
+        self.gate.set()
+
+    def __call__(self, url, cache, ydl):
+        self.calls.append(url)
+        assert self.gate.wait(5)
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"id": url[-11:], "title": url}
+
+@pytest.fixture
+def fake(monkeypatch):
+    for url in (A1, A2, B):
+        canonical_key(url)   # Extractor-Liste vorab laden: sonst endet der erste Abruf, bevor der zweite ankommt
+    f = FakeProbe()
+    monkeypatch.setattr(ytdl_probe, "probe_info", f)
+    monkeypatch.setattr(ytdl_probe, "backoff", lambda n: 0)
+    return f
+
+@pytest.fixture
+def svc():
+    s = ProbeService(workers=4, retries=2)
+    s._ydl = lambda: None
+    yield s
+    s.shutdown()
+
+def test_same_video_probed_once(fake, svc):
+    fake.gate.clear()
+    f1, f2, f3 = svc.probe(A1), svc.probe(A2), svc.probe(A1)
+    assert f1 is f3 and f1 is not f2           # gleiche URL: dasselbe Future; anderes URL-Format: eigenes
+    time.sleep(0.2)                            # beide Schlüssel im Pool bestimmt
+    fake.gate.set()
+    assert f1.result(5) == f2.result(5)
+    assert len(fake.calls) == 1
+
+def test_finished_probe_runs_again(fake, svc):
+    svc.probe(A1).result(5)
+    svc.probe(A1).result(5)
+    assert len(fake.calls) == 2
+
+def test_transient_error_is_retried(fake, svc):
+    fake.errors = [ConnectionResetError("reset")]
+    assert svc.probe(B).result(5)["id"] == "9bZkp7q19f0"
+    assert len(fake.calls) == 2
+
+def test_fatal_error_is_not_retried(fake, svc):
+    fake.errors = [Exception("Video unavailable. This video is private")]
+    with pytest.raises(Exception, match="private"):
+        svc.probe(B).result(5)
+    assert len(fake.calls) == 1
+
+def test_probe_many_yields_every_url(fake, svc):
+    fake.gate.clear()
+    threading.Timer(0.2, fake.gate.set).start()
+    out = {url: (info, err) for url, info, err in svc.probe_many([A1, A2, B, A1])}
+    assert set(out) == {A1, A2, B} and all(err is None for _, err in out.values())
+    assert len(fake.calls) == 2
+
+def test_probe_many_after_shutdown_reports_instead_of_raising(fake, svc):
+    fake.gate.clear()
+    gen = svc.probe_many([A1, B])
+    threading.Timer(0.1, svc.shutdown).start()
+    res = list(gen)
+    fake.gate.set()
+    assert sorted(u for u, _, _ in res) == sorted([A1, B])
+    assert all(info is None and "abgebrochen" in str(err) for _, info, err in res)
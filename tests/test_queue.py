@@ -0,0 +1,81 @@
+# Abbrechen/Wiederholen in der Queue – ohne Netzwerk: ein Archiv-Stub hält den Worker vor dem Abruf fest
+import time, threading
+import pytest
+from ytdl_core import DEFAULT_CFG
+from ytdl_queue import DownloadQueue, QUEUED, DONE, CANCELLED
+
+class GateArchive:
+    """lookup() blockiert, bis `gate` gesetzt ist, und meldet dann `done` (Pfad = schon geladen, None = nicht)."""
+    def __init__(self, done=None):
+        self.done, self.gate, self.entered = done, threading.Event(), threading.Event()
+
+    def lookup(self, url, fmt, quality):
+        self.entered.set()
+        assert self.gate.wait(5)
+        return self.done
+
+def wait_idle(queue, timeout=5):
+    end = time.monotonic() + timeout
+    while not queue.idle():
+        assert time.monotonic() < end, "Queue wurde nicht fertig"
+        time.sleep(0.01)
+
+@pytest.fixture
+def setup(tmp_path):
+    done = tmp_path / "clip.mp3"
+    done.write_bytes(b"x")
+    archive = GateArchive(str(done))
+    queue = DownloadQueue(dict(DEFAULT_CFG, music_dir=str(tmp_path), video_dir=str(tmp_path)),
+                          workers=1, archive=archive)
+    yield queue, archive
+    archive.gate.set()
+    queue.shutdown()
+
+def test_cancel_queued_job_is_immediate(setup):
+    queue, archive = setup
+    a = queue.submit("https://example.com/a", "MP3", "192")
+    b = queue.submit("https://example.com/b", "MP3", "192")
+    assert archive.entered.wait(5)            # einziger Worker steckt in a
+    queue.cancel(b.id)
+    assert b.state == CANCELLED
+    archive.gate.set()
+    wait_idle(queue)
+    assert a.state == DONE and a.skipped
+    assert b.attempts == 0                    # nie gestartet
+
+def test_cancel_job_already_taken_by_worker(setup):
+    queue, archive = setup
+    archive.done = None
+    a = queue.submit("https://example.com/a", "MP3", "192")
+    assert archive.entered.wait(5)
+    assert a.state == QUEUED                  # schon aus der Reihe genommen, Zustand noch nicht gesetzt
+    queue.cancel(a.id)                        # darf keinen ValueError werfen
+    archive.gate.set()
+    wait_idle(queue)
+    assert a.state == CANCELLED and a.attempts == 1
+
+def test_retry_cancelled_job_runs_again(setup):
+    queue, archive = setup
+    a = queue.submit("https://example.com/a", "MP3", "192")
+    b = queue.submit("https://example.com/b", "MP3", "192")
+    assert archive.entered.wait(5)
+    queue.cancel(b.id)
+    archive.gate.set()
+    wait_idle(queue)
+    queue.retry(b.id)
+    wait_idle(queue)
+    assert b.state == DONE and b.attempts == 1 and not b.cancelled
+    queue.retry(a.id)                         # fertige Jobs lassen sich nicht wiederholen
+    assert a.state == DONE and a.attempts == 1
+
+def test_cancel_playlist_cancels_children(setup):
+    queue, archive = setup
+    parent = queue.submit("https://example.com/list", "MP3", "192")
+    child = queue.submit("https://example.com/c", "MP3", "192", parent=parent.id)
+    parent.children.append(child.id)
+    assert archive.entered.wait(5)
+    queue.cancel(parent.id)
+    assert child.state == CANCELLED
+    archive.gate.set()
+    wait_idle(queue)
+    assert parent.state == CANCELLED
@@ -0,0 +1,97 @@
+import socket
+import pytest
+import ytdl_retry
+from ytdl_retry import (CircuitBreaker, Throttled, classify, backoff, host_key, THROTTLE, TRANSIENT, FATAL)
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP Error {status}")
+        self.status = status
+
+class DownloadError(Exception):
+    """wie yt-dlp: ursprüngliche Ausnahme in exc_info"""
+    def __init__(self, msg, inner):
+        super().__init__(msg)
+        self.exc_info = (type(inner), inner, None)
+
+@pytest.mark.parametrize("exc, kind", [
+    (Throttled("langsam"), TRANSIENT),          # Slow-Read: neu verbinden, Host nicht pausieren
+    (HTTPError(429), THROTTLE),
+    (DownloadError("ERROR: Unable to download", HTTPError(403)), THROTTLE),
+    (HTTPError(503), TRANSIENT),
+    (socket.timeout("timed out"), TRANSIENT),
+    (ConnectionResetError(), TRANSIENT),
+    (Exception("Sign in to confirm you're not a bot"), THROTTLE),
+    (Exception("Remote end closed connection without response"), TRANSIENT),
+    (Exception("Video unavailable. This video is private"), FATAL),
+    (HTTPError(404), FATAL),
+])
+def test_classify(exc, kind):
+    assert classify(exc) == kind
+
+def test_classify_follows_cause():
+    try:
+        try:
+            raise HTTPError(429)
+        except HTTPError as e:
+            raise RuntimeError("wrapped") from e
+    except RuntimeError as e:
+        assert classify(e) == THROTTLE
+
+def test_backoff_bounds():
+    for n in range(1, 12):
+        d = backoff(n, base=2, cap=30)
+        assert 1 <= d <= min(30, 2 * 2 ** (n - 1))
+
+@pytest.mark.parametrize("url, key", [
+    ("https://youtu.be/x", "youtube.com"), ("https://music.youtube.com/watch?v=1", "youtube.com"),
+    ("http://127.0.0.1:8765/a.mp4", "127.0.0.1"), ("https://cdn.a.example.org/x", "example.org"),
+])
+def test_host_key(url, key):
+    assert host_key(url) == key
+
+def test_breaker_opens_after_consecutive_failures(monkeypatch):
+    monkeypatch.setattr(ytdl_retry.random, "uniform", lambda a, b: a)
+    b = CircuitBreaker(fails=3, cooldown=60)
+    assert not b.failure("h") and not b.failure("h")
+    assert b.failure("h")
+    assert b.acquire("h") > 0 and "h" in b.paused()
+    assert b.acquire("other") == 0
+
+def test_breaker_half_open_single_probe_then_closes(monkeypatch):
+    monkeypatch.setattr(ytdl_retry.random, "uniform", lambda a, b: a)
+    b = CircuitBreaker(fails=1, cooldown=10)
+    b.failure("h")
+    until = b.acquire("h")
+    assert b.acquire("h", now=until + 1) == 0          # Probe-Job darf
+    assert b.acquire("h", now=until + 2) > 0           # zweiter nicht, solange die Probe läuft
+    b.success("h")
+    assert b.acquire("h") == 0 and b.paused() == {}
+
+def test_breaker_failed_probe_doubles_cooldown(monkeypatch):
+    monkeypatch.setattr(ytdl_retry.random, "uniform", lambda a, b: a)
+    b = CircuitBreaker(fails=1, cooldown=10)
+    b.failure("h")
+    until = b.acquire("h")
+    assert b.acquire("h", now=until + 1) == 0
+    assert b.failure("h")
+    assert 15 < b.paused()["h"] <= 20
+
+def test_slow_read_does_not_trip_breaker_but_429_does(tmp_path):
+    from ytdl_core import DEFAULT_CFG
+    from ytdl_queue import DownloadQueue, Job, WAITING
+    q = DownloadQueue(dict(DEFAULT_CFG, music_dir=str(tmp_path)), workers=1)
+    try:
+        slow, limited = Job("http://127.0.0.1:9/a", "MP3", "192"), Job("http://127.0.0.2:9/b", "MP3", "192")
+        def fail(job, e):          # wie ein gescheiterter Versuch; wieder aus der Reihe, bevor ein Worker startet
+            q._fail(job, e)
+            with q._cv:
+                q._pending.clear()
+        for _ in range(3):
+            fail(slow, Throttled("gedrosselt: 30 KB/s seit 20 s"))
+        assert slow.state == WAITING and slow.retries == 3 and q.paused_hosts() == {}
+        for _ in range(3):
+            fail(limited, HTTPError(429))
+        assert list(q.paused_hosts()) == ["127.0.0.2"]
+    finally:
+        q.shutdown()
@@ -0,0 +1,96 @@
+import os, json, sqlite3
+import pytest
+import ytdl_core, ytdl_state
+from ytdl_state import StateStore
+from ytdl_queue import Job, DONE, FAILED
+
+@pytest.fixture
+def cfg_json(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    monkeypatch.setattr(ytdl_core, "CFG_PATH", str(path))
+    monkeypatch.setattr(ytdl_state, "CFG_PATH", str(path))
+    return path
+
+@pytest.fixture
+def store(tmp_path, cfg_json):
+    s = StateStore(str(tmp_path / "state.sqlite3"))
+    yield s
+    s.close()
+
+def job(state=DONE, n=0):
+    j = Job(f"https://example.com/{n}", "MP3", "192")
+    j.state, j.title, j.attempts = state, f"Titel {n}", 1
+    j.timings = {"download": 2.0, "first_byte": 0.5, "bytes": 1000}
+    return j
+
+def test_history_pages_after_flush(store):
+    for n in range(300):
+        store.record(job(n=n))
+    assert store.flush()
+    assert store.history_count() == 300
+    page = store.history(limit=100)
+    assert [r["title"] for r in page[:2]] == ["Titel 299", "Titel 298"]
+    nxt = store.history(before=page[-1]["id"], limit=100)
+    assert nxt[0]["title"] == "Titel 199"
+
+def test_daily_counters(store):
+    store.record(job(DONE)); store.record(job(DONE)); store.record(job(FAILED))
+    store.flush()
+    (day,) = store.daily()
+    assert (day["done"], day["failed"], day["bytes"]) == (2, 1, 3000)
+    assert day["seconds"] == pytest.approx(6.0)     # erstes Byte zählt nicht extra
+
+def test_save_config_writes_only_changes(store):
+    puts = []
+    real = store._put
+    store._put = lambda sql, args=(): (puts.append(args), real(sql, args))
+    cfg = {"workers": 3, "priority": {"MP3": 4}}
+    store.save_config(cfg)
+    assert len(puts) == 2
+    puts.clear()
+    store.save_config(cfg)
+    assert puts == []
+    cfg["priority"]["MP3"] = 2                    # verschachtelt geändert -> erkannt
+    store.save_config(cfg)
+    assert puts == [("priority", '{"MP3": 2}')]
+
+def test_config_survives_reopen(tmp_path, store):
+    store.save_config({"workers": 7})
+    store.close()
+    s = StateStore(store.path)
+    assert s.load_config() == {"workers": 7}
+    s.close()
+
+def test_corrupt_entry_falls_back_to_default(tmp_path, store, capsys):
+    store.save_config({"workers": 7, "fragments": 8})
+    store.flush()
+    db = sqlite3.connect(store.path)
+    with db:
+        db.execute("UPDATE config SET value='{kaputt' WHERE key='workers'")
+    db.close()
+    assert StateStore(store.path).load_config() == {"fragments": 8}
+    assert "unlesbar" in capsys.readouterr().err
+
+def test_failed_batch_is_rolled_back_and_writer_keeps_going(store, capsys):
+    store._put("INSERT INTO gibts_nicht VALUES (1)")
+    store.flush()
+    assert "fehlgeschlagen" in capsys.readouterr().err
+    store.record(job())
+    store.flush()
+    assert store.history_count() == 1
+
+def test_hand_edited_json_merges_only_changed_keys(store, cfg_json):
+    cfg_json.write_text(json.dumps({"workers": 2, "fragments": 4}), encoding="utf-8")
+    assert store.load_config() == {"workers": 2, "fragments": 4}
+    store.save_config({"workers": 5, "fragments": 4})   # danach in der App geändert
+    cfg_json.write_text(json.dumps({"workers": 2, "fragments": 16}), encoding="utf-8")
+    st = os.stat(cfg_json)
+    os.utime(cfg_json, (st.st_atime, st.st_mtime + 10))
+    assert store.load_config() == {"workers": 5, "fragments": 16}   # nur fragments wurde von Hand geändert
+
+def test_corrupt_json_is_set_aside(store, cfg_json, capsys):
+    store.save_config({"workers": 5})
+    cfg_json.write_text("{kaputt", encoding="utf-8")
+    assert store.load_config() == {"workers": 5}
+    assert os.path.isfile(str(cfg_json) + ".defekt") and not cfg_json.exists()
+    assert "unlesbar" in capsys.readouterr().err
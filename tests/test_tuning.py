@@ -0,0 +1,39 @@
+from ytdl_tuning import FragmentTuner, host_of
+
+URL = "https://www.example.com/v/1.m3u8"
+
+def test_host_of_strips_www():
+    assert host_of(URL) == "example.com"
+
+def test_unknown_host_uses_start():
+    assert FragmentTuner(start=4).suggest(URL) == 4
+
+def test_invalid_measurements_ignored():
+    t = FragmentTuner(start=4)
+    t.record(URL, 4, 0, 1.0)
+    t.record(URL, 4, 1000, 0)
+    assert t.snapshot() == {}
+
+def test_explores_upwards_first():
+    t = FragmentTuner(start=4)
+    t.record(URL, 4, 10_000_000, 1.0)
+    assert t.suggest(URL) == 8
+
+def test_stays_when_more_connections_do_not_pay():
+    t = FragmentTuner(start=4)
+    t.record(URL, 4, 10_000_000, 1.0)
+    t.record(URL, 8, 10_500_000, 1.0)   # +5 % liegt unter `gain` -> 4 reichen
+    assert t.suggest(URL) in (2, 4)       # nach unten darf noch probiert werden
+    t.record(URL, 2, 5_000_000, 1.0)
+    assert t.suggest(URL) == 4
+
+def test_climbs_while_throughput_scales():
+    t = FragmentTuner(start=4, max_n=16)
+    for n in (4, 8, 16):
+        t.record(URL, n, n * 1_000_000, 1.0)
+    assert t.suggest(URL) == 16
+
+def test_hosts_are_independent():
+    t = FragmentTuner(start=4)
+    t.record(URL, 4, 10_000_000, 1.0)
+    assert t.suggest("https://other.org/x.mpd") == 4
@@ -0,0 +1,151 @@
+# ytdl_api.py – kleine asynchrone HTTP-Job-API (nur Standardbibliothek) über der Download-Queue
+import json, asyncio
+from urllib.parse import urlparse, parse_qs
+from ytdl_core import DEFAULT_QUALITY
+
+# Routen:
+#   POST   /jobs             {"url": "...", "format": "mp3", "quality": "320", "limit_kb": 500} -> 201 Job
+#   GET    /jobs             -> Liste aller Jobs
+#   GET    /jobs/<id>        -> Status eines Jobs
+#   DELETE /jobs/<id>        -> abbrechen
+#   POST   /jobs/<id>/retry  -> erneut einreihen
+#   GET    /health           -> {"ok": true, "paused": {host: s}, ...}
+#   GET    /stats            -> Phasen-Zeiten (avg/p50/p95), Engpass, Info-Cache-Treffer und
+#                                Bandbreite je laufendem Job (zugeteilt/gemessen, B/s)
+#   GET    /metrics          -> Prometheus-Text
+#   GET    /history?before=&limit=&state=  -> abgeschlossene Jobs, neueste zuerst (seitenweise)
+
+MAX_BODY = 1024 * 1024
+
+class JobAPI:
+    """
+    Der Event-Loop nimmt nur Anfragen an und schreibt Antworten; `route` läuft in einem Thread
+    (Journal-fsync beim Einreihen, SQLite-Abfragen für Verlauf/Statistik), die eigentliche Arbeit
+    in den Worker-Threads der Queue – daher blockiert keine Anfrage eine andere.
+    """
+    def __init__(self, queue):
+        self.queue = queue
+
+    # ----- HTTP -----
+    async def handle(self, reader, writer):
+        try:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, _ = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    status, payload = 413, {"error": "Anfrage zu groß"}
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    url = urlparse(target)
+                    status, payload = await asyncio.to_thread(self.route, method.upper(), url.path, body,
+                                                              parse_qs(url.query))
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                status, payload = 400, {"error": "ungültige Anfrage"}
+            except Exception as e:   # z. B. OSError aus Journal/SQLite: Antwort statt abgerissener Verbindung
+                status, payload = 500, {"error": f"interner Fehler: {e}"}
+            if isinstance(payload, str):   # /metrics: Prometheus-Text
+                data, ctype = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                data, ctype = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+            writer.write((f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                          f"Content-Type: {ctype}\r\n"
+                          f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n").encode("latin-1") + data)
+            await writer.drain()
+        except ConnectionError:
+            pass   # Client schon weg
+        finally:
+            writer.close()
+
+    def route(self, method, path, body, query=None):
+        parts = [p for p in path.split("/") if p]
+        if parts == ["history"] and method == "GET":
+            return self.history(query or {})
+        if parts == ["health"] and method == "GET":
+            jobs = self.queue.jobs()
+            return 200, {"ok": True, "jobs": len(jobs), "idle": self.queue.idle(),
+                         "paused": {h: round(s) for h, s in self.queue.paused_hosts().items()}}
+        if parts == ["metrics"] and method == "GET":
+            return 200, self.queue.metrics.prometheus(self.queue)
+        if parts == ["stats"] and method == "GET":
+            bound, share = self.queue.metrics.bottleneck()
+            cache = self.queue.cache
+            return 200, {"phases": self.queue.metrics.summary(), "tasks": self.queue.metrics.task_summary(),
+                         "bottleneck": bound, "share": round(share, 3),
+                         "cache": cache.stats() if cache is not None else None,
+                         "bandwidth": self.queue.bandwidth.snapshot()}
+        if not parts or parts[0] != "jobs":
+            return 404, {"error": "nicht gefunden"}
+        if len(parts) == 1:
+            if method == "GET":
+                return 200, [j.to_dict() for j in self.queue.jobs()]
+            if method == "POST":
+                return self.submit(body)
+            return 405, {"error": "Methode nicht erlaubt"}
+        try:
+            job = self.queue.get(int(parts[1]))
+        except ValueError:
+            job = None
+        if job is None:
+            return 404, {"error": "Job unbekannt"}
+        if len(parts) == 2 and method == "GET":
+            return 200, job.to_dict()
+        if len(parts) == 2 and method == "DELETE":
+            self.queue.cancel(job.id)
+            return 200, job.to_dict()
+        if parts[2:] == ["retry"] and method == "POST":
+            self.queue.retry(job.id)
+            return 200, job.to_dict()
+        return 405, {"error": "Methode nicht erlaubt"}
+
+    def history(self, query):
+        if self.queue.history is None:
+            return 404, {"error": "kein Verlauf"}
+        arg = lambda k: (query.get(k) or [None])[0]
+        try:
+            before = int(arg("before")) if arg("before") else None
+            limit = max(1, min(1000, int(arg("limit") or 100)))
+        except ValueError:
+            return 400, {"error": "before/limit müssen Zahlen sein"}
+        return 200, self.queue.history.history(before=before, limit=limit, state=arg("state"))
+
+    def submit(self, body):
+        try:
+            req = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "kein gültiges JSON"}
+        if not isinstance(req, dict):
+            return 400, {"error": "JSON-Objekt erwartet"}
+        url = req.get("url")
+        url = url.strip() if isinstance(url, str) else ""
+        fmt = str(req.get("format") or "MP3").upper()
+        if not url or fmt not in DEFAULT_QUALITY:
+            return 400, {"error": "url fehlt oder format nicht mp3/m4a/mp4"}
+        try:
+            quality = int(req.get("quality") or DEFAULT_QUALITY[fmt])
+            if quality <= 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            return 400, {"error": "quality muss eine positive Zahl sein (kbps bzw. Höhe in px)"}
+        quality = str(quality)
+        try:
+            limit = int(req["limit_kb"]) if req.get("limit_kb") is not None else None
+        except (TypeError, ValueError):
+            return 400, {"error": "limit_kb muss eine Zahl sein (KB/s)"}
+        return 201, self.queue.submit(url, fmt, quality, limit_kb=limit).to_dict()
+
+_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+async def serve(queue, host="127.0.0.1", port=8787):
+    api = JobAPI(queue)
+    server = await asyncio.start_server(api.handle, host, port)
+    print(f"ytdl API läuft auf http://{host}:{port}/jobs", flush=True)
+    async with server:
+        await server.serve_forever()
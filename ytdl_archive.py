@@ -0,0 +1,67 @@
+# ytdl_archive.py – Download-Archiv (SQLite) unter ~/.ytdl-modern/archive.sqlite3
+import os, time, sqlite3, threading
+from ytdl_core import CFG_DIR
+from ytdl_cache import canonical_key
+
+ARCHIVE_PATH = os.path.join(CFG_DIR, "archive.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    key       TEXT PRIMARY KEY,   -- '<Extractor>_<ID>|<Format>|<Qualität>'
+    extractor TEXT,
+    video_id  TEXT,
+    url       TEXT,
+    filepath  TEXT,
+    size      INTEGER,
+    sha256    TEXT,
+    created   REAL
+);
+CREATE INDEX IF NOT EXISTS downloads_sha256 ON downloads(sha256);
+"""
+
+def archive_key(url: str, fmt: str, quality: str):
+    return f"{canonical_key(url)}|{fmt}|{quality}"
+
+class DownloadArchive:
+    """
+    Schlüssel ist Extractor+Video-ID+Format+Qualität, die Prüfung läuft also ohne Netzwerk
+    über den Primärschlüssel. Einträge, deren Datei inzwischen gelöscht wurde, zählen nicht.
+    """
+    def __init__(self, path=ARCHIVE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def lookup(self, url: str, fmt: str, quality: str):
+        """Pfad der bereits geladenen Datei oder None."""
+        with self._lock:
+            row = self._db.execute("SELECT filepath FROM downloads WHERE key=?",
+                                   (archive_key(url, fmt, quality),)).fetchone()
+        if row and row[0] and os.path.isfile(row[0]):
+            return row[0]
+        return None
+
+    def find_by_hash(self, sha256: str):
+        """Vorhandene Dateien mit identischem Inhalt."""
+        with self._lock:
+            rows = self._db.execute("SELECT DISTINCT filepath FROM downloads WHERE sha256=?",
+                                    (sha256,)).fetchall()
+        return [r[0] for r in rows if r[0] and os.path.isfile(r[0])]
+
+    def add(self, url: str, fmt: str, quality: str, filepath, sha256=None, extractor=None, video_id=None):
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            size = None
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?,?,?,?,?,?,?,?)",
+                (archive_key(url, fmt, quality), extractor, video_id, url,
+                 filepath, size, sha256, time.time()))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
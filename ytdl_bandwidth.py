@@ -0,0 +1,146 @@
+# ytdl_bandwidth.py – Bandbreiten-Planer: globale Obergrenze, Limits je Job, Gewichte (Audio vor Video)
+import time, threading
+from datetime import datetime
+
+KB = 1024
+REBALANCE_S = 0.5   # so oft werden die Raten der aktiven Downloads neu verteilt
+BURST_S = 0.25      # so viel Vorlauf darf ein Download ansparen
+STALE_S = 5.0       # Downloads ohne Fortschritt so lange -> nicht mehr aktiv
+
+def _minutes(hhmm: str):
+    h, m = str(hhmm).split(":", 1)
+    return int(h) * 60 + int(m)
+
+def global_limit_kb(cfg, now=None):
+    """
+    Aktuelle Obergrenze in KB/s (0 = unbegrenzt). Zeitfenster aus `rate_schedule` haben Vorrang,
+    z. B. [{"from": "08:00", "to": "18:00", "limit_kb": 2000}]; Fenster über Mitternacht sind erlaubt.
+    """
+    now = now or datetime.now()
+    cur = now.hour * 60 + now.minute
+    for win in cfg.get("rate_schedule") or ():
+        try:
+            a, b = _minutes(win["from"]), _minutes(win["to"])
+        except (KeyError, ValueError):
+            continue
+        if (a <= cur < b) if a <= b else (cur >= a or cur < b):
+            return max(0, int(win.get("limit_kb") or 0))
+    return max(0, int(cfg.get("rate_limit_kb") or 0))
+
+class _Flow:
+    __slots__ = ("weight", "cap", "rate", "next", "bytes", "throttled", "seen", "est", "demand")
+
+    def __init__(self, weight, cap, now):
+        self.weight, self.cap = weight, cap
+        self.rate = 0.0          # zugeteilte Rate in B/s (0 = unbegrenzt)
+        self.next = now          # frühester Zeitpunkt für das nächste Byte (virtuelle Uhr)
+        self.bytes = 0           # seit dem letzten Verteilen geladen
+        self.throttled = True    # neu: Bedarf unbekannt -> wie gebremst behandeln
+        self.seen = now
+        self.est = 0.0           # gemessene Rate im letzten Intervall
+        self.demand = float("inf")
+
+class BandwidthScheduler:
+    """
+    Token-Bucket je Download (virtuelle Uhr statt Zähler), dessen Rate alle REBALANCE_S per
+    Water-Filling aus der globalen Grenze verteilt wird: Downloads, die ihren Anteil gar nicht
+    ausschöpfen (langsamer Server), bekommen nur ihren gemessenen Bedarf, der Rest geht gewichtet
+    an die übrigen. So bleibt die Summe nahe an der Grenze, und kein Job verhungert – ein
+    2160p-Video bekommt neben einem MP3 nur 1/(1+w_audio) der Leitung.
+    Gebremst wird durch Schlafen im Progress-Hook des ladenden Threads.
+    """
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self._flows = {}   # job_id -> _Flow
+        self._lock = threading.Lock()
+        self._balanced = time.monotonic()
+
+    def enabled(self, cap_kb=None):
+        """
+        True, wenn jetzt gerade eine Grenze gilt: global (inkl. Zeitfenster, außerhalb aller Fenster
+        also nur `rate_limit_kb`) oder für diesen Job (`cap_kb`, None -> `job_rate_kb`).
+        """
+        cap = cap_kb if cap_kb is not None else self.cfg.get("job_rate_kb")
+        return bool(global_limit_kb(self.cfg) or cap)
+
+    def weight(self, fmt: str):
+        return max(0.1, float((self.cfg.get("priority") or {}).get(fmt, 1)))
+
+    def consume(self, key, nbytes: int, weight: float = 1.0, cap_kb=None, cancel=None):
+        """
+        `nbytes` wurden für `key` geladen; schläft so lange, bis das im Rahmen der zugeteilten Rate liegt.
+        `cap_kb` ist das Limit dieses Jobs (None -> `job_rate_kb` aus der Konfig), `cancel` ein Event,
+        das den Schlaf vorzeitig beendet.
+        """
+        if nbytes <= 0:
+            return 0.0
+        now = time.monotonic()
+        cap = cap_kb if cap_kb is not None else self.cfg.get("job_rate_kb")
+        with self._lock:
+            f = self._flows.get(key)
+            if f is None:
+                f = self._flows[key] = _Flow(weight, (cap or 0) * KB, now)
+                self._allocate()
+            f.weight, f.cap, f.seen = weight, (cap or 0) * KB, now
+            f.bytes += nbytes
+            if now - self._balanced >= REBALANCE_S:
+                self._rebalance(now)
+            if not f.rate:
+                return 0.0
+            f.next = max(f.next, now - BURST_S) + nbytes / f.rate
+            delay = f.next - now
+            if delay > 0:
+                f.throttled = True
+        if delay <= 0:
+            return 0.0
+        if cancel is not None:
+            cancel.wait(delay)
+        else:
+            time.sleep(delay)
+        return delay
+
+    def release(self, key):
+        with self._lock:
+            if self._flows.pop(key, None) is not None:
+                self._allocate()
+
+    def _rebalance(self, now):
+        """Bedarf aus dem letzten Intervall messen, dann neu verteilen."""
+        window = max(now - self._balanced, 1e-3)
+        self._balanced = now
+        for k in [k for k, f in self._flows.items() if now - f.seen > STALE_S]:
+            del self._flows[k]
+        for f in self._flows.values():
+            f.est = f.bytes / window
+            # nicht gebremst -> Bedarf = gemessene Rate (+25 % Luft zum Hochlaufen)
+            f.demand = float("inf") if f.throttled else max(f.est * 1.25, 16 * KB)
+            f.bytes, f.throttled = 0, False
+        self._allocate()
+
+    def _allocate(self):
+        flows = list(self._flows.values())
+        limit = global_limit_kb(self.cfg) * KB
+        if not limit:
+            for f in flows:
+                f.rate = float(f.cap)     # nur Job-Limit (0 = frei)
+            return
+        demand = {f: min(f.demand, f.cap) if f.cap else f.demand for f in flows}
+        # Water-Filling: wer weniger braucht als seinen gewichteten Anteil, bekommt seinen Bedarf
+        rest, open_ = float(limit), set(flows)
+        while open_:
+            share = rest / sum(f.weight for f in open_)
+            small = [f for f in open_ if demand[f] <= f.weight * share]
+            if not small:
+                for f in open_:
+                    f.rate = f.weight * share
+                break
+            for f in small:
+                f.rate = demand[f]
+                rest -= demand[f]
+                open_.discard(f)
+
+    def snapshot(self):
+        """{job_id: {"rate": B/s zugeteilt, "est": B/s gemessen, "weight": …}} + aktuelle Grenze."""
+        with self._lock:
+            flows = {k: {"rate": f.rate, "est": f.est, "weight": f.weight} for k, f in self._flows.items()}
+        return {"limit": global_limit_kb(self.cfg) * KB, "flows": flows}
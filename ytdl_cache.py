@@ -0,0 +1,134 @@
+# ytdl_cache.py – persistenter Info-Dict-Cache (TTL + LRU) unter ~/.ytdl-modern/info-cache/
+import os, json, time, hashlib, threading
+from functools import lru_cache
+from ytdl_core import CFG_DIR
+
+CACHE_DIR = os.path.join(CFG_DIR, "info-cache")
+
+@lru_cache(maxsize=4096)
+def canonical_key(url: str):
+    """
+    Schlüssel ohne Netzwerkzugriff: '<Extractor>_<Video-ID>' (z. B. 'Youtube_dQw4w9WgXcQ'),
+    damit youtu.be/…, watch?v=… und &t=… auf denselben Eintrag zeigen.
+    """
+    from yt_dlp.extractor import gen_extractor_classes
+    for ie in gen_extractor_classes():
+        if ie.ie_key() == "Generic":
+            continue
+        try:
+            if ie.suitable(url):
+                vid = ie.get_temp_id(url)
+                if vid:
+                    return f"{ie.ie_key()}_{vid}"
+                break
+        except Exception:
+            continue
+    return "url_" + hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+def _safe_name(key: str):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in key) + ".json"
+
+class InfoCache:
+    """
+    Ein JSON pro Video; mtime = letzter Zugriff (LRU). Abgelaufene Einträge (TTL) gelten als
+    Miss, bei Überschreiten von `max_bytes` werden die am längsten unbenutzten gelöscht.
+    """
+    def __init__(self, path=CACHE_DIR, ttl: int = 3600, max_bytes: int = 64 * 1024 * 1024):
+        self.path, self.ttl, self.max_bytes = path, ttl, max_bytes
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._index = None   # name -> [atime, size]
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        self._index = {}
+        for e in os.scandir(self.path):
+            if e.name.endswith(".json"):
+                st = e.stat()
+                self._index[e.name] = [st.st_mtime, st.st_size]
+
+    def get(self, url: str):
+        name = _safe_name(canonical_key(url))
+        with self._lock:
+            self._load_index()
+            ent = self._index.get(name)
+            if ent is None:
+                self.misses += 1
+                return None
+            fp = os.path.join(self.path, name)
+            try:
+                with open(fp, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                data = None
+            if not data or time.time() - data.get("created", 0) > self.ttl:
+                self._drop(name)
+                self.misses += 1
+                return None
+            now = time.time()
+            ent[0] = now
+            try: os.utime(fp, (now, now))
+            except OSError: pass
+            self.hits += 1
+            return data["info"]
+
+    def put(self, url: str, info):
+        # Playlists (Generator-Einträge) und Umleitungen nicht cachen
+        if not info or info.get("_type", "video") != "video":
+            return
+        from yt_dlp import YoutubeDL
+        name = _safe_name(canonical_key(url))
+        payload = json.dumps({"created": time.time(), "url": url,
+                              "info": YoutubeDL.sanitize_info(info)}, ensure_ascii=False)
+        with self._lock:
+            self._load_index()
+            fp = os.path.join(self.path, name)
+            tmp = fp + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp, fp)
+            except OSError:
+                return
+            now = time.time()
+            self._index[name] = [now, len(payload.encode("utf-8"))]
+            self._evict()
+
+    def invalidate(self, url: str):
+        with self._lock:
+            self._load_index()
+            self._drop(_safe_name(canonical_key(url)))
+
+    def _drop(self, name):
+        self._index.pop(name, None)
+        try: os.remove(os.path.join(self.path, name))
+        except OSError: pass
+
+    def _evict(self):
+        total = sum(e[1] for e in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for name, ent in sorted(self._index.items(), key=lambda kv: kv[1][0]):
+            self._drop(name)
+            total -= ent[1]
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            self._load_index()
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._index),
+                    "bytes": sum(e[1] for e in self._index.values())}
+
+def describe_stats(st):
+    """Eine Zeile für Statistik-Anzeigen, z. B. 'Info-Cache: 12 Treffer, 3 Fehlgriffe (80%), 40 Einträge, 1.2 MB'."""
+    n = st["hits"] + st["misses"]
+    rate = f" ({st['hits'] / n:.0%})" if n else ""
+    return (f"Info-Cache: {st['hits']} Treffer, {st['misses']} Fehlgriffe{rate}, "
+            f"{st['entries']} Einträge, {st['bytes'] / 2**20:.1f} MB")
+
+def cache_from_cfg(cfg):
+    return InfoCache(ttl=int(cfg.get("cache_ttl", 3600)),
+                     max_bytes=int(cfg.get("cache_max_mb", 64)) * 1024 * 1024)
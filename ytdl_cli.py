@@ -0,0 +1,284 @@
+# ytdl_cli.py – Kommandozeile ohne GUI: Batch-Downloads und HTTP-Job-API
+#   python ytdl_cli.py batch urls.txt --workers 4 --format mp3 --quality 320
+#   python ytdl_cli.py serve --port 8787 --workers 4
+#   python ytdl_cli.py probe urls.txt --workers 8 > infos.jsonl
+#   python ytdl_cli.py history --state failed
+#   python ytdl_cli.py watch --dir ~/ytdl-drop --port 8788
+import os, sys, json, time, argparse, multiprocessing
+from ytdl_core import load_config, DEFAULT_QUALITY
+from ytdl_queue import DownloadQueue, DOWNLOADING, DONE, FAILED, CANCELLED, WAITING
+from ytdl_cache import cache_from_cfg, describe_stats
+from ytdl_archive import DownloadArchive
+from ytdl_journal import open_journal
+from ytdl_state import get_store
+from ytdl_metrics import Metrics, PHASES, PHASE_TEXT, TASKS, TASK_TEXT
+
+def read_urls(path):
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    with f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+def make_queue(args, on_update=None):
+    cfg = load_config()
+    if args.music_dir: cfg["music_dir"] = args.music_dir
+    if args.video_dir: cfg["video_dir"] = args.video_dir
+    if args.limit is not None: cfg["rate_limit_kb"] = args.limit
+    if args.job_limit is not None: cfg["job_rate_kb"] = args.job_limit
+    workers = args.workers or cfg.get("workers", 3)
+    archive = None if args.no_archive or not cfg.get("use_archive", True) else DownloadArchive()
+    return DownloadQueue(cfg, workers=workers, on_update=on_update, cache=cache_from_cfg(cfg),
+                         archive=archive, journal=None if args.no_journal else open_journal(),
+                         metrics=Metrics(log_path=args.metrics), history=get_store())
+
+def print_stats(metrics, out=sys.stderr):
+    """Phasen-Tabelle und Engpass – zeigt, ob ein Batch an Netzwerk, Extractor oder CPU hängt."""
+    summary = metrics.summary()
+    if not summary:
+        return
+    print(f"\n{'Phase':<20}{'n':>5}{'Ø s':>9}{'p95 s':>9}{'Summe s':>10}", file=out)
+    for p in PHASES:
+        s = summary.get(p)
+        if s:
+            print(f"{PHASE_TEXT[p]:<20}{s['count']:>5}{s['avg']:>9.2f}{s['p95']:>9.2f}{s['sum']:>10.1f}", file=out)
+    tasks = metrics.task_summary()
+    for t in TASKS:
+        s = tasks.get(t)
+        if s:
+            print(f"  {TASK_TEXT[t]:<18}{s['count']:>5}{s['avg']:>9.2f}{s['p95']:>9.2f}{s['sum']:>10.1f}", file=out)
+    if tasks.get("steps"):
+        print("  im ffmpeg-Durchgang: " + ", ".join(f"{k} ×{n}" for k, n in tasks["steps"].items()), file=out)
+    bound, share = metrics.bottleneck()
+    if bound:
+        print(f"Engpass: {bound} ({share:.0%} der Zeit)", file=out)
+
+def job_printer():
+    """on_update für die Queue: eine Zeile je Zustandswechsel."""
+    last = {}
+
+    def on_update(job):
+        if last.get(job.id) == job.state:
+            return
+        last[job.id] = job.state
+        extra = ""
+        if job.skipped:
+            extra = "  (Archiv)"
+        elif job.state in (FAILED, WAITING):
+            extra = f"  {job.error}"
+        elif job.state == DONE and job.filepath:
+            extra = f"  -> {job.filepath}"
+        elif job.state == DOWNLOADING and job.choice is not None:
+            extra = f"  [{job.choice.describe()}]"
+        print(f"[#{job.id:>4}] {job.state:<15} {job.title or job.url}{extra}", flush=True)
+    return on_update
+
+# -------- batch --------
+def cmd_batch(args):
+    fmt = args.format.upper()
+    quality = args.quality or DEFAULT_QUALITY[fmt]
+    queue = make_queue(args, job_printer())
+    # Abgebrochenes vom letzten Lauf fortsetzen, statt dieselben URLs neu zu beginnen
+    resumed = {(j.url, j.fmt, j.quality) for j in queue.resume_unfinished()}
+    n = len(resumed)
+    for url in read_urls(args.file):
+        if (url, fmt, quality) in resumed:
+            continue
+        queue.submit(url, fmt, quality)
+        n += 1
+    if not n:
+        print("Keine URLs gefunden.", file=sys.stderr)
+        return 2
+    t0 = time.monotonic()
+    try:
+        while not queue.idle():
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        print("Abbruch …", file=sys.stderr)
+        queue.shutdown()
+        return 130
+    queue.shutdown(cancel_running=False)
+    jobs = [j for j in queue.jobs() if not j.children]
+    count = lambda st: sum(1 for j in jobs if j.state == st)
+    print(f"\n{count(DONE)} fertig ({sum(1 for j in jobs if j.skipped)} übersprungen), "
+          f"{count(FAILED)} Fehler, {count(CANCELLED)} abgebrochen – {time.monotonic() - t0:.1f} s")
+    if queue.cache is not None:
+        print(describe_stats(queue.cache.stats()))
+    if args.stats:
+        print_stats(queue.metrics)
+    return 1 if count(FAILED) else 0
+
+# -------- probe --------
+def cmd_probe(args):
+    """Nur analysieren: je URL eine JSON-Zeile, in der Reihenfolge, in der die Ergebnisse fertig werden."""
+    from ytdl_core import available_resolutions
+    from ytdl_formats import choose_format
+    from ytdl_probe import ProbeService
+    from ytdl_retry import CircuitBreaker
+    cfg = load_config()
+    fmt = args.format.upper()
+    quality = args.quality or DEFAULT_QUALITY[fmt]
+    urls = list(read_urls(args.file))
+    if not urls:
+        print("Keine URLs gefunden.", file=sys.stderr)
+        return 2
+    prober = ProbeService(cache_from_cfg(cfg), workers=args.workers or cfg.get("probe_workers", 6),
+                          breaker=CircuitBreaker(), retries=cfg.get("retries", 5))
+    t0, failed = time.monotonic(), 0
+    try:
+        for url, info, err in prober.probe_many(urls):
+            if err is not None:
+                failed += 1
+                rec = {"url": url, "error": str(err)}
+            else:
+                choice = choose_format(info, fmt, quality)
+                rec = {"url": url, "id": info.get("id"), "title": info.get("title"),
+                       "duration": info.get("duration"), "resolutions": available_resolutions(info),
+                       "plan": choice.to_dict() if choice else None}
+            print(json.dumps(rec, ensure_ascii=False), flush=True)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        prober.shutdown()
+    print(f"{len(urls)} URLs analysiert, {failed} Fehler – {time.monotonic() - t0:.1f} s", file=sys.stderr)
+    return 1 if failed else 0
+
+# -------- history --------
+def cmd_history(args):
+    """Letzte abgeschlossene Jobs aus dem Zustandsspeicher (neueste zuerst)."""
+    store = get_store()
+    rows = store.history(limit=args.limit, state=args.state, search=args.search)
+    for r in rows:
+        if args.json:
+            print(json.dumps(r, ensure_ascii=False))
+            continue
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["t"]))
+        extra = f"  {r['error']}" if r["error"] else (f"  -> {r['filepath']}" if r["filepath"] else "")
+        print(f"{when}  {r['state']:<10} {r['format']} {r['quality']:<5} {r['title'] or r['url']}{extra}")
+    if not args.json:
+        days = store.daily(30)
+        print(f"\n{store.history_count():,} Einträge; letzte 30 Tage: {sum(d['done'] for d in days)} fertig, "
+              f"{sum(d['failed'] for d in days)} Fehler, {sum(d['bytes'] for d in days) / 2**30:.2f} GB",
+              file=sys.stderr)
+    return 0
+
+# -------- watch --------
+def cmd_watch(args):
+    """Läuft bis Strg+C und reiht ein, was über Drop-Ordner, Port oder Zwischenablage kommt."""
+    from ytdl_ingest import Ingestor, ClipboardWatcher
+    cfg = load_config()
+    folder = args.dir or cfg.get("ingest_dir")
+    port = args.port if args.port is not None else cfg.get("ingest_port", 0)
+    clipboard = args.clipboard or cfg.get("ingest_clipboard", False)
+    paste = None
+    if clipboard:
+        try:
+            from pyperclip import paste
+        except ImportError:
+            print("Zwischenablage braucht pyperclip (pip install pyperclip).", file=sys.stderr)
+            return 2
+    if not (folder or port or paste):
+        print("Nichts zu überwachen: --dir, --port oder --clipboard angeben.", file=sys.stderr)
+        return 2
+    queue = make_queue(args, job_printer())
+    queue.resume_unfinished()
+    on_ingest = lambda new, dup, src: print(f"Eingelesen ({src or '?'}): {new} neu, {dup} doppelt", flush=True)
+    ingest = Ingestor(queue, (args.format or cfg.get("ingest_format", "MP3")).upper(), args.quality, on_ingest)
+    clip = None
+    try:
+        if folder:
+            ingest.watch_dir(os.path.expanduser(folder))
+            print(f"Drop-Ordner: {os.path.abspath(os.path.expanduser(folder))}", file=sys.stderr)
+        if port:
+            print(f"URLs an {args.host}:{ingest.listen(port, args.host)} (eine je Zeile)", file=sys.stderr)
+        if paste:
+            clip = ClipboardWatcher(ingest, paste)
+            print("Zwischenablage wird überwacht", file=sys.stderr)
+    except OSError as e:
+        print("Einspeisen nicht möglich:", e, file=sys.stderr)
+        ingest.stop(); queue.shutdown()
+        return 1
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Beenden …", file=sys.stderr)
+    finally:
+        if clip: clip.stop()
+        ingest.stop()
+        queue.shutdown()
+    return 0
+
+# -------- serve --------
+def cmd_serve(args):
+    import asyncio
+    from ytdl_api import serve
+    queue = make_queue(args)
+    queue.resume_unfinished()
+    try:
+        asyncio.run(serve(queue, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.shutdown()
+    return 0
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog="ytdl", description="YouTube Downloader ohne GUI")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--workers", type=int, help="parallele Downloads (Standard: aus config.json)")
+    common.add_argument("--music-dir", help="Zielordner für MP3")
+    common.add_argument("--video-dir", help="Zielordner für MP4")
+    common.add_argument("--no-archive", action="store_true", help="Download-Archiv nicht verwenden")
+    common.add_argument("--no-journal", action="store_true",
+                        help="unterbrochene Downloads weder merken noch fortsetzen")
+    common.add_argument("--metrics", metavar="DATEI", help="Zeiten je Job als JSON-Zeilen anhängen")
+    common.add_argument("--limit", type=int, metavar="KB", help="Bandbreite aller Downloads in KB/s (0 = frei)")
+    common.add_argument("--job-limit", type=int, metavar="KB", help="Bandbreite je Download in KB/s")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("batch", parents=[common], help="URLs aus Datei laden (eine pro Zeile, '-' = stdin)")
+    b.add_argument("file")
+    b.add_argument("--format", choices=["mp3", "m4a", "mp4", "MP3", "M4A", "MP4"], default="mp3",
+                   help="m4a = AAC-Spur ohne Neu-Kodieren übernehmen")
+    b.add_argument("--quality", help="kbps (mp3) bzw. max. Höhe in px (mp4)")
+    b.add_argument("--stats", action="store_true", help="am Ende Zeit je Phase und Engpass ausgeben")
+    b.set_defaults(func=cmd_batch)
+
+    pr = sub.add_parser("probe", parents=[common], help="URLs nur analysieren (JSON-Zeilen auf stdout)")
+    pr.add_argument("file")
+    pr.add_argument("--format", choices=["mp3", "m4a", "mp4", "MP3", "M4A", "MP4"], default="mp4")
+    pr.add_argument("--quality", help="für die angezeigte Formatwahl")
+    pr.set_defaults(func=cmd_probe)
+
+    h = sub.add_parser("history", help="Verlauf der abgeschlossenen Downloads")
+    h.add_argument("--limit", type=int, default=50)
+    h.add_argument("--state", choices=["done", "failed", "cancelled"])
+    h.add_argument("--search", help="Teil von Titel oder URL")
+    h.add_argument("--json", action="store_true", help="JSON-Zeilen statt Tabelle")
+    h.set_defaults(func=cmd_history)
+
+    w = sub.add_parser("watch", parents=[common], help="Drop-Ordner, Port und/oder Zwischenablage überwachen")
+    w.add_argument("--dir", help="Drop-Ordner (Standard: ingest_dir aus der Konfig)")
+    w.add_argument("--port", type=int, help="TCP-Port für URLs (0 = aus)")
+    w.add_argument("--host", default="127.0.0.1")
+    w.add_argument("--clipboard", action="store_true", help="kopierte Links übernehmen (braucht pyperclip)")
+    w.add_argument("--format", choices=["mp3", "m4a", "mp4", "MP3", "M4A", "MP4"],
+                   help="für URLs ohne Präfix/Unterordner (Standard: ingest_format)")
+    w.add_argument("--quality", help="kbps (mp3) bzw. max. Höhe in px (mp4)")
+    w.set_defaults(func=cmd_watch)
+
+    s = sub.add_parser("serve", parents=[common], help="HTTP-Job-API starten")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=8787)
+    s.set_defaults(func=cmd_serve)
+    return ap
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # ffmpeg-Prozess-Pool in der PyInstaller-EXE
+    sys.exit(main())
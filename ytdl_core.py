@@ -0,0 +1,285 @@
+# ytdl_core.py – gemeinsamer Kern (Konfig, ffmpeg, yt-dlp Optionen) ohne GUI-Abhängigkeiten
+import os, re, sys, json
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+# yt_dlp wird erst bei Bedarf importiert (~0,3 s + Extractor-Liste) – das Fenster soll vorher stehen
+
+# -------- Konfig (persistiert in ~/.ytdl-modern/state.sqlite3, siehe ytdl_state) --------
+DEFAULT_CFG = {
+    "music_dir": os.path.join(os.path.expanduser("~"), "Music"),
+    "video_dir": os.path.join(os.path.expanduser("~"), "Videos"),
+    "last_theme": None,  # light/dark; wenn None -> Windows-Theme
+    "workers": 3,        # parallele Downloads in der Warteschlange
+    "cache_ttl": 3600,   # Sekunden, die ein Info-Dict (inkl. Stream-URLs) gültig bleibt
+    "cache_max_mb": 64,  # Größe des Info-Caches, danach LRU-Verdrängung
+    "use_archive": True, # bereits geladene Videos (Download-Archiv) überspringen
+    "fragments": 4,          # parallele Fragment-Verbindungen bei DASH/HLS
+    "fragments_auto": True,  # Fragment-Anzahl je Host nach gemessenem Durchsatz anpassen
+    "chunk_mb": 10,          # progressive Downloads in Range-Blöcken dieser Größe (0 = aus)
+    "rate_limit_kb": 0,      # Bandbreite aller Downloads zusammen in KB/s (0 = unbegrenzt)
+    "job_rate_kb": 0,        # Obergrenze je Download in KB/s (0 = keine)
+    "rate_schedule": [],     # Zeitfenster, z. B. [{"from": "08:00", "to": "18:00", "limit_kb": 2000}]
+    "priority": {"MP3": 4, "M4A": 4, "MP4": 1},  # Gewichte bei der Aufteilung: Audio vor Video
+    "probe_workers": 6,      # parallele Analysen (Extraktion ohne Download)
+    "retries": 5,            # automatische neue Versuche bei Drosselung (429/403) und Netzfehlern
+    "throttle_kb": 64,       # länger als 20 s langsamer (KB/s) -> neu verbinden (0 = aus)
+    "ingest_dir": "",        # Drop-Ordner: .txt/.url-Dateien mit URLs werden automatisch eingereiht ("" = aus)
+    "ingest_port": 0,        # lokaler TCP-Port für URLs (z. B. aus Skripten/Browser-Erweiterung, 0 = aus)
+    "ingest_format": "MP3",  # Format für eingespeiste URLs ohne Präfix bzw. Unterordner
+    "ingest_clipboard": False,  # kopierte YouTube-Links aus der Zwischenablage übernehmen
+    # Nachbearbeitung – läuft im selben ffmpeg-Durchgang wie Transcode/Mux
+    "pp_loudnorm": False,    # Lautheit angleichen (EBU R128; Ton wird dafür neu kodiert)
+    "pp_lufs": -14,          # Ziel-Lautheit in LUFS
+    "pp_tags": False,        # Titel/Interpret/Album/Jahr als ID3- bzw. MP4-Tags
+    "pp_cover": False,       # Vorschaubild der Seite als Cover einbetten (MP3/M4A)
+    "pp_thumb": False,       # Vorschaubild (.jpg, 320 px) neben die Datei legen
+    "pp_inflight": 0,        # höchstens so viele Aufgaben im ffmpeg-Pool (0 = 2 je CPU-Kern)
+}
+# Standard-Qualität je Format (kbps bzw. max. Höhe), wenn nichts gewählt wurde
+# M4A = AAC-Spur direkt übernehmen (nur wenn keine vorhanden: nach AAC in dieser Bitrate umwandeln)
+DEFAULT_QUALITY = {"MP3": "192", "M4A": "128", "MP4": "1080"}
+AUDIO_FORMATS = ("MP3", "M4A")
+
+CFG_DIR = os.path.join(os.path.expanduser("~"), ".ytdl-modern")
+CFG_PATH = os.path.join(CFG_DIR, "config.json")   # nur noch gelesen: ältere Versionen / Bearbeitung von Hand
+
+def read_json_config():
+    """config.json als dict; eine kaputte Datei wird gemeldet und als config.json.defekt beiseitegelegt."""
+    try:
+        with open(CFG_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("kein JSON-Objekt")
+        return data
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"{CFG_PATH} unlesbar ({e}), verwende gespeicherte/Standardwerte", file=sys.stderr)
+        try:
+            os.replace(CFG_PATH, CFG_PATH + ".defekt")
+        except OSError:
+            pass
+        return {}
+
+def load_config():
+    from ytdl_state import get_store, store_exists
+    cfg = DEFAULT_CFG.copy()
+    if not store_exists() and not os.path.isfile(CFG_PATH):
+        return cfg   # erster Start: nichts anlegen, bevor etwas gespeichert wird
+    try:
+        data = get_store().load_config()
+    except Exception as e:   # z. B. Ordner schreibgeschützt -> wenigstens die JSON-Datei lesen
+        print("Zustandsspeicher nicht verfügbar:", e, file=sys.stderr)
+        data = read_json_config()
+    for k in DEFAULT_CFG:
+        if k in data:
+            cfg[k] = data[k]
+    return cfg
+
+def save_config(cfg):
+    """Kehrt sofort zurück; geänderte Werte schreibt der Speicher-Thread gebündelt und atomar."""
+    from ytdl_state import get_store
+    try:
+        get_store().save_config(cfg)
+    except Exception as e:
+        print("Config speichern fehlgeschlagen:", e, file=sys.stderr)
+
+# -------- URLs vereinheitlichen (Duplikate erkennen: Queue, Einspeisen) --------
+_TRACKING = {"si", "feature", "pp", "fbclid", "gclid", "igshid", "ab_channel"}
+_YT_HOSTS = {"youtube.com", "www.youtube.com", "m.youtube.com"}
+
+def normalize_url(raw: str):
+    """
+    Einheitliche Schreibweise oder None: Schema/Host klein, Tracking-Parameter und Fragment weg,
+    youtu.be/ID, /shorts/ID, /embed/ID und m.youtube.com -> https://www.youtube.com/watch?v=ID.
+    """
+    s = raw.strip().strip("<>\"'()[]{},;.")
+    if not re.match(r"(?i)https?://", s):
+        s = "https://" + s
+    try:
+        u = urlsplit(s)
+        host, port = (u.hostname or "").lower(), u.port
+    except ValueError:
+        return None
+    if not host or "." not in host:
+        return None
+    query = [(k, v) for k, v in parse_qsl(u.query, keep_blank_values=True)
+             if k.lower() not in _TRACKING and not k.lower().startswith("utm_")]
+    path = u.path or "/"
+    if host == "youtu.be":
+        vid = path.strip("/").split("/")[0]
+        host, path, query = "www.youtube.com", "/watch", [("v", vid)] + query
+    if host in _YT_HOSTS:
+        host = "www.youtube.com"
+        query = [(k, v) for k, v in query if k != "t"]   # Startzeit ist für den Download egal
+        m = re.match(r"/(?:shorts|live|embed|v)/([\w-]{6,})", path)
+        if m:
+            path, query = "/watch", [("v", m.group(1))] + query
+        if path == "/watch":   # v zuerst, Rest (z. B. list) stabil sortiert
+            query = sorted(query, key=lambda kv: (kv[0] != "v", kv[0]))
+    netloc = host + (f":{port}" if port else "")
+    return urlunsplit((u.scheme.lower(), netloc, path, urlencode(query), ""))
+
+# -------- ffmpeg (falls mit PyInstaller gebündelt) --------
+def get_ffmpeg_location():
+    base = getattr(sys, "_MEIPASS", None)
+    if base:
+        cand = os.path.join(base, "ffmpeg")
+        if os.path.isdir(cand):
+            return cand
+    return None
+
+def prewarm():
+    """
+    yt-dlp samt Extractor-Klassen laden (für einen Hintergrund-Thread nach dem ersten Zeichnen),
+    damit der erste Klick auf „Analysieren“/„Download“ nicht auf die Imports wartet.
+    """
+    from yt_dlp import YoutubeDL  # noqa: F401
+    from ytdl_cache import canonical_key
+    canonical_key("https://www.youtube.com/watch?v=dQw4w9WgXcQ")  # kompiliert die URL-Regexe bis YouTube
+
+def ydl_basic_opts():
+    opts = {"quiet": True, "noprogress": True}
+    ffdir = get_ffmpeg_location()
+    if ffdir:
+        opts["ffmpeg_location"] = ffdir
+    return opts
+
+def extract_info_cached(ydl, url: str, cache=None):
+    """
+    Unverarbeitetes Info-Dict (process=False) – aus dem Cache oder per Extraktion.
+    Gibt (info, from_cache) zurück; weiterverarbeiten mit ydl.process_ie_result(info, ...).
+    """
+    if cache is not None:
+        info = cache.get(url)
+        if info is not None:
+            return info, True
+    info = ydl.extract_info(url, download=False, process=False)
+    if cache is not None:
+        cache.put(url, info)
+    return info, False
+
+# -------- Playlists / Kanäle --------
+def is_playlist(info):
+    return (info or {}).get("_type") in ("playlist", "multi_video")
+
+def iter_entry_urls(ydl, info, cache=None, depth: int = 0):
+    """
+    Generator über die Video-URLs eines unverarbeiteten Playlist-/Kanal-Info-Dicts.
+    `entries` ist beim Extractor selbst ein Generator: weitere Seiten werden erst geladen,
+    wenn weiter iteriert wird – die ersten Einträge sind also nach Sekunden verfügbar.
+    """
+    for entry in info.get("entries") or ():
+        if not entry:
+            continue
+        typ = entry.get("_type", "video")
+        if typ in ("playlist", "multi_video"):
+            yield from iter_entry_urls(ydl, entry, cache, depth + 1)
+            continue
+        url = entry.get("webpage_url") if typ == "video" else entry.get("url")
+        if not url:
+            continue
+        ie = ydl.get_info_extractor(entry["ie_key"]) if entry.get("ie_key") else None
+        if typ == "video" or (ie is not None and ie.is_single_video(url)) or depth >= 3:
+            yield url
+            continue
+        # unbekannt (z. B. Kanal-Tab): auflösen, ggf. rekursiv weiter
+        sub, _ = extract_info_cached(ydl, url, cache)
+        if is_playlist(sub):
+            yield from iter_entry_urls(ydl, sub, cache, depth + 1)
+        else:
+            yield url
+
+# -------- Qualitäten pro URL ermitteln --------
+def probe_info(url: str, cache=None, ydl=None):
+    """
+    Unverarbeitetes Info-Dict eines Videos samt vollständiger Formatliste
+    (bei Playlists das des ersten Eintrags als Richtwert). `ydl` = vorhandene Instanz wiederverwenden.
+    """
+    if ydl is None:
+        from yt_dlp import YoutubeDL
+        with YoutubeDL(ydl_basic_opts()) as ydl:
+            return probe_info(url, cache, ydl)
+    info, _ = extract_info_cached(ydl, url, cache)
+    if is_playlist(info):
+        first = next(iter_entry_urls(ydl, info, cache), None)
+        info = extract_info_cached(ydl, first, cache)[0] if first else {}
+    return info
+
+def available_resolutions(info):
+    """
+    Liefert Liste vorhandener Video-Höhen (als Strings), z. B. ['480','720','1080'].
+    """
+    heights = set()
+    for f in info.get("formats", []):
+        if f.get("vcodec") and f.get("vcodec") != "none":
+            h = f.get("height")
+            if isinstance(h, int) and h > 0:
+                heights.add(h)
+    vals = sorted(heights)  # aufsteigend
+    # Optional auf gängige Raster filtern, Reihenfolge erhalten
+    common = ["2160","1440","1080","720","480","360","240"]
+    if vals:
+        s = [str(v) for v in vals]
+        filtered = [v for v in common if v in s]
+        return filtered or s
+    return []
+
+def probe_available_resolutions(url: str, cache=None):
+    return available_resolutions(probe_info(url, cache))
+
+# -------- yt-dlp Optionen --------
+def build_opts(fmt: str, quality: str, progress_hook, post_hook, cfg):
+    opts = {
+        "quiet": True,
+        "noprogress": False,
+        "progress_hooks": [progress_hook],          # Download-Status
+        "postprocessor_hooks": [post_hook],         # finaler Dateipfad
+        "outtmpl": None,
+    }
+    ffdir = get_ffmpeg_location()
+    if ffdir:
+        opts["ffmpeg_location"] = ffdir
+    # segmentierter Download: Fragmente parallel, große Dateien in Range-Blöcken
+    opts["concurrent_fragment_downloads"] = max(1, int(cfg.get("fragments", 4)))
+    chunk = int(cfg.get("chunk_mb", 0) or 0)
+    if chunk > 0:
+        opts["http_chunk_size"] = chunk * 1024 * 1024
+
+    if fmt in AUDIO_FORMATS:
+        opts["outtmpl"] = os.path.join(cfg["music_dir"], "%(title)s.%(ext)s")
+        opts.update({
+            # M4A: AAC-Spur bevorzugen, dann reicht Stream-Copy statt Neu-Kodieren
+            "format": "bestaudio/best" if fmt == "MP3" else "bestaudio[acodec^=mp4a]/bestaudio/best",
+            "postprocessors": [{
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": fmt.lower(),
+                "preferredquality": quality  # "128","192","256","320"
+            }]
+        })
+    else:
+        opts["outtmpl"] = os.path.join(cfg["video_dir"], "%(title)s.%(ext)s")
+        vfmt = f"bestvideo[height<={quality}]+bestaudio/best"
+        opts.update({
+            "format": vfmt,
+            "merge_output_format": "mp4"
+        })
+    return opts
+
+def target_dir(fmt: str, cfg):
+    return cfg["music_dir"] if fmt in AUDIO_FORMATS else cfg["video_dir"]
+
+def build_fetch_opts(fmt: str, quality: str, progress_hook, post_hook, cfg, tag: str = ""):
+    """
+    Optionen nur für die Netzwerk-Stufe: lädt die Rohstreams (je Format eine Datei),
+    ohne MP3-Transcode und ohne Mux – das übernimmt danach ytdl_postproc im Prozess-Pool.
+    `tag` macht die Rohdateinamen eindeutig, wenn mehrere Jobs parallel laufen.
+    """
+    opts = build_opts(fmt, quality, progress_hook, post_hook, cfg)
+    opts.pop("postprocessors", None)
+    opts.pop("merge_output_format", None)
+    tag = f".{tag}" if tag else ""
+    opts["outtmpl"] = os.path.join(target_dir(fmt, cfg), f"%(id)s{tag}.f%(format_id)s.%(ext)s")
+    return opts
+
+def final_outtmpl(fmt: str, cfg):
+    return os.path.join(target_dir(fmt, cfg), "%(title)s.%(ext)s")
@@ -0,0 +1,138 @@
+# ytdl_formats.py – Format-Auswahl: Kandidaten aus dem Info-Dict bewerten, unnötige Transcodes vermeiden
+from ytdl_core import AUDIO_FORMATS
+
+# Aufwand der Nachbearbeitung (grob, relativ): umbenennen < Stream-Copy < Neu-Kodieren
+NONE, COPY, TRANSCODE = "none", "copy", "transcode"
+POST_COST = {NONE: 0, COPY: 1, TRANSCODE: 20}
+ACTION_TEXT = {NONE: "ohne Umwandlung", COPY: "nur Stream-Copy (kein Transcode)", TRANSCODE: "Transcode nötig"}
+ACTION_SHORT = {NONE: "direkt", COPY: "Copy", TRANSCODE: "Transcode"}   # für Tabellenspalten
+
+# Kompatibilität im MP4-Container (höher = spielt auf mehr Geräten ohne Umwandlung)
+VCOMPAT = {"h264": 4, "hevc": 2, "av1": 2, "vp9": 1}
+ACOMPAT = {"aac": 3, "mp3": 2, "opus": 1}
+# Zielcodec und Dateiendung der Audio-Modi
+AUDIO_TARGET = {"MP3": ("mp3", "mp3"), "M4A": ("aac", "m4a")}
+
+def codec_family(codec):
+    c = (codec or "").lower()
+    if c in ("", "none"):
+        return None
+    for prefix, fam in (("avc", "h264"), ("h264", "h264"), ("hvc", "hevc"), ("hev", "hevc"), ("h265", "hevc"),
+                        ("vp9", "vp9"), ("vp09", "vp9"), ("av01", "av1"), ("mp4a", "aac"), ("aac", "aac"),
+                        ("opus", "opus"), ("vorbis", "vorbis"), ("mp3", "mp3"), ("flac", "flac")):
+        if c.startswith(prefix):
+            return fam
+    return c.split(".", 1)[0]
+
+def has_video(f):
+    v = f.get("vcodec")
+    return v not in (None, "none") or (v is None and bool(f.get("height")))
+
+def has_audio(f):
+    a = f.get("acodec")
+    return a not in (None, "none") or (a is None and f.get("vcodec") is None)   # unbekannt -> mit Ton
+
+def est_size(f, duration=None):
+    """Dateigröße in Bytes: Angabe des Extractors oder Bitrate × Dauer."""
+    size = f.get("filesize") or f.get("filesize_approx")
+    if size:
+        return int(size)
+    tbr = f.get("tbr") or ((f.get("abr") or 0) + (f.get("vbr") or 0))
+    return int(tbr * 125 * duration) if tbr and duration else None
+
+def _abr(f):
+    return f.get("abr") or (f.get("tbr") if not has_video(f) else 0) or 0
+
+def post_action(fmt, formats):
+    """Was nach dem Download mit diesen Formaten noch passiert: NONE, COPY oder TRANSCODE."""
+    if fmt in AUDIO_FORMATS:
+        f = formats[0]
+        fam, ext = AUDIO_TARGET[fmt]
+        if codec_family(f.get("acodec")) != fam:
+            return TRANSCODE
+        # Bild+Ton (nur gemuxte Formate angeboten): Tonspur herauskopieren, nie einfach umbenennen
+        return NONE if f.get("ext") == ext and not has_video(f) else COPY
+    return COPY if len(formats) > 1 else NONE
+
+class FormatChoice:
+    """Ein bewerteter Kandidat: ein Format oder Video+Audio, dazu Nachbearbeitung und Größe."""
+    def __init__(self, fmt, quality, formats, duration=None):
+        self.fmt, self.quality, self.formats = fmt, quality, formats
+        self.action = post_action(fmt, formats)
+        if fmt in AUDIO_FORMATS and self.action == TRANSCODE and duration:
+            self.size = int(int(quality) * 125 * duration)      # Zielbitrate × Dauer
+        elif fmt in AUDIO_FORMATS and has_video(formats[0]):
+            abr = formats[0].get("abr")                         # in der Datei landet nur die Tonspur
+            self.size = int(abr * 125 * duration) if abr and duration else None
+        else:
+            sizes = [est_size(f, duration) for f in formats]
+            self.size = sum(sizes) if all(sizes) else None
+
+    @property
+    def spec(self):
+        """Format-Selektor für yt-dlp, z. B. '137+140'."""
+        return "+".join(str(f["format_id"]) for f in self.formats)
+
+    @property
+    def cost(self):
+        return POST_COST[self.action]
+
+    def label(self):
+        out = []
+        for f in self.formats:
+            if has_video(f):
+                v = codec_family(f.get("vcodec")) or f.get("ext") or "?"
+                out.append(f"{f['height']}p {v}" if f.get("height") else v)
+            if has_audio(f) and not (has_video(f) and len(self.formats) > 1):
+                a = codec_family(f.get("acodec")) or f.get("ext") or "?"
+                out.append(f"{a.upper()} {_abr(f):.0f}k" if _abr(f) else a.upper())
+        return " + ".join(out)
+
+    def describe(self):
+        """Text für die Oberfläche: Quelle, erwartete Größe, ob umgewandelt wird."""
+        size = f"≈ {self.size / 1024 / 1024:.0f} MB" if self.size else "Größe unbekannt"
+        return f"{self.label()} · {size} · {ACTION_TEXT[self.action]}"
+
+    def to_dict(self):
+        return {"spec": self.spec, "action": self.action, "size": self.size, "label": self.label()}
+
+def rank_formats(info, fmt, quality):
+    """
+    Alle sinnvollen Kandidaten, bester zuerst. Bewertet wird nach Qualität (Höhe bzw. Bitrate bis
+    zur gewünschten Stufe), Nachbearbeitungsaufwand, Codec-Kompatibilität und zuletzt Größe.
+    """
+    formats = [f for f in (info or {}).get("formats") or () if f.get("format_id") and f.get("url")]
+    # was yt-dlp beim Auflösen ohnehin verwirft (Storyboards, DRM), gar nicht erst anbieten
+    formats = [f for f in formats if f.get("protocol") not in ("mhtml",) and f.get("ext") != "mhtml"
+               and not f.get("has_drm")]
+    if not formats:
+        return []
+    dur = info.get("duration")
+    q = int(quality)
+    if fmt in AUDIO_FORMATS:
+        cands = [f for f in formats if has_audio(f) and not has_video(f)] or [f for f in formats if has_audio(f)]
+        choices = [FormatChoice(fmt, quality, [f], dur) for f in cands]
+        # günstigste Nachbearbeitung zuerst, dann Bitrate bis zur Zielstufe, dann kleinere Datei
+        return sorted(choices, key=lambda c: (c.cost, -min(_abr(c.formats[0]), q), c.size or 0))
+
+    videos = [f for f in formats if has_video(f)]
+    fits = [f for f in videos if (f.get("height") or 0) <= q] or \
+           sorted(videos, key=lambda f: f.get("height") or 0)[:1]
+    audios = [f for f in formats if has_audio(f) and not has_video(f)]
+    best_audio = max(audios, key=lambda f: (ACOMPAT.get(codec_family(f.get("acodec")), 0), _abr(f)), default=None)
+    choices = []
+    for v in fits:
+        if has_audio(v):
+            choices.append(FormatChoice(fmt, quality, [v], dur))
+        elif best_audio is not None:
+            choices.append(FormatChoice(fmt, quality, [v, best_audio], dur))
+    def key(c):
+        v, a = c.formats[0], c.formats[-1]
+        return (-(v.get("height") or 0), -VCOMPAT.get(codec_family(v.get("vcodec")), 0),
+                -ACOMPAT.get(codec_family(a.get("acodec")), 0), c.cost, -(v.get("tbr") or 0))
+    return sorted(choices, key=key)
+
+def choose_format(info, fmt, quality):
+    """Bester Kandidat oder None (keine Formatliste -> yt-dlp entscheidet wie bisher)."""
+    ranked = rank_formats(info, fmt, quality)
+    return ranked[0] if ranked else None
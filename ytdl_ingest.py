@@ -0,0 +1,269 @@
+# ytdl_ingest.py – URLs aus Drop-Ordner, Zwischenablage und lokalem Socket direkt in die Download-Queue
+import os, re, sys, time, shutil, threading, socketserver
+from queue import SimpleQueue, Empty
+from concurrent.futures import Future
+from ytdl_core import DEFAULT_QUALITY, normalize_url   # normalize_url: auch der Index der Queue
+from ytdl_queue import FAILED, CANCELLED
+
+# watchdog (Abhängigkeit, in den .spec-Dateien gebündelt): das Betriebssystem meldet neue Dateien
+# (inotify, ReadDirectoryChangesW, FSEvents). Nur falls es fehlt, wird der Ordner alle POLL_S Sekunden gelesen
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+POLL_S = 2.0
+SETTLE_S = 0.3                        # Datei so lange unverändert -> fertig geschrieben
+DROP_EXT = (".txt", ".url", ".webloc")
+DONE_DIR = "erledigt"                 # verarbeitete Dateien landen hier (kein zweites Einlesen nach Neustart)
+
+# -------- URLs erkennen --------
+_URL_RE = re.compile(r"(?i)(?:https?://|(?:www\.|m\.)?youtu(?:be\.com|\.be)/)[^\s<>\"'\[\]]+")
+_PREFIX_RE = re.compile(r"(?i)^\s*(mp3|m4a|mp4)(?:[\s:]+(\d{2,4}))?\s+")   # "mp4 720 https://…"
+
+def parse_text(text: str, fmt: str):
+    """[(url, Format, Qualität|None)] aus beliebigem Text; eine Zeile darf mit 'mp4 720 ' o. Ä. beginnen."""
+    out = []
+    for line in text.splitlines():
+        lfmt, quality = fmt, None
+        m = _PREFIX_RE.match(line)
+        if m:
+            lfmt, quality = m.group(1).upper(), m.group(2)
+        for raw in _URL_RE.findall(line):
+            out.append((raw, lfmt, quality))
+    return out
+
+# -------- Einspeisen --------
+class Ingestor:
+    """
+    Nimmt Text aus beliebigen Quellen an (`feed_text`, thread-sicher, kehrt sofort zurück) und reiht
+    ihn in einem eigenen Thread ein: alles, was gerade ansteht, wird zusammen erkannt, entdoppelt und
+    je Format mit einem `submit_many` übergeben – auch tausende URLs kosten so nur einen Journal-Sync.
+    Doppelt ist eine URL, solange ihr Job wartet, läuft oder fertig ist (nach Fehler/Abbruch nicht) –
+    geprüft gegen den Index der Queue (`find`), also auch gegen Jobs aus Oberfläche, API, Playlists und Journal.
+    Zielordner und yt-dlp-Optionen kommen wie sonst aus der Konfig der Queue.
+    """
+    def __init__(self, queue, fmt: str = "MP3", quality=None, on_ingest=None):
+        self.queue = queue
+        self.fmt = fmt.upper()
+        self.quality = quality
+        self.on_ingest = on_ingest      # (neu, doppelt, Quelle) nach jedem Durchgang, aus dem Ingest-Thread
+        self.counts = {"new": 0, "dup": 0, "invalid": 0}
+        self._in = SimpleQueue()
+        self._stop = threading.Event()
+        self._observer = None
+        self._servers = []
+        self._thread = threading.Thread(target=self._loop, name="ingest", daemon=True)
+        self._thread.start()
+
+    def feed_text(self, text: str, fmt=None, source: str = ""):
+        """Future mit (neu, doppelt, ungültig) für genau diesen Text."""
+        fut = Future()
+        self._in.put((text, (fmt or self.fmt).upper(), source, fut))
+        return fut
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                items = [self._in.get(timeout=0.5)]
+            except Empty:
+                continue
+            while True:                 # Burst: alles Wartende in einem Durchgang
+                try:
+                    items.append(self._in.get_nowait())
+                except Empty:
+                    break
+            try:
+                self._ingest(items)
+            except Exception as e:      # Ingest-Thread darf nicht sterben
+                print("Einlesen fehlgeschlagen:", e, file=sys.stderr)
+                for *_, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    def _ingest(self, items):
+        batches = {}                    # (Format, Qualität) -> [url]
+        results, claimed = [], set()    # claimed: in diesem Durchgang schon vorgemerkt
+        for text, fmt, source, fut in items:
+            new = dup = bad = 0
+            for raw, lfmt, quality in parse_text(text, fmt):
+                url = normalize_url(raw)
+                if url is None or lfmt not in DEFAULT_QUALITY:
+                    bad += 1
+                    continue
+                job = self.queue.find(url, lfmt)
+                if (url, lfmt) in claimed or (job is not None and job.state not in (FAILED, CANCELLED)):
+                    dup += 1
+                    continue
+                claimed.add((url, lfmt))
+                q = quality or self.quality or DEFAULT_QUALITY[lfmt]
+                batches.setdefault((lfmt, q), []).append(url)
+                new += 1
+            results.append((fut, source, (new, dup, bad)))
+        for (fmt, quality), urls in batches.items():
+            self.queue.submit_many(urls, fmt, quality)
+        for fut, source, (new, dup, bad) in results:
+            self.counts["new"] += new
+            self.counts["dup"] += dup
+            self.counts["invalid"] += bad
+            if self.on_ingest and (new or dup):
+                try:
+                    self.on_ingest(new, dup, source)
+                except Exception:
+                    pass
+            fut.set_result((new, dup, bad))
+
+    # ----- Drop-Ordner -----
+    def watch_dir(self, path: str):
+        """
+        Neue .txt/.url/.webloc-Dateien in `path` einlesen und nach `erledigt/` verschieben.
+        Unterordner mp3/m4a/mp4 legen das Format fest. Vorhandene Dateien werden sofort verarbeitet.
+        """
+        path = os.path.abspath(path)
+        for sub in ("", "mp3", "m4a", "mp4"):
+            os.makedirs(os.path.join(path, sub), exist_ok=True)
+        self._drop, self._files = path, SimpleQueue()
+        threading.Thread(target=self._file_loop, name="ingest-files", daemon=True).start()
+        self._scan()
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_DropHandler(self._offer), path, recursive=True)
+            self._observer.start()
+        else:
+            print(f"watchdog nicht installiert – Drop-Ordner wird alle {POLL_S:.0f} s gelesen "
+                  "(pip install watchdog)", file=sys.stderr)
+            threading.Thread(target=self._poll_loop, name="ingest-poll", daemon=True).start()
+
+    def _offer(self, fp):
+        rel = os.path.relpath(fp, self._drop).split(os.sep)
+        if fp.lower().endswith(DROP_EXT) and len(rel) <= 2 and DONE_DIR not in rel and not rel[-1].startswith("."):
+            self._files.put(fp)
+
+    def _scan(self):
+        for sub in ("", "mp3", "m4a", "mp4"):
+            try:
+                with os.scandir(os.path.join(self._drop, sub)) as it:
+                    for e in it:
+                        if e.is_file():
+                            self._offer(e.path)
+            except OSError:
+                pass
+
+    def _poll_loop(self):
+        while not self._stop.wait(POLL_S):
+            self._scan()
+
+    def _file_loop(self):
+        pending = {}                    # Pfad -> (Größe, mtime) beim letzten Blick
+        while not self._stop.is_set():
+            try:
+                fp = self._files.get(timeout=SETTLE_S)
+                pending.setdefault(fp, None)
+                continue                # erst alle gerade gemeldeten Ereignisse einsammeln
+            except Empty:
+                pass
+            for fp in list(pending):
+                try:
+                    st = os.stat(fp)
+                except OSError:
+                    pending.pop(fp)     # schon verarbeitet/verschoben
+                    continue
+                sig = (st.st_size, st.st_mtime_ns)
+                if pending[fp] != sig:
+                    pending[fp] = sig   # noch in Bewegung -> nächste Runde
+                    continue
+                pending.pop(fp)
+                self._ingest_file(fp)
+
+    def _ingest_file(self, fp):
+        sub = os.path.basename(os.path.dirname(fp)).upper()
+        fmt = sub if sub in DEFAULT_QUALITY and os.path.dirname(os.path.dirname(fp)) == self._drop else self.fmt
+        try:
+            with open(fp, "r", encoding="utf-8-sig", errors="replace") as f:
+                text = f.read()
+        except OSError as e:
+            print(f"{fp}: {e}", file=sys.stderr)
+            return
+        self.feed_text(text, fmt, source=os.path.basename(fp))
+        done = os.path.join(self._drop, DONE_DIR)
+        os.makedirs(done, exist_ok=True)
+        try:
+            shutil.move(fp, os.path.join(done, time.strftime("%Y%m%d-%H%M%S-") + os.path.basename(fp)))
+        except OSError as e:
+            print(f"{fp} nicht verschoben: {e}", file=sys.stderr)
+
+    # ----- lokaler Socket -----
+    def listen(self, port: int, host: str = "127.0.0.1"):
+        """TCP-Zeilenprotokoll: URLs (optional mit 'mp4 720 '-Präfix) senden, Antwort 'ok <neu> <doppelt> <ungültig>'."""
+        ingestor = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                data = self.rfile.read().decode("utf-8", "replace")   # bis der Client seine Seite schließt
+                new, dup, bad = ingestor.feed_text(data, source=f"socket {self.client_address[0]}").result()
+                self.wfile.write(f"ok {new} {dup} {bad}\n".encode())
+
+        srv = socketserver.ThreadingTCPServer((host, port), Handler)
+        srv.daemon_threads = True
+        threading.Thread(target=srv.serve_forever, name="ingest-socket", daemon=True).start()
+        self._servers.append(srv)
+        return srv.server_address[1]
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+        for srv in self._servers:
+            srv.shutdown()
+            srv.server_close()
+
+class _DropHandler(FileSystemEventHandler):
+    def __init__(self, offer):
+        self.offer = offer
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.offer(event.src_path)
+
+    def on_modified(self, event):
+        self.on_created(event)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.offer(event.dest_path)
+
+class ClipboardWatcher:
+    """
+    Zwischenablage abfragen (es gibt kein plattformübergreifendes Ereignis dafür); nur neue Inhalte
+    mit URLs gehen an den Ingestor. Mit `paste` (z. B. pyperclip.paste) in einem eigenen Thread, ohne
+    ruft der Aufrufer `check(text)` selbst auf – so die Tk-Oberfläche in ihrem Takt (Tk ist nicht thread-sicher).
+    """
+    def __init__(self, ingestor, paste=None, interval: float = 1.0, initial=None):
+        self.ingestor, self.paste, self.interval = ingestor, paste, interval
+        self._last = initial            # was beim Start schon drin ist, nicht laden
+        self._stop = threading.Event()
+        if paste is not None:
+            threading.Thread(target=self._loop, name="ingest-clipboard", daemon=True).start()
+
+    def check(self, text):
+        if text and text != self._last:
+            self._last = text
+            if _URL_RE.search(text):
+                self.ingestor.feed_text(text, source="Zwischenablage")
+
+    def _loop(self):
+        if self._last is None:
+            try:
+                self._last = self.paste()
+            except Exception:
+                pass
+        while not self._stop.wait(self.interval):
+            try:
+                self.check(self.paste())
+            except Exception:
+                pass
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,131 @@
+# ytdl_journal.py – Write-Ahead-Journal der Download-Jobs unter ~/.ytdl-modern/journal.jsonl
+import os, sys, json, time, threading
+from ytdl_core import CFG_DIR
+
+JOURNAL_PATH = os.path.join(CFG_DIR, "journal.jsonl")
+PROGRESS_EVERY_S = 2.0   # Byte-Stände höchstens so oft je Job schreiben
+
+# Zeilen (eine JSON-Zeile je Ereignis, nur angehängt):
+#   {"op": "add",  "key": …, "url": …, "fmt": …, "quality": …, "limit_kb": …, "parent": key|null, "t": …}
+#   {"op": "part", "key": …, "file": "<…>.part", "bytes": 123}
+#   {"op": "end",  "key": …, "state": "done"|"failed"|"cancelled"}
+# Beim Öffnen wird das Journal auf die offenen Jobs verdichtet; die .part-Dateien selbst bleiben liegen
+# und werden beim erneuten Start vom Downloader per Range-Request fortgesetzt.
+
+def _lock_file(f):
+    if sys.platform == "win32":
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+def _fold(path):
+    """Liest das Journal und gibt die offenen Jobs (Reihenfolge wie eingereiht) zurück."""
+    jobs = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue   # halbe letzte Zeile nach Absturz
+                key, op = rec.get("key"), rec.get("op")
+                if op == "add":
+                    old = jobs.pop(key, None)   # erneut eingereiht (Retry) -> ans Ende, Teile behalten
+                    rec["parts"] = old["parts"] if old else {}
+                    jobs[key] = rec
+                elif op == "part" and key in jobs:
+                    jobs[key]["parts"][rec["file"]] = rec.get("bytes", 0)
+                elif op == "end":
+                    jobs.pop(key, None)
+    except FileNotFoundError:
+        pass
+    return list(jobs.values())
+
+class JobJournal:
+    """
+    Jede Einreihung und jedes Ende wird mit fsync geschrieben, bevor es weitergeht; Byte-Stände nur
+    gepuffert (die .part-Datei ist ohnehin die Wahrheit). Immer nur ein Prozess besitzt das Journal
+    (Dateisperre) – eine zweite Instanz läuft ohne, statt fremde Jobs fortzusetzen.
+    """
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lockf = open(path + ".lock", "a+")
+        try:
+            _lock_file(self._lockf)
+        except OSError:
+            self._lockf.close()
+            raise
+        self._lock = threading.Lock()
+        self._last = {}   # key -> Zeitpunkt des letzten "part"-Eintrags
+        self._pending = _fold(path)
+        # verdichten: nur offene Jobs behalten, atomar ersetzen
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for rec in self._pending:
+                parts = rec.get("parts") or {}
+                f.write(json.dumps({k: v for k, v in rec.items() if k != "parts"}, ensure_ascii=False) + "\n")
+                for fn, n in parts.items():
+                    f.write(json.dumps({"op": "part", "key": rec["key"], "file": fn, "bytes": n}) + "\n")
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self._f = open(path, "a", encoding="utf-8")
+
+    def pending(self):
+        """Beim letzten Lauf unterbrochene Jobs: [{"key", "url", "fmt", "quality", "parent", "parts"…}]."""
+        return list(self._pending)
+
+    def _write(self, rec, sync=False):
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._f is None:
+                return
+            self._f.write(line)
+            self._f.flush()
+            if sync:
+                os.fsync(self._f.fileno())
+
+    def add(self, job, parent_key=None):
+        self._write(self._add_rec(job, parent_key), sync=True)
+
+    def add_many(self, jobs):
+        """Viele Jobs auf einmal (z. B. eine Liste aus dem Drop-Ordner): ein Schreibvorgang, ein fsync."""
+        with self._lock:
+            if self._f is None or not jobs:
+                return
+            self._f.write("".join(json.dumps(self._add_rec(j), ensure_ascii=False) + "\n" for j in jobs))
+            self._f.flush()
+            os.fsync(self._f.fileno())
+
+    @staticmethod
+    def _add_rec(job, parent_key=None):
+        return {"op": "add", "key": job.key, "url": job.url, "fmt": job.fmt, "quality": job.quality,
+                "limit_kb": job.limit_kb, "parent": parent_key, "t": time.time()}
+
+    def progress(self, job, filename, nbytes):
+        now = time.monotonic()
+        if now - self._last.get(job.key, 0) < PROGRESS_EVERY_S:
+            return
+        self._last[job.key] = now
+        self._write({"op": "part", "key": job.key, "file": filename, "bytes": nbytes})
+
+    def end(self, job):
+        self._last.pop(job.key, None)
+        self._write({"op": "end", "key": job.key, "state": job.state}, sync=True)
+
+    def close(self):
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+        self._lockf.close()   # gibt die Sperre frei
+
+def open_journal(path=JOURNAL_PATH):
+    """Journal öffnen oder None, wenn schon eine andere Instanz es benutzt."""
+    try:
+        return JobJournal(path)
+    except OSError:
+        return None
@@ -0,0 +1,150 @@
+# ytdl_metrics.py – Zeitmessung je Job und Phase, Export als JSON-Zeilen oder Prometheus-Text
+import json, time, threading
+from collections import deque
+
+# Phasen in Ablauf-Reihenfolge (Sekunden); gesetzt von ytdl_queue über Job.timings
+PHASES = ("queue_wait", "extract", "select", "first_byte", "download", "pool_wait", "postprocess", "move")
+PHASE_TEXT = {
+    "queue_wait": "Warteschlange", "extract": "Extraktion", "select": "Formatwahl",
+    "first_byte": "erstes Byte", "download": "Download", "pool_wait": "wartet auf ffmpeg",
+    "postprocess": "ffmpeg", "move": "Verschieben/Archiv",
+}
+# Aufgaben der Nachbearbeitung (Job.pp_tasks); "ffmpeg" ist ein Durchgang inkl. Lautheit/Tags/Cover/Vorschau
+TASKS = ("cover", "ffmpeg", "hash")
+TASK_TEXT = {"cover": "Cover laden", "ffmpeg": "ffmpeg-Durchgang", "hash": "SHA-256"}
+# wofür eine Phase steht – daraus ergibt sich der Engpass eines Batches
+PHASE_BOUND = {"extract": "Extractor", "select": "Extractor", "download": "Netzwerk",
+               "pool_wait": "CPU", "postprocess": "CPU", "move": "Datenträger", "queue_wait": "Worker"}
+
+def _pct(vals, p):
+    if not vals:
+        return 0.0
+    s = sorted(vals)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))]
+
+class Metrics:
+    """
+    Sammelt pro abgeschlossenem Job-Versuch einen Datensatz (Phasen, Bytes, Durchsatz, Zustand).
+    `record()` wird aus Worker-/Pool-Threads aufgerufen; mit `log_path` wird jeder Datensatz
+    zusätzlich als JSON-Zeile angehängt.
+    """
+    def __init__(self, maxlen: int = 5000, log_path=None):
+        self.log_path = log_path
+        self._recs = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._states = {}                    # Zustand -> Anzahl (seit Start, nicht begrenzt)
+        self._sum = dict.fromkeys(PHASES, 0.0)
+        self._count = dict.fromkeys(PHASES, 0)
+        self._tsum = dict.fromkeys(TASKS, 0.0)
+        self._tcount = dict.fromkeys(TASKS, 0)
+        self._bytes = 0
+        self.started = time.time()
+
+    def record(self, job):
+        rec = {"t": time.time(), "id": job.id, "url": job.url, "format": job.fmt, "quality": job.quality,
+               "state": job.state, "attempt": job.attempts, "retries": job.retries, "extractor": job.extractor,
+               "cache_hit": job.cache_hit, "skipped": job.skipped, "error": job.error,
+               "bytes": job.timings.get("bytes", 0)}
+        rec.update({p: round(job.timings[p], 4) for p in PHASES if p in job.timings})
+        if job.pp_tasks:
+            rec["tasks"] = {k: round(v, 4) for k, v in job.pp_tasks.items()}
+            rec["pp"] = job.pp_steps
+        if rec.get("download") and rec["bytes"]:
+            rec["throughput"] = round(rec["bytes"] / rec["download"])
+        rec["total"] = round(sum(job.timings.get(p, 0) for p in PHASES if p != "first_byte"), 4)
+        with self._lock:
+            self._recs.append(rec)
+            self._states[job.state] = self._states.get(job.state, 0) + 1
+            self._bytes += rec["bytes"]
+            for p in PHASES:
+                if p in rec:
+                    self._sum[p] += rec[p]
+                    self._count[p] += 1
+            for t, v in rec.get("tasks", {}).items():
+                if t in self._tsum:
+                    self._tsum[t] += v
+                    self._tcount[t] += 1
+            if self.log_path:
+                try:
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                except OSError:
+                    pass
+        return rec
+
+    def records(self):
+        with self._lock:
+            return list(self._recs)
+
+    def summary(self):
+        """{phase: {count, avg, p50, p95, max, sum}} über die gespeicherten Datensätze."""
+        recs = self.records()
+        out = {}
+        for p in PHASES:
+            vals = [r[p] for r in recs if p in r]
+            if vals:
+                out[p] = {"count": len(vals), "sum": sum(vals), "avg": sum(vals) / len(vals),
+                          "p50": _pct(vals, 50), "p95": _pct(vals, 95), "max": max(vals)}
+        return out
+
+    def task_summary(self):
+        """Wie summary(), aber je Aufgabe der Nachbearbeitung (inkl. Anteil der Jobs mit Lautheit/Tags/…)."""
+        recs = [r for r in self.records() if "tasks" in r]
+        out = {}
+        for t in TASKS:
+            vals = [r["tasks"][t] for r in recs if t in r["tasks"]]
+            if vals:
+                out[t] = {"count": len(vals), "sum": sum(vals), "avg": sum(vals) / len(vals),
+                          "p50": _pct(vals, 50), "p95": _pct(vals, 95), "max": max(vals)}
+        steps = {}
+        for r in recs:
+            for st in r.get("pp", ()):
+                steps[st] = steps.get(st, 0) + 1
+        if steps:
+            out["steps"] = steps
+        return out
+
+    def bottleneck(self):
+        """(Ressource, Anteil an der Gesamtzeit) – wohin die meiste Zeit geflossen ist, oder (None, 0)."""
+        by = {}
+        for p, s in self.summary().items():
+            if p in PHASE_BOUND:
+                by[PHASE_BOUND[p]] = by.get(PHASE_BOUND[p], 0.0) + s["sum"]
+        total = sum(by.values())
+        if not total:
+            return None, 0.0
+        name = max(by, key=by.get)
+        return name, by[name] / total
+
+    def write_jsonl(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for rec in self.records():
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def prometheus(self, queue=None):
+        """Text im Prometheus-Exposition-Format (Zähler seit Start, optional Queue-Zustand als Gauges)."""
+        with self._lock:
+            states, sums, counts, nbytes = dict(self._states), dict(self._sum), dict(self._count), self._bytes
+            tsums, tcounts = dict(self._tsum), dict(self._tcount)
+        lines = ["# HELP ytdl_jobs_total Abgeschlossene Job-Versuche nach Endzustand",
+                 "# TYPE ytdl_jobs_total counter"]
+        lines += [f'ytdl_jobs_total{{state="{s}"}} {n}' for s, n in sorted(states.items())]
+        lines += ["# HELP ytdl_phase_seconds Zeit je Phase", "# TYPE ytdl_phase_seconds summary"]
+        for p in PHASES:
+            lines.append(f'ytdl_phase_seconds_sum{{phase="{p}"}} {sums[p]:.6f}')
+            lines.append(f'ytdl_phase_seconds_count{{phase="{p}"}} {counts[p]}')
+        lines += ["# HELP ytdl_pp_task_seconds Zeit je Aufgabe der Nachbearbeitung",
+                  "# TYPE ytdl_pp_task_seconds summary"]
+        for t in TASKS:
+            lines.append(f'ytdl_pp_task_seconds_sum{{task="{t}"}} {tsums[t]:.6f}')
+            lines.append(f'ytdl_pp_task_seconds_count{{task="{t}"}} {tcounts[t]}')
+        lines += ["# HELP ytdl_downloaded_bytes_total Geladene Bytes", "# TYPE ytdl_downloaded_bytes_total counter",
+                  f"ytdl_downloaded_bytes_total {nbytes}"]
+        if queue is not None:
+            jobs = queue.jobs()
+            lines += ["# HELP ytdl_jobs Jobs je aktuellem Zustand", "# TYPE ytdl_jobs gauge"]
+            cur = {}
+            for j in jobs:
+                cur[j.state] = cur.get(j.state, 0) + 1
+            lines += [f'ytdl_jobs{{state="{s}"}} {n}' for s, n in sorted(cur.items())]
+        return "\n".join(lines) + "\n"
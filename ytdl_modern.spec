@@ -6,7 +6,8 @@ a = Analysis(
     pathex=[],
     binaries=[('.\\ffmpeg\\bin\\ffmpeg.exe', 'ffmpeg'), ('.\\ffmpeg\\bin\\ffprobe.exe', 'ffmpeg')],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=['watchdog.observers.inotify', 'watchdog.observers.read_directory_changes',
+                   'watchdog.observers.fsevents', 'watchdog.observers.polling'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,201 @@
+# ytdl_postproc.py – CPU-Stufe der Pipeline: ffmpeg-Transcode/Mux (+ Lautheit, Tags, Cover, Vorschaubild) im Prozess-Pool
+import os, time, shutil, hashlib, subprocess, threading
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+
+THUMB_W = 320        # Breite des Vorschaubilds neben der Datei (px)
+
+def ffmpeg_binary(ffmpeg_location=None):
+    if ffmpeg_location:
+        for name in ("ffmpeg.exe", "ffmpeg"):
+            cand = os.path.join(ffmpeg_location, name)
+            if os.path.isfile(cand):
+                return cand
+    return shutil.which("ffmpeg") or "ffmpeg"
+
+def claim_path(dst):
+    """
+    Freien Zielnamen reservieren und zurückgeben: Titel.mp3, sonst Titel (2).mp3 … – per O_EXCL,
+    also auch zwischen parallelen Pool-Prozessen eindeutig. Vorhandene Dateien werden nie überschrieben.
+    """
+    base, ext = os.path.splitext(dst)
+    n = 1
+    while True:
+        cand = dst if n == 1 else f"{base} ({n}){ext}"
+        try:
+            os.close(os.open(cand, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return cand
+        except FileExistsError:
+            n += 1
+
+def _run_ffmpeg(ffmpeg, args, dst, outs=(), key=""):
+    """
+    Schreibt zuerst in eine Temp-Datei (mit Job-Schlüssel, parallele Jobs mit gleichem Titel kommen
+    sich nicht in die Quere) und benennt erst bei Erfolg um; `outs` = weitere Ausgaben.
+    Gibt den tatsächlichen Zielpfad zurück (siehe claim_path).
+    """
+    base, ext = os.path.splitext(dst)
+    tmp = f"{base}.{key}.pp{ext}" if key else f"{base}.pp{ext}"
+    cmd = [ffmpeg, "-y", "-hide_banner", "-loglevel", "error", *args, tmp, *outs]
+    flags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+    r = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, creationflags=flags)
+    if r.returncode != 0:
+        try: os.remove(tmp)
+        except OSError: pass
+        msg = r.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise RuntimeError(f"ffmpeg: {msg[-1] if msg else r.returncode}")
+    dst = claim_path(dst)
+    os.replace(tmp, dst)
+    return dst
+
+def _remove(*paths):
+    for p in paths:
+        try: os.remove(p)
+        except OSError: pass
+
+# -------- Nachbearbeitung im selben Durchgang --------
+# `extras` (dict, alles optional): loudnorm (Ziel in LUFS), tags ({Name: Wert}), cover (Bilddatei,
+# wird danach gelöscht; embed=False -> nur fürs Vorschaubild), thumb (True: .jpg neben die Datei),
+# thumb_at (Sekunde des Videobilds), key (Job-Schlüssel für Temp-Dateien), abr (kbps, falls kopierter Ton
+# für loudnorm neu kodiert werden muss)
+def loudnorm_filter(lufs):
+    """EBU R128 in einem Durchgang (dynamisch) – kein zweites Lesen der Datei zum Messen."""
+    return f"loudnorm=I={lufs}:TP=-1.5:LRA=11"
+
+def extras_steps(extras):
+    """Welche Aufgaben in den ffmpeg-Durchgang eingeflossen sind, z. B. ['loudnorm', 'tags']."""
+    return [k for k in ("loudnorm", "tags", "cover", "thumb") if (extras or {}).get(k)]
+
+def _pass(ffmpeg, inputs, maps, codec, dst, extras, kind):
+    """
+    Ein ffmpeg-Aufruf für Transcode/Mux samt Lautheit, Tags, Cover und Vorschaubild (zweite Ausgabe),
+    statt die Datei für jede Aufgabe erneut zu lesen und zu schreiben. `kind`: mp3, m4a oder mp4.
+    """
+    ex = extras or {}
+    args, outs = list(inputs), []
+    cover = ex.get("cover") if kind != "mp4" else None
+    embed = cover and ex.get("embed", True)   # sonst nur Quelle fürs Vorschaubild
+    if cover:
+        ci = inputs.count("-i")
+        args += ["-i", cover]
+    if embed:
+        maps = maps + ["-map", f"{ci}:v:0"]
+    args += maps + codec
+    if ex.get("loudnorm"):
+        if "copy" in codec:   # Filter braucht neu kodierten Ton – in der Bitrate der Quelle bzw. Wahl
+            abr = f"{int(ex.get('abr') or 192)}k"
+            args += ["-c:a", "libopus" if dst.endswith(".webm") else "aac", "-b:a", abr]
+        args += ["-af", loudnorm_filter(ex["loudnorm"]), "-ar", "48000"]   # loudnorm gibt sonst 192 kHz aus
+    if embed:
+        args += ["-c:v", "mjpeg", "-disposition:v:0", "attached_pic"]   # webp/png -> jpeg (ID3/MP4 tauglich)
+    for k, v in (ex.get("tags") or {}).items():
+        if v:
+            args += ["-metadata", f"{k}={v}"]
+    if kind == "mp3":
+        args += ["-id3v2_version", "3"]
+    thumb = ex.get("thumb") and f"{os.path.splitext(dst)[0]}.{ex.get('key', '')}.thumb.jpg"
+    if thumb and kind == "mp4":
+        outs = ["-map", "0:v:0", "-vf", f"select='gte(t,{ex.get('thumb_at', 0):.1f})',scale={THUMB_W}:-2",
+                "-frames:v", "1", "-update", "1", thumb]
+    elif thumb and cover:
+        outs = ["-map", f"{ci}:v:0", "-vf", f"scale={THUMB_W}:-2", "-frames:v", "1", "-update", "1", thumb]
+    try:
+        dst = _run_ffmpeg(ffmpeg, args, dst, outs, ex.get("key", ""))
+        if outs and os.path.isfile(thumb):
+            # zum tatsächlichen Namen, aber wie die Mediendatei nie über ein vorhandenes Bild
+            os.replace(thumb, claim_path(os.path.splitext(dst)[0] + ".jpg"))
+        return dst
+    finally:
+        if outs:
+            _remove(thumb)
+        if cover:
+            _remove(cover)
+
+# -------- Tasks (laufen im Kindprozess, daher Modul-Funktionen) --------
+def transcode_mp3(ffmpeg, src, dst, quality, extras=None):
+    dst = _pass(ffmpeg, ["-i", src], ["-map", "0:a:0"], ["-c:a", "libmp3lame", "-b:a", f"{quality}k"], dst, extras, "mp3")
+    if os.path.abspath(src) != os.path.abspath(dst):
+        _remove(src)
+    return dst
+
+def transcode_aac(ffmpeg, src, dst, quality, extras=None):
+    dst = _pass(ffmpeg, ["-i", src], ["-map", "0:a:0"],
+                ["-c:a", "aac", "-b:a", f"{quality}k", "-movflags", "+faststart"], dst, extras, "m4a")
+    if os.path.abspath(src) != os.path.abspath(dst):
+        _remove(src)
+    return dst
+
+def merge_av(ffmpeg, video, audio, dst, extras=None):
+    dst = _pass(ffmpeg, ["-i", video, "-i", audio], ["-map", "0:v:0", "-map", "1:a:0"],
+                ["-c", "copy", "-movflags", "+faststart"], dst, extras, "mp4")
+    _remove(video, audio)
+    return dst
+
+def remux(ffmpeg, src, dst, extras=None, kind="m4a"):
+    # Audio-Ziel: nur die Tonspur (Quelle kann ein gemuxtes Video sein oder ein altes Cover enthalten)
+    maps = ["-map", "0:a:0"] if kind in ("m4a", "mp3") else ["-map", "0"]
+    codec = ["-c", "copy"] + (["-movflags", "+faststart"] if dst.lower().endswith((".mp4", ".m4a", ".mov")) else [])
+    dst = _pass(ffmpeg, ["-i", src], maps, codec, dst, extras, kind)
+    if os.path.abspath(src) != os.path.abspath(dst):
+        _remove(src)
+    return dst
+
+def file_sha256(path, bufsize=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(bufsize):
+            h.update(chunk)
+    return h.hexdigest()
+
+def with_hash(fn, *args):
+    """
+    Führt `fn` aus und hasht das Ergebnis gleich im Kindprozess (für das Download-Archiv).
+    Gibt (Pfad, SHA-256, {Aufgabe: Sekunden im Kindprozess}) zurück – ohne die Wartezeit im Pool.
+    """
+    t0 = time.perf_counter()
+    dst = fn(*args)
+    t1 = time.perf_counter()
+    sha = file_sha256(dst)
+    return dst, sha, {"ffmpeg": t1 - t0, "hash": time.perf_counter() - t1}
+
+def without_hash(fn, *args):
+    """Wie with_hash, aber ohne die Datei erneut zu lesen (kein Download-Archiv aktiv)."""
+    t0 = time.perf_counter()
+    dst = fn(*args)
+    return dst, None, {"ffmpeg": time.perf_counter() - t0}
+
+# -------- Pool --------
+class PostProcessPool:
+    """
+    Prozess-Pool (Größe = CPU-Kerne) für ffmpeg-Arbeit. Wird erst beim ersten Job gestartet,
+    damit der Programmstart keine Kindprozesse kostet.
+    Höchstens `inflight` Aufgaben (Standard: 2 je Prozess) sind gleichzeitig übergeben; `submit`
+    blockiert darüber hinaus den Download-Worker, statt fertige Rohdateien unbegrenzt aufzustauen.
+    """
+    def __init__(self, workers=None, inflight=None):
+        self.workers = workers or os.cpu_count() or 2
+        self.inflight = inflight or 2 * self.workers
+        self._slots = threading.BoundedSemaphore(self.inflight)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, cancel=None):
+        """`cancel` (threading.Event): Warten auf einen freien Platz abbrechen -> CancelledError."""
+        while not self._slots.acquire(timeout=0.2):
+            if cancel is not None and cancel.is_set():
+                raise CancelledError()
+        try:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                fut = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda f: self._slots.release())
+        return fut
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
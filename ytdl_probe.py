@@ -0,0 +1,154 @@
+# ytdl_probe.py – Analyse-Dienst: viele URLs parallel extrahieren, gleiche Videos nur einmal
+import time, threading
+from concurrent.futures import ThreadPoolExecutor, Future, InvalidStateError, as_completed
+from ytdl_core import probe_info, ydl_basic_opts
+from ytdl_cache import canonical_key
+from ytdl_retry import classify, backoff, host_key, THROTTLE, FATAL
+
+def _settle(fut, result=None, error=None):
+    """Ergebnis setzen, sofern das Future nicht schon fertig/abgebrochen ist."""
+    try:
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+    except InvalidStateError:
+        pass
+
+def _copy(src, dst):
+    if src.exception() is not None:
+        _settle(dst, error=src.exception())
+    else:
+        _settle(dst, src.result())
+
+class ProbeService:
+    """
+    Begrenzter Thread-Pool (Extraktion ist fast nur Netzwerk-Warten). Anfragen für dasselbe Video
+    (gleicher Extractor+ID, also auch youtu.be/… vs. watch?v=…) teilen sich ein laufendes Future –
+    Doppelklick auf „Analysieren“ oder doppelte Zeilen in einer Liste kosten keinen zweiten Abruf.
+    Ergebnisse landen im Info-Cache, spätere Downloads extrahieren also nicht erneut.
+    Gedrosselte/fehlgeschlagene Extraktionen laufen bis zu `retries` mal mit Backoff erneut; mit
+    `breaker` (z. B. dem der Download-Queue) wartet die Analyse, solange der Host pausiert ist.
+    """
+    def __init__(self, cache=None, workers: int = 6, breaker=None, retries: int = 3):
+        self.cache = cache
+        self.workers = max(1, int(workers))
+        self.breaker = breaker
+        self.retries = retries
+        self._stop = threading.Event()
+        self._pool = None
+        self._inflight = {}   # canonical_key -> Future der laufenden Extraktion
+        self._by_url = {}     # URL -> Future des Aufrufers (bis der Schlüssel im Pool feststeht)
+        self._lock = threading.Lock()
+        self._local = threading.local()   # eine YoutubeDL-Instanz je Pool-Thread
+        self._ydls = []
+
+    def _ydl(self):
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is None:
+            from yt_dlp import YoutubeDL
+            ydl = self._local.ydl = YoutubeDL(ydl_basic_opts())
+            with self._lock:
+                self._ydls.append(ydl)
+        return ydl
+
+    def _sleep(self, seconds):
+        if self._stop.wait(max(0.0, seconds)):
+            raise RuntimeError("Analyse abgebrochen")
+
+    def _work(self, url):
+        host, attempt = host_key(url), 0
+        while True:
+            if self.breaker is not None:
+                until = self.breaker.acquire(host)
+                while until:
+                    self._sleep(until - time.monotonic())
+                    until = self.breaker.acquire(host)
+            try:
+                info = probe_info(url, self.cache, self._ydl())
+            except Exception as e:
+                kind = classify(e)
+                if kind == THROTTLE and self.breaker is not None:
+                    self.breaker.failure(host)
+                attempt += 1
+                if kind == FATAL or attempt > self.retries:
+                    raise
+                self._sleep(backoff(attempt))
+                continue
+            if self.breaker is not None:
+                self.breaker.success(host)
+            return info
+
+    def probe(self, url: str):
+        """
+        Future mit dem unverarbeiteten Info-Dict; läuft die Analyse schon, dasselbe Future.
+        Kehrt sofort zurück – der Schlüssel (lädt ggf. yt-dlps Extractor-Liste) wird erst im Pool
+        bestimmt, nicht im aufrufenden (z. B. Tk-)Thread.
+        """
+        with self._lock:
+            fut = self._by_url.get(url)
+            if fut is not None:
+                return fut
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="probe")
+            fut = self._by_url[url] = Future()
+            self._pool.submit(self._resolve, url, fut)
+        fut.add_done_callback(lambda f: self._done(self._by_url, url, f))
+        return fut
+
+    def _resolve(self, url, fut):
+        """Im Pool: Schlüssel bestimmen und an eine laufende Extraktion desselben Videos anhängen."""
+        try:
+            key = canonical_key(url)
+        except Exception as e:
+            _settle(fut, error=e)
+            return
+        with self._lock:
+            run = self._inflight.get(key)
+            owner = run is None
+            if owner:
+                run = self._inflight[key] = Future()
+                run.add_done_callback(lambda f: self._done(self._inflight, key, f))
+        run.add_done_callback(lambda f: _copy(f, fut))
+        if not owner:
+            return
+        try:
+            _settle(run, self._work(url))
+        except Exception as e:
+            _settle(run, error=e)
+
+    def _done(self, table, key, fut):
+        with self._lock:
+            if table.get(key) is fut:
+                del table[key]
+
+    def probe_many(self, urls):
+        """
+        Generator über (url, info, fehler) in Fertigstellungs-Reihenfolge – das erste Ergebnis kommt,
+        sobald die schnellste Extraktion fertig ist, nicht erst nach der ganzen Liste.
+        """
+        waiting = {}   # Future -> [urls]
+        for url in urls:
+            waiting.setdefault(self.probe(url), []).append(url)
+        for fut in as_completed(waiting):
+            # nach shutdown() abgebrochen: exception()/result() würden CancelledError werfen
+            err = RuntimeError("Analyse abgebrochen") if fut.cancelled() else fut.exception()
+            for url in waiting[fut]:
+                yield url, (None if err else fut.result()), err
+
+    def shutdown(self):
+        self._stop.set()   # wartende Versuche (Backoff/Pause) beenden
+        with self._lock:
+            pool, self._pool = self._pool, None
+            ydls, self._ydls = self._ydls, []
+            waiting = list(self._by_url.values())
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        for fut in waiting:   # noch nicht gestartete Analysen: Aufrufer nicht ewig warten lassen
+            if fut.cancel():
+                fut.set_running_or_notify_cancel()   # erst das weckt as_completed()/wait()
+        for ydl in ydls:
+            try:
+                ydl.close()
+            except Exception:
+                pass
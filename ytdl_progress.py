@@ -0,0 +1,47 @@
+# ytdl_progress.py – Fortschritts-Bus: Worker schreiben Events, der UI-Thread holt sie gebündelt ab
+import queue
+
+class ProgressBus:
+    """
+    Worker-Threads rufen nur `publish()`/`call_soon()` auf (SimpleQueue, kein Tk-Zugriff).
+    Der UI-Thread ruft in festem Takt `drain()` auf und bekommt pro Job nur den letzten Stand –
+    100 Hook-Aufrufe zwischen zwei Ticks werden so zu einem einzigen Widget-Update.
+    """
+    def __init__(self):
+        self._q = queue.SimpleQueue()
+
+    def publish(self, job_id, **fields):
+        """fields: state, downloaded, total, speed (B/s), eta (s), percent – nur Zahlen/Strings."""
+        self._q.put((job_id, fields))
+
+    def call_soon(self, fn, *args):
+        """Funktion im UI-Thread ausführen lassen (z. B. Ergebnis einer Analyse anzeigen)."""
+        self._q.put((None, (fn, args)))
+
+    def drain(self, limit: int = 50000):
+        """Liefert ({job_id: zusammengeführte Felder}, [(fn, args), ...])."""
+        merged, calls = {}, []
+        for _ in range(limit):
+            try:
+                job_id, fields = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if job_id is None:
+                calls.append(fields)
+            else:
+                merged.setdefault(job_id, {}).update(fields)
+        return merged, calls
+
+def fmt_speed(bps):
+    if not bps:
+        return ""
+    for unit in ("B/s", "KB/s", "MB/s", "GB/s"):
+        if bps < 1024 or unit == "GB/s":
+            return f"{bps:.1f} {unit}" if unit != "B/s" else f"{bps:.0f} {unit}"
+        bps /= 1024
+
+def fmt_eta(sec):
+    if sec is None:
+        return ""
+    sec = int(sec)
+    return f"{sec // 3600}:{sec % 3600 // 60:02d}:{sec % 60:02d}" if sec >= 3600 else f"{sec // 60}:{sec % 60:02d}"
@@ -0,0 +1,682 @@
+# ytdl_queue.py – Download-Warteschlange mit begrenztem Worker-Pool (headless, ohne GUI-Abhängigkeit)
+import os, time, uuid, shutil, threading, itertools
+from urllib.parse import urlparse
+from collections import deque
+from ytdl_core import (build_fetch_opts, final_outtmpl, get_ffmpeg_location, extract_info_cached,
+                       is_playlist, iter_entry_urls, normalize_url, AUDIO_FORMATS)
+from ytdl_formats import choose_format, post_action, NONE, TRANSCODE
+from ytdl_tuning import FragmentTuner
+from ytdl_bandwidth import BandwidthScheduler
+from ytdl_metrics import Metrics
+from ytdl_retry import (CircuitBreaker, Throttled, classify, backoff, host_key, THROTTLE, FATAL,
+                        THROTTLE_S)
+from ytdl_postproc import (PostProcessPool, ffmpeg_binary, transcode_mp3, transcode_aac, merge_av, remux,
+                            with_hash, without_hash, file_sha256, extras_steps, claim_path)
+
+# -------- Job-Zustände --------
+QUEUED         = "queued"
+PROBING        = "probing"
+EXPANDING      = "expanding"         # Playlist/Kanal: Einträge werden eingereiht
+DOWNLOADING    = "downloading"
+POSTPROCESSING = "post-processing"
+WAITING        = "waiting"           # nach Drosselung/Netzfehler: wartet auf den nächsten Versuch
+DONE           = "done"
+FAILED         = "failed"
+CANCELLED      = "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    _ids = itertools.count(1)
+
+    def __init__(self, url: str, fmt: str, quality: str):
+        self.id = next(Job._ids)
+        self.key = uuid.uuid4().hex[:10]   # bleibt über Neustarts gleich (Journal, Rohdateinamen)
+        self.url, self.fmt, self.quality = url, fmt, quality
+        self.state = QUEUED
+        self.title = None
+        self.percent = 0.0
+        self.downloaded = self.total = 0
+        self.speed = self.eta = None
+        self.filepath = None
+        self.error = None
+        self.attempts = 0
+        self._cancel = threading.Event()
+        self._future = None   # laufende Post-Processing-Aufgabe
+        self.skipped = False  # laut Download-Archiv schon vorhanden
+        self.extractor = self.video_id = None
+        self.parent = None    # Job-ID der Playlist, aus der dieser Job stammt
+        self.children = []    # bei Playlists: IDs der eingereihten Einträge
+        self.limit_kb = None  # eigenes Bandbreiten-Limit (KB/s); None -> `job_rate_kb` aus der Konfig
+        self.resumed = False  # aus dem Journal eines früheren Laufs wieder aufgenommen
+        self.choice = None    # ytdl_formats.FormatChoice: gewählte Formate, Größe, Nachbearbeitung
+        self.timings = {}     # Phase -> Sekunden im aktuellen Versuch (siehe ytdl_metrics.PHASES) + "bytes"
+        self.cache_hit = None # Info-Dict kam aus dem Cache
+        self._t = {}          # interne Zeitmarken (time.monotonic)
+        self.retries = 0      # automatische neue Versuche (Backoff) seit dem letzten Einreihen
+        self.not_before = 0.0 # frühester Start des nächsten Versuchs (time.monotonic)
+        self.pp_tasks = {}    # Nachbearbeitung: Aufgabe (cover, ffmpeg, hash) -> Sekunden
+        self.pp_steps = []    # was im ffmpeg-Durchgang mitlief (loudnorm, tags, cover, thumb)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def __repr__(self):
+        return f"<Job #{self.id} {self.state} {self.url}>"
+
+    def to_dict(self):
+        return {"id": self.id, "url": self.url, "format": self.fmt, "quality": self.quality,
+                "state": self.state, "title": self.title, "percent": round(self.percent, 1),
+                "downloaded": self.downloaded, "total": self.total, "speed": self.speed, "eta": self.eta,
+                "filepath": self.filepath, "error": self.error, "attempts": self.attempts, "retries": self.retries,
+                "skipped": self.skipped, "parent": self.parent, "children": len(self.children),
+                "limit_kb": self.limit_kb, "resumed": self.resumed,
+                "plan": self.choice.to_dict() if self.choice else None,
+                "timings": {k: round(v, 3) for k, v in self.timings.items()},
+                "pp_tasks": {k: round(v, 3) for k, v in self.pp_tasks.items()}, "pp_steps": self.pp_steps}
+
+class _WorkerCtx:
+    """
+    Zustand eines Worker-Threads: langlebige YoutubeDL-Instanzen (eine je Format/Qualität,
+    da yt-dlp den Format-Selektor beim Anlegen kompiliert) und der gerade laufende Job.
+    Die Hooks der Instanzen lesen den Job von hier – auch aus yt-dlps Fragment-Threads.
+    """
+    def __init__(self):
+        self.ydls = {}
+        self.job = None
+        self.nfrag = 1
+        self.fragmented = set()   # Dateien, die als DASH/HLS-Fragmente geladen werden
+        self.loaded = {}          # Datei -> zuletzt gemeldete Bytes (Delta für den Bandbreiten-Planer)
+        self.slow_since = None    # seit wann das Tempo unter `throttle_kb` liegt
+
+    def close(self):
+        for ydl in self.ydls.values():
+            ydl.close()
+        self.ydls.clear()
+
+# -------- Warteschlange --------
+class DownloadQueue:
+    """
+    Zweistufige Pipeline: `workers` Threads laden nur die Rohstreams (jeder mit eigener
+    YoutubeDL-Instanz) und reichen Transcode/Mux an einen Prozess-Pool weiter, sodass der
+    nächste Download schon läuft, während ffmpeg noch rechnet.
+    `on_update(job)` wird bei jeder Änderung aus Worker- bzw. Pool-Threads aufgerufen; GUIs
+    übergeben stattdessen einen ytdl_progress.ProgressBus (`bus`) und lesen im eigenen Takt.
+    Mit `journal` (ytdl_journal.JobJournal) überleben offene Jobs einen Absturz/Neustart,
+    siehe `resume_unfinished()`. Jeder beendete Versuch landet mit Phasen-Zeiten in `metrics`
+    und – mit `history` – dauerhaft im Verlauf.
+    Gedrosselte oder an Netzfehlern gescheiterte Jobs warten (WAITING) und laufen mit Backoff erneut,
+    `.part`-Dateien werden dabei fortgesetzt; drosselt ein Host wiederholt, pausiert `breaker` nur ihn.
+    """
+    def __init__(self, cfg, workers: int = 3, on_update=None, post_workers=None, cache=None, archive=None,
+                 bus=None, journal=None, metrics=None, history=None):
+        self.cfg = cfg
+        self.on_update = on_update
+        self.bus = bus
+        self.journal = journal
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.history = history       # optionaler ytdl_state.StateStore (Verlauf + Tagesstatistik)
+        self.tuner = FragmentTuner(start=max(1, int(cfg.get("fragments", 4))))
+        self.bandwidth = BandwidthScheduler(cfg)   # liest Limits/Zeitfenster live aus cfg
+        self.breaker = CircuitBreaker()
+        self.cache = cache           # optionaler ytdl_cache.InfoCache (gemeinsam mit der Analyse)
+        self.archive = archive       # optionales ytdl_archive.DownloadArchive (überspringt Erledigtes)
+        self.post = PostProcessPool(post_workers, inflight=cfg.get("pp_inflight") or None)
+        self._jobs = {}              # id -> Job (Einfügereihenfolge)
+        self._by_url = {}            # (vereinheitlichte URL, Format) -> jüngster Job, siehe find()
+        self._pending = deque()
+        self._cv = threading.Condition()
+        self._threads = []
+        self._target = 0
+        self._stopped = False
+        self.set_workers(workers)
+
+    # ----- öffentliche API -----
+    def submit(self, url: str, fmt: str, quality: str, parent=None, limit_kb=None) -> Job:
+        job = Job(url, fmt, quality)
+        job.parent, job.limit_kb = parent, limit_kb
+        self._enqueue(job)
+        return job
+
+    def submit_many(self, urls, fmt: str, quality: str, limit_kb=None):
+        """Wie submit() für viele URLs – Journal mit einem fsync, Worker einmal geweckt."""
+        now, jobs = time.monotonic(), []
+        for url in urls:
+            job = Job(url, fmt, quality)
+            job.limit_kb, job._t["queued"] = limit_kb, now
+            jobs.append(job)
+        if self.journal is not None:
+            self.journal.add_many(jobs)
+        self._enqueue_many(jobs)
+        return jobs
+
+    def resume_unfinished(self):
+        """
+        Jobs, die beim letzten Lauf nicht fertig wurden, mit ihrem alten Schlüssel wieder einreihen –
+        gleiche Rohdateinamen, also setzt yt-dlp die .part-Dateien per Range-Request fort.
+        """
+        if self.journal is None:
+            return []
+        by_key, jobs = {}, []
+        for rec in self.journal.pending():
+            job = Job(rec["url"], rec["fmt"], rec["quality"])
+            job.key, job.limit_kb, job.resumed = rec["key"], rec.get("limit_kb"), True
+            job.downloaded = sum((rec.get("parts") or {}).values())
+            parent = by_key.get(rec.get("parent"))
+            if parent is not None:
+                job.parent = parent.id
+                parent.children.append(job.id)   # Playlist lädt diese Einträge nicht doppelt
+            by_key[job.key] = job
+            jobs.append(job)
+        # erst alle verknüpfen, dann einreihen – ohne neue Journal-Zeilen, sie stehen schon im verdichteten
+        # Journal (sonst ein fsync je Job vor dem ersten Zeichnen der GUI)
+        now = time.monotonic()
+        for job in jobs:
+            job._t["queued"] = now
+        self._enqueue_many(jobs)
+        return jobs
+
+    def _enqueue_many(self, jobs):
+        """Schon journalisierte Jobs einreihen: einmal sperren, Worker einmal wecken."""
+        keys = [self._url_key(job.url, job.fmt) for job in jobs]
+        with self._cv:
+            for job, key in zip(jobs, keys):
+                self._jobs[job.id] = job
+                self._by_url[key] = job
+                self._pending.append(job)
+            self._cv.notify_all()
+        for job in jobs:
+            self._notify(job)
+
+    def _enqueue(self, job):
+        job._t["queued"] = time.monotonic()
+        if self.journal is not None:
+            parent = self._jobs.get(job.parent)
+            self.journal.add(job, parent.key if parent else None)
+        key = self._url_key(job.url, job.fmt)
+        with self._cv:
+            self._jobs[job.id] = job
+            self._by_url[key] = job
+            self._pending.append(job)
+            self._cv.notify()
+        self._notify(job)
+
+    @staticmethod
+    def _url_key(url, fmt):
+        return normalize_url(url) or url, fmt.upper()
+
+    def find(self, url: str, fmt: str):
+        """
+        Jüngster Job für dieselbe URL (vereinheitlicht, youtu.be/… = watch?v=…) im selben Format oder None –
+        egal ob über submit, eine Playlist oder das Journal eingereiht.
+        """
+        key = self._url_key(url, fmt)
+        with self._cv:
+            return self._by_url.get(key)
+
+    def cancel(self, job_id: int):
+        with self._cv:
+            job = self._jobs.get(job_id)
+            if not job or job.state in FINAL_STATES:
+                return
+            job._cancel.set()
+            # ein Worker kann den Job schon aus der Reihe genommen haben (Zustand noch QUEUED/WAITING)
+            # -> dann nur das Flag, _run bricht beim Start ab
+            if job.state in (QUEUED, WAITING) and job in self._pending:
+                self._pending.remove(job)
+                job.state = CANCELLED
+            elif job._future is not None and job._future.cancel():
+                job.state = CANCELLED
+        self._notify(job)
+        for cid in list(job.children):
+            self.cancel(cid)
+
+    def retry(self, job_id: int):
+        with self._cv:
+            job = self._jobs.get(job_id)
+            if not job or job.state not in (FAILED, CANCELLED):
+                return
+            job._cancel.clear()
+            job.state, job.error, job.percent = QUEUED, None, 0.0
+            job.retries, job.not_before = 0, 0.0
+            job._t["queued"] = time.monotonic()
+            self._pending.append(job)
+            self._cv.notify()
+        if self.journal is not None:
+            parent = self._jobs.get(job.parent)
+            self.journal.add(job, parent.key if parent else None)
+        self._notify(job)
+
+    def jobs(self):
+        with self._cv:
+            return list(self._jobs.values())
+
+    def get(self, job_id: int):
+        return self._jobs.get(job_id)
+
+    def idle(self):
+        """True, wenn nichts mehr wartet oder läuft (auch keine Playlist-Expansion)."""
+        with self._cv:
+            return all(j.state in FINAL_STATES for j in self._jobs.values())
+
+    def paused_hosts(self):
+        """{host: Sekunden bis zum nächsten Versuch} – Hosts, die gerade wegen Drosselung ruhen."""
+        return self.breaker.paused()
+
+    def set_workers(self, n: int):
+        with self._cv:
+            self._target = max(1, int(n))
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self._target:
+                t = threading.Thread(target=self._worker_loop, daemon=True)
+                self._threads.append(t)
+                t.start()
+            self._cv.notify_all()  # überzählige Worker beenden sich selbst
+
+    def shutdown(self, cancel_running: bool = True):
+        with self._cv:
+            self._stopped = True
+            if cancel_running:
+                for job in self._jobs.values():
+                    if job.state not in FINAL_STATES:
+                        job._cancel.set()
+            self._cv.notify_all()
+        self.post.shutdown(wait=not cancel_running)
+        if self.journal is not None:
+            self.journal.close()   # offene Jobs bleiben fürs nächste Mal im Journal
+
+    # ----- Worker -----
+    def _worker_loop(self):
+        me = threading.current_thread()
+        ctx = _WorkerCtx()
+        try:
+            while True:
+                with self._cv:
+                    while True:
+                        if self._stopped or not self._fits(me):
+                            if me in self._threads:
+                                self._threads.remove(me)
+                            return
+                        job, wait = self._take()
+                        if job is not None:
+                            break
+                        self._cv.wait(wait)
+                self._run(job, ctx)
+        finally:
+            ctx.close()
+
+    def _take(self):
+        """
+        Nächster startbereiter Job (Backoff abgelaufen, Host nicht pausiert) oder (None, Wartezeit).
+        Jobs pausierter Hosts bleiben in der Reihe, die anderen ziehen an ihnen vorbei.
+        """
+        now, wait = time.monotonic(), None
+        for job in self._pending:
+            ready = max(job.not_before, self.breaker.acquire(host_key(job.url), now) if job.not_before <= now else 0)
+            if ready <= now:
+                self._pending.remove(job)
+                return job, None
+            wait = ready - now if wait is None else min(wait, ready - now)
+        return None, wait
+
+    def _fits(self, me):
+        return me in self._threads[:self._target]
+
+    def _set_state(self, job, state):
+        job.state = state
+        self._notify(job)
+
+    def _notify(self, job, **fields):
+        # Ende ins Journal – außer Abbrüche durch shutdown(), die sollen beim nächsten Start weiterlaufen
+        if (self.journal is not None and job.state in FINAL_STATES
+                and not (job.state == CANCELLED and self._stopped)):
+            self.journal.end(job)
+        # ein Datensatz je Versuch – auch für Versuche, die in WAITING (neuer Versuch mit Backoff) enden
+        if job.state in FINAL_STATES + (WAITING,) and job._t.get("recorded") != job.attempts:
+            job._t["recorded"] = job.attempts
+            self.metrics.record(job)
+            if (self.history is not None and job.state != WAITING and not job.children
+                    and not self._stopped):
+                self.history.record(job)
+        if self.bus is not None:
+            self.bus.publish(job.id, state=job.state, percent=job.percent, **fields)
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception:
+                pass
+
+    def _progress_hook(self, ctx, d):
+        job = ctx.job
+        if job is None:
+            return
+        if job.cancelled:
+            raise JobCancelled()
+        if d.get("fragment_count"):
+            ctx.fragmented.add(d.get("filename"))
+        limited = self.bandwidth.enabled(job.limit_kb)
+        if (d.get("status") == "finished" and d.get("filename") in ctx.fragmented
+                and self.cfg.get("fragments_auto", True) and not limited):   # gebremst = kein Messwert
+            self.tuner.record(job.url, ctx.nfrag, d.get("total_bytes") or d.get("downloaded_bytes") or 0,
+                              d.get("elapsed") or 0)
+        if d.get("status") == "downloading":
+            job.downloaded = d.get("downloaded_bytes") or 0
+            if "first_byte" not in job.timings and job.downloaded and "dl" in job._t:
+                job.timings["first_byte"] = time.monotonic() - job._t["dl"]
+            job.total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
+            job.speed, job.eta = d.get("speed"), d.get("eta")
+            if job.total:
+                job.percent = 100.0 * job.downloaded / job.total
+            self._check_throttled(ctx, job, limited)
+            self._notify(job, downloaded=job.downloaded, total=job.total, speed=job.speed, eta=job.eta)
+            if self.journal is not None:
+                self.journal.progress(job, d.get("tmpfilename") or d.get("filename"), job.downloaded)
+            fn = d.get("filename")
+            delta = job.downloaded - ctx.loaded.get(fn, 0)   # auch ungebremst mitzählen: Zeitfenster kann beginnen
+            ctx.loaded[fn] = job.downloaded
+            if limited:
+                # schläft im ladenden Thread, bis die Bytes in die zugeteilte Rate passen
+                self.bandwidth.consume(job.id, delta, self.bandwidth.weight(job.fmt), job.limit_kb, job._cancel)
+                if job.cancelled:
+                    raise JobCancelled()
+        elif d.get("status") == "finished":
+            job.percent = 100.0
+            self._notify(job)
+
+    def _check_throttled(self, ctx, job, limited):
+        """Slow-Read-Drosselung: Tempo lange unter `throttle_kb` -> abbrechen und neu verbinden (Range)."""
+        floor = int(self.cfg.get("throttle_kb") or 0) * 1024
+        if not floor or limited or job.speed is None or job.retries >= int(self.cfg.get("retries", 5)):
+            ctx.slow_since = None   # eigenes Limit bremst absichtlich; nach dem letzten Versuch langsam zu Ende
+            return
+        now = time.monotonic()
+        if job.speed >= floor:
+            ctx.slow_since = None
+        elif ctx.slow_since is None:
+            ctx.slow_since = now
+        elif now - ctx.slow_since > THROTTLE_S:
+            ctx.slow_since = None
+            raise Throttled(f"gedrosselt: {job.speed / 1024:.0f} KB/s seit {THROTTLE_S:.0f} s")
+
+    def _ydl_for(self, ctx, job):
+        """YoutubeDL des Workers für Format/Qualität wiederverwenden (spart Init und Verbindungsaufbau)."""
+        key = (job.fmt, job.quality)
+        opts = build_fetch_opts(job.fmt, job.quality, lambda d: self._progress_hook(ctx, d),
+                                lambda d: None, self.cfg, tag=job.key)
+        opts["noprogress"] = True   # Fortschritt kommt über die Hooks, nicht über die Konsole
+        outtmpl = opts["outtmpl"]
+        ydl = ctx.ydls.get(key)
+        if ydl is None:
+            from yt_dlp import YoutubeDL   # erst im Worker laden, nicht beim Programmstart
+            ydl = ctx.ydls[key] = YoutubeDL(opts)
+        # pro Job: Zielordner/Rohdateiname, Fragment-Verbindungen, Chunk-Größe (liest yt-dlp erst beim Download)
+        ydl.params["outtmpl"]["default"] = outtmpl
+        ydl.params["concurrent_fragment_downloads"] = ctx.nfrag
+        ydl.params["http_chunk_size"] = opts.get("http_chunk_size")
+        return ydl
+
+    def _run(self, job: Job, ctx: _WorkerCtx):
+        job.attempts += 1
+        job.error = None
+        now = time.monotonic()
+        job.timings = {"queue_wait": now - job._t.get("queued", now)}
+        job.pp_tasks, job.pp_steps = {}, []
+        job._t = {"run": now}
+        ctx.job, ctx.fragmented, ctx.loaded, ctx.slow_since = job, set(), {}, None
+        ctx.nfrag = (self.tuner.suggest(job.url) if self.cfg.get("fragments_auto", True)
+                     else max(1, int(self.cfg.get("fragments", 4))))
+        try:
+            if job.cancelled:
+                raise JobCancelled()
+            # vor jeder Netzwerkarbeit: schon im Archiv?
+            if self.archive is not None:
+                done = self.archive.lookup(job.url, job.fmt, job.quality)
+                if job.cancelled:   # während der Abfrage abgebrochen
+                    raise JobCancelled()
+                if done:
+                    job.skipped = True
+                    job.title = job.title or os.path.basename(done)
+                    job.filepath, job.percent = done, 100.0
+                    self._set_state(job, DONE)
+                    return
+            self._set_state(job, PROBING)
+            ydl = self._ydl_for(ctx, job)
+            # einmal extrahieren (oder aus dem Cache), danach nur noch aus dem Info-Dict arbeiten
+            t0 = time.monotonic()
+            try:   # auch fehlgeschlagene Versuche zählen in der Statistik
+                info, cached = extract_info_cached(ydl, job.url, self.cache)
+            finally:
+                job.timings["extract"] = time.monotonic() - t0
+            job.cache_hit = cached
+            job.title = info.get("title") or job.title
+            if is_playlist(info):
+                # eigener Thread übernimmt diese YoutubeDL-Instanz (der Generator hängt an ihr),
+                # damit der Worker-Slot sofort frei wird
+                ctx.ydls.pop((job.fmt, job.quality), None)
+                threading.Thread(target=self._expand, args=(job, ydl, info), daemon=True).start()
+                return
+            if job.cancelled:
+                raise JobCancelled()
+            try:
+                resolved, parts = self._resolve_and_fetch(ydl, job, info)
+            except JobCancelled:
+                raise
+            except Exception:
+                if not cached:
+                    raise
+                # Stream-URLs aus dem Cache evtl. abgelaufen -> einmal frisch extrahieren
+                self.cache.invalidate(job.url)
+                t0 = time.monotonic()
+                info, _ = extract_info_cached(ydl, job.url, self.cache)
+                job.timings["extract"] += time.monotonic() - t0
+                resolved, parts = self._resolve_and_fetch(ydl, job, info)
+            job.title = resolved.get("title") or job.title
+            job.extractor, job.video_id = resolved.get("extractor_key"), resolved.get("id")
+            final = ydl.prepare_filename(resolved, outtmpl=final_outtmpl(job.fmt, self.cfg))
+            self._postprocess(job, parts, final, ydl)
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            ctx.job = None
+            self.bandwidth.release(job.id)
+
+    # ----- Playlists / Kanäle -----
+    def _expand(self, job, ydl, info):
+        """Reiht die Einträge ein, sobald der Extractor sie liefert (kein Auflösen der ganzen Liste)."""
+        try:
+            self._set_state(job, EXPANDING)
+            seen = {self._jobs[c].url for c in job.children if c in self._jobs}  # nach Retry
+            for url in iter_entry_urls(ydl, info, self.cache):
+                if job.cancelled or self._stopped:
+                    raise JobCancelled()
+                if url in seen:
+                    continue
+                seen.add(url)
+                child = self.submit(url, job.fmt, job.quality, parent=job.id)
+                job.children.append(child.id)
+                self._notify(job)
+            job.percent = 100.0
+            self._set_state(job, DONE)
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            ydl.close()
+
+    # ----- Stufe 1: Netzwerk -----
+    def _resolve_and_fetch(self, ydl, job, info):
+        t0 = time.monotonic()
+        # eigene Rangfolge (Codec, Container, Nachbearbeitung) statt des fest kompilierten Selektors
+        job.choice = choose_format(info, job.fmt, job.quality)
+        # Standard-Selektor als Rückfall, falls yt-dlp die Wahl doch noch aussortiert
+        spec = f"{job.choice.spec}/{ydl.params['format']}" if job.choice else ydl.params["format"]
+        ydl.format_selector = ydl.build_format_selector(spec)
+        resolved = ydl.process_ie_result(info, download=False)
+        job._t["dl"] = time.monotonic()
+        job.timings["select"] = job._t["dl"] - t0
+        self._set_state(job, DOWNLOADING)
+        try:
+            parts = self._fetch(ydl, resolved)
+        finally:
+            # += : nach abgelaufenen Cache-URLs zählt der gescheiterte erste Anlauf mit
+            job.timings["download"] = job.timings.get("download", 0.0) + time.monotonic() - job._t["dl"]
+        job.timings["bytes"] = sum(os.path.getsize(fp) for fp, _ in parts)
+        return resolved, parts
+
+    def _fetch(self, ydl, resolved):
+        """Lädt jedes angeforderte Format als eigene Rohdatei; gibt die Pfade zurück."""
+        parts = []
+        for fmt in resolved.get("requested_formats") or [{}]:
+            part = dict(resolved)
+            part.pop("requested_formats", None)
+            part.update(fmt)
+            ydl.process_info(part)
+            fp = part.get("filepath")
+            if not fp or not os.path.isfile(fp):
+                raise RuntimeError("Download lieferte keine Datei")
+            parts.append((fp, part))
+        return parts
+
+    # ----- Stufe 2: CPU (ffmpeg im Prozess-Pool) -----
+    def _postprocess(self, job, parts, final, ydl=None):
+        ffmpeg = ffmpeg_binary(get_ffmpeg_location())
+        base = os.path.splitext(final)[0]
+        action = post_action(job.fmt, [f for _, f in parts])   # nach dem tatsächlich geladenen Format
+        extras = self._pp_extras(job, parts[0][1], base, ydl)
+        if extras.get("loudnorm"):   # kopierter Ton wird dafür neu kodiert: gewählte kbps bzw. die der Quelle
+            src_abr = max((f.get("abr") or 0 for _, f in parts if f.get("acodec") not in (None, "none")), default=0)
+            extras["abr"] = int(job.quality) if job.fmt in AUDIO_FORMATS else round(src_abr) or None
+        if job.fmt in AUDIO_FORMATS and (action != NONE or extras):
+            src, ext = parts[0][0], "." + job.fmt.lower()
+            if action != TRANSCODE and not extras.get("loudnorm"):
+                task = (remux, ffmpeg, src, base + ext, extras, job.fmt.lower())
+            elif job.fmt == "MP3":
+                task = (transcode_mp3, ffmpeg, src, base + ext, job.quality, extras)
+            else:
+                task = (transcode_aac, ffmpeg, src, base + ext, job.quality, extras)
+        elif len(parts) > 1:
+            video = next((fp for fp, f in parts if f.get("vcodec") not in (None, "none")), parts[0][0])
+            audio = next(fp for fp, _ in parts if fp != video)
+            task = (merge_av, ffmpeg, video, audio, base + ".mp4", extras)
+        elif extras:
+            src = parts[0][0]
+            task = (remux, ffmpeg, src, base + os.path.splitext(src)[1], extras, "mp4")
+        else:
+            # Einzeldatei (Bild+Ton oder schon passende Audiospur): nur noch umbenennen
+            src = parts[0][0]
+            job._t["move"] = time.monotonic()
+            dst = claim_path(base + os.path.splitext(src)[1])   # gleicher Titel von einem anderen Job -> "Titel (2)"
+            os.replace(src, dst)
+            self._finish(job, dst, file_sha256(dst) if self.archive is not None else None)
+            return
+        job.pp_steps = extras_steps(extras)
+        extras["key"] = job.key          # Temp-Dateien je Job (erst nach der Wahl oben, {} heißt "nichts extra")
+        job._t["pp"] = time.monotonic()   # Warten auf einen freien Platz im Pool zählt als pool_wait
+        self._set_state(job, POSTPROCESSING)
+        try:
+            wrap = with_hash if self.archive is not None else without_hash   # Hash nur fürs Archiv
+            job._future = fut = self.post.submit(wrap, *task, cancel=job._cancel)
+        except BaseException:
+            if extras.get("cover"):
+                try: os.remove(extras["cover"])
+                except OSError: pass
+            raise
+        fut.add_done_callback(lambda f: self._post_done(job, f))
+
+    def _pp_extras(self, job, info, base, ydl):
+        """Nachbearbeitung laut Konfig (pp_*), die im selben ffmpeg-Durchgang mitläuft – {} = keine."""
+        cfg, ex = self.cfg, {}
+        if cfg.get("pp_loudnorm"):
+            ex["loudnorm"] = cfg.get("pp_lufs", -14)
+        if cfg.get("pp_tags"):
+            day = str(info.get("release_date") or info.get("upload_date") or "")
+            ex["tags"] = {"title": info.get("track") or info.get("title"),
+                          "artist": info.get("artist") or info.get("creator") or info.get("uploader"),
+                          "album": info.get("album"), "date": day[:4], "comment": info.get("webpage_url")}
+        thumb = cfg.get("pp_thumb")
+        if job.fmt in AUDIO_FORMATS and (cfg.get("pp_cover") or thumb):
+            cover = self._fetch_cover(ydl, job, info, base)
+            if cover:
+                ex["cover"], ex["embed"] = cover, bool(cfg.get("pp_cover"))
+            thumb = thumb and cover     # Audio: Vorschaubild kommt aus dem Cover
+        if thumb:
+            ex["thumb"] = True
+            ex["thumb_at"] = min(10.0, (info.get("duration") or 0) / 3)
+        return ex
+
+    def _fetch_cover(self, ydl, job, info, base):
+        """Vorschaubild der Seite laden – Netzwerk, daher im Worker und nicht im Prozess-Pool."""
+        url = info.get("thumbnail")
+        if ydl is None or not url:
+            return None
+        path = f"{base}.{job.key}.cover" + (os.path.splitext(urlparse(url).path)[1] or ".jpg")
+        t0 = time.monotonic()
+        try:
+            with ydl.urlopen(url) as r, open(path, "wb") as f:
+                shutil.copyfileobj(r, f)
+            return path
+        except Exception:
+            try: os.remove(path)
+            except OSError: pass
+            return None                 # ohne Cover weiter, der Download selbst ist ja fertig
+        finally:
+            job.pp_tasks["cover"] = time.monotonic() - t0
+
+    def _post_done(self, job, fut):
+        job._future = None
+        if fut.cancelled():
+            self._set_state(job, CANCELLED)
+            return
+        try:
+            path, sha256, tasks = fut.result()
+            job.pp_tasks.update(tasks)
+            secs = sum(tasks.values())
+            job.timings["postprocess"] = secs
+            job.timings["pool_wait"] = max(0.0, time.monotonic() - job._t["pp"] - secs)
+            job._t["move"] = time.monotonic()
+            self._finish(job, path, sha256)
+        except Exception as e:
+            self._fail(job, e)
+
+    def _finish(self, job, path, sha256=None):
+        if self.archive is not None:
+            # identischer Inhalt schon unter anderem Namen vorhanden -> neue Kopie verwerfen
+            same = [p for p in self.archive.find_by_hash(sha256)
+                    if os.path.abspath(p) != os.path.abspath(path)] if sha256 else []
+            if same:
+                os.remove(path)
+                path = same[0]
+            self.archive.add(job.url, job.fmt, job.quality, path, sha256, job.extractor, job.video_id)
+        job.filepath, job.percent = path, 100.0
+        self.breaker.success(host_key(job.url))
+        if "move" in job._t:
+            job.timings["move"] = time.monotonic() - job._t["move"]
+        self._set_state(job, DONE)
+
+    def _fail(self, job, e):
+        if job.cancelled:
+            self._set_state(job, CANCELLED)
+            return
+        kind = classify(e)
+        host = host_key(job.url)
+        if kind == THROTTLE and self.breaker.failure(host):
+            self._notify(job, paused=host)
+        if kind == FATAL or self._stopped or job.retries >= int(self.cfg.get("retries", 5)):
+            job.error = str(e)
+            self._set_state(job, FAILED)
+            return
+        job.retries += 1
+        # Slow-Read: sofort neu verbinden (ohne Breaker); sonst exponentiell warten (Pause des Hosts kommt ggf. dazu)
+        delay = 1.0 if isinstance(e, Throttled) else backoff(job.retries)
+        if self.cache is not None and not isinstance(e, Throttled):
+            self.cache.invalidate(job.url)   # Stream-URLs evtl. gesperrt/abgelaufen -> frisch extrahieren
+        job.error = f"{str(e).splitlines()[0][:160]} – Versuch {job.retries + 1} in {delay:.0f} s"
+        job.not_before = time.monotonic() + delay
+        job._t["queued"] = time.monotonic()
+        with self._cv:
+            job.state = WAITING
+            self._pending.append(job)
+            self._cv.notify_all()
+        self._notify(job)
@@ -0,0 +1,135 @@
+# ytdl_retry.py – Fehler einordnen, Backoff mit Jitter, Circuit-Breaker je Host
+import re, time, random, socket, threading
+from urllib.parse import urlparse
+
+BASE_S = 2.0          # erste Wartezeit vor einem neuen Versuch
+CAP_S = 300.0         # längste Wartezeit zwischen zwei Versuchen
+THROTTLE_S = 20.0     # so lange unter `throttle_kb` -> als gedrosselt werten und neu verbinden
+BREAKER_FAILS = 3     # Drosselungen (429/403/Bot-Prüfung) in Folge, bis ein Host pausiert wird
+COOLDOWN_S = 60.0     # erste Pause; verdoppelt sich bei jedem erneuten Öffnen
+COOLDOWN_MAX_S = 1800.0
+
+# Fehlerarten
+THROTTLE, TRANSIENT, FATAL = "throttle", "transient", "fatal"
+
+class Throttled(Exception):
+    """
+    Aus dem Progress-Hook: Tempo seit THROTTLE_S unter der Schwelle (Slow-Read-Drosselung). Zählt als
+    TRANSIENT, nicht für den Circuit-Breaker – auf einer langsamen oder geteilten Leitung liegt das Tempo
+    auch ohne Zutun des Hosts unter `throttle_kb`; pausiert wird ein Host nur bei 429/403/Bot-Prüfung.
+    """
+
+_THROTTLE_RE = re.compile(r"HTTP Error (429|403)|Too Many Requests|rate.?limit|not a bot|"
+                          r"confirm you.re not a robot|unusual traffic", re.I)
+_TRANSIENT_RE = re.compile(r"HTTP Error 5\d\d|timed? ?out|Connection (reset|aborted|refused)|"
+                           r"Remote end closed|IncompleteRead|EOF occurred|Temporary failure|"
+                           r"getaddrinfo failed|Name or service not known|did not get any data|"
+                           r"Unable to download (webpage|JSON)|urlopen error", re.I)
+
+def _chain(e):
+    """Die Ausnahme samt Ursachen (yt-dlp verpackt HTTP-Fehler in DownloadError.exc_info)."""
+    seen = []
+    while e is not None and e not in seen and len(seen) < 8:
+        seen.append(e)
+        inner = getattr(e, "exc_info", None)
+        e = (inner[1] if isinstance(inner, tuple) and len(inner) > 1 else None) or e.__cause__ or e.__context__
+    return seen
+
+def classify(e):
+    """THROTTLE (Host bremst uns), TRANSIENT (Netz/Server kurz weg) oder FATAL (neuer Versuch sinnlos)."""
+    for x in _chain(e):
+        if isinstance(x, Throttled):
+            return TRANSIENT   # nur neu verbinden (siehe Throttled)
+        status = getattr(x, "status", None) or getattr(x, "code", None)
+        if status in (429, 403):
+            return THROTTLE
+        if isinstance(status, int) and 500 <= status < 600:
+            return TRANSIENT
+        if isinstance(x, (socket.timeout, TimeoutError, ConnectionError)):
+            return TRANSIENT
+    msg = " ".join(str(x) for x in _chain(e))
+    if _THROTTLE_RE.search(msg):
+        return THROTTLE
+    if _TRANSIENT_RE.search(msg):
+        return TRANSIENT
+    return FATAL
+
+def backoff(attempt: int, base: float = BASE_S, cap: float = CAP_S):
+    """Exponentiell mit vollem Jitter: zufällig in [base/2, min(cap, base·2^(n-1))]."""
+    hi = min(cap, base * 2 ** max(0, attempt - 1))
+    return random.uniform(min(base / 2, hi), hi)
+
+def host_key(url: str):
+    """Seite hinter einer URL, z. B. youtu.be/… und music.youtube.com -> youtube.com."""
+    host = (urlparse(url).hostname or "").lower()
+    if ":" in host or host.replace(".", "").isdigit():   # IP-Adresse
+        return host
+    if host in ("youtu.be", "youtube-nocookie.com") or host.endswith(".youtube-nocookie.com"):
+        return "youtube.com"
+    return ".".join(host.split(".")[-2:]) if host.count(".") >= 1 else host
+
+class _Host:
+    __slots__ = ("fails", "open_until", "cooldown", "trial")
+
+    def __init__(self):
+        self.fails = 0
+        self.open_until = 0.0     # bis dahin pausiert (time.monotonic)
+        self.cooldown = COOLDOWN_S
+        self.trial = 0.0          # Startzeit des Probe-Jobs nach der Pause (half-open)
+
+class CircuitBreaker:
+    """
+    Je Host: nach BREAKER_FAILS Drosselungen in Folge keine neuen Jobs mehr für diesen Host
+    (offen), nach der Pause genau ein Probe-Job (halb offen). Klappt der, läuft alles wieder an;
+    sonst die nächste, doppelt so lange Pause. Andere Hosts sind davon nicht betroffen.
+    """
+    def __init__(self, fails: int = BREAKER_FAILS, cooldown: float = COOLDOWN_S):
+        self.fails, self.cooldown = fails, cooldown
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _get(self, host):
+        h = self._hosts.get(host)
+        if h is None:
+            h = self._hosts[host] = _Host()
+            h.cooldown = self.cooldown
+        return h
+
+    def acquire(self, host, now=None):
+        """0, wenn ein Job für `host` jetzt starten darf, sonst der Zeitpunkt, ab dem es wieder geht."""
+        now = now or time.monotonic()
+        with self._lock:
+            h = self._hosts.get(host)
+            if h is None or not h.open_until:
+                return 0
+            if now < h.open_until:
+                return h.open_until
+            if h.trial and now - h.trial < h.cooldown:   # Probe-Job läuft noch
+                return h.trial + h.cooldown
+            h.trial = now
+            return 0
+
+    def success(self, host):
+        with self._lock:
+            h = self._hosts.get(host)
+            if h is not None:
+                h.fails, h.open_until, h.trial, h.cooldown = 0, 0.0, 0.0, self.cooldown
+
+    def failure(self, host):
+        """Eine Drosselung melden; True, wenn der Host dadurch (erneut) pausiert wird."""
+        now = time.monotonic()
+        with self._lock:
+            h = self._get(host)
+            h.fails += 1
+            if h.trial:                                   # Probe fehlgeschlagen -> längere Pause
+                h.cooldown = min(COOLDOWN_MAX_S, h.cooldown * 2)
+            elif h.fails < self.fails or now < h.open_until:
+                return False
+            h.open_until, h.trial = now + h.cooldown * random.uniform(1.0, 1.2), 0.0
+            return True
+
+    def paused(self):
+        """{host: verbleibende Sekunden} der gerade pausierten Hosts."""
+        now = time.monotonic()
+        with self._lock:
+            return {k: h.open_until - now for k, h in self._hosts.items() if h.open_until > now}
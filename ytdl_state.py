@@ -0,0 +1,223 @@
+# ytdl_state.py – Zustandsspeicher (SQLite, WAL) unter ~/.ytdl-modern/state.sqlite3: Konfig, Verlauf, Statistik
+import os, sys, json, time, atexit, sqlite3, threading
+from queue import SimpleQueue, Empty
+from datetime import date
+from ytdl_core import CFG_DIR, CFG_PATH, read_json_config
+
+STATE_PATH = os.path.join(CFG_DIR, "state.sqlite3")
+BATCH_S = 0.5        # Schreibzugriffe so lange sammeln und in einer Transaktion festschreiben
+BATCH_MAX = 500
+PAGE = 200           # Verlaufseinträge je Abruf
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS config (
+    key   TEXT PRIMARY KEY,
+    value TEXT                    -- JSON
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS history (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    t         REAL,               -- Ende (Unix-Zeit)
+    url       TEXT,
+    title     TEXT,
+    format    TEXT,
+    quality   TEXT,
+    state     TEXT,
+    filepath  TEXT,
+    bytes     INTEGER,
+    seconds   REAL,
+    attempts  INTEGER,
+    error     TEXT,
+    extractor TEXT,
+    video_id  TEXT
+);
+CREATE INDEX IF NOT EXISTS history_state ON history(state, id);
+CREATE INDEX IF NOT EXISTS history_url ON history(url);
+CREATE TABLE IF NOT EXISTS daily (
+    day       TEXT PRIMARY KEY,   -- YYYY-MM-DD
+    done      INTEGER DEFAULT 0,
+    failed    INTEGER DEFAULT 0,
+    cancelled INTEGER DEFAULT 0,
+    bytes     INTEGER DEFAULT 0,
+    seconds   REAL DEFAULT 0
+);
+"""
+
+class StateStore:
+    """
+    Ein Schreib-Thread sammelt Änderungen BATCH_S lang und schreibt sie in einer Transaktion
+    (atomar, WAL: Leser werden nie blockiert) – Aufrufer aus UI- oder Worker-Threads warten nicht.
+    Gelesen wird über eine eigene Verbindung; der Verlauf seitenweise über den Primärschlüssel
+    (`before`), sodass auch zehntausende Einträge sofort da sind.
+    """
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._w = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._w.execute("PRAGMA journal_mode=WAL")
+        self._w.execute("PRAGMA synchronous=NORMAL")   # WAL: nach Absturz konsistent, höchstens letzter Batch fehlt
+        self._w.executescript(_SCHEMA)
+        self._r = sqlite3.connect(path, check_same_thread=False)
+        self._rlock = threading.Lock()
+        self._saved = self._read_config()               # zuletzt geschriebener Stand (für Differenzen)
+        self._q = SimpleQueue()
+        self._thread = threading.Thread(target=self._writer, name="state-writer", daemon=True)
+        self._thread.start()
+
+    # ----- Schreiben (gebündelt im eigenen Thread) -----
+    def _put(self, sql, args=()):
+        self._q.put((sql, args))
+
+    def _writer(self):
+        stop = False
+        while not stop:
+            batch, waiters = [], []
+            item = self._q.get()
+            deadline = time.monotonic() + BATCH_S
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)      # flush(): sofort schreiben
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= BATCH_MAX:
+                    break
+                try:
+                    item = self._q.get(timeout=max(0.0, deadline - time.monotonic()))
+                except Empty:
+                    break
+            if batch:
+                try:
+                    self._w.execute("BEGIN")
+                    for sql, args in batch:
+                        self._w.execute(sql, args)
+                    self._w.execute("COMMIT")
+                except sqlite3.Error as e:
+                    if self._w.in_transaction:
+                        self._w.execute("ROLLBACK")
+                    print("Zustand speichern fehlgeschlagen:", e, file=sys.stderr)
+            for ev in waiters:
+                ev.set()
+
+    def flush(self, timeout=5.0):
+        """Wartet, bis alles bisher Übergebene festgeschrieben ist."""
+        ev = threading.Event()
+        self._q.put(ev)
+        return ev.wait(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._q.put(None)
+            self._thread.join(5.0)
+        self._w.close()
+        with self._rlock:
+            self._r.close()
+
+    # ----- Konfig -----
+    def _read_config(self):
+        with self._rlock:
+            rows = self._r.execute("SELECT key, value FROM config").fetchall()
+        out = {}
+        for k, v in rows:
+            try:
+                out[k] = json.loads(v)
+            except ValueError:
+                print(f"Konfig-Eintrag {k!r} unlesbar, verwende Standardwert", file=sys.stderr)
+        return out
+
+    def _meta(self, key):
+        with self._rlock:
+            row = self._r.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def load_config(self):
+        """
+        Gespeicherte Werte; eine von Hand bearbeitete config.json (neuer als beim letzten Import)
+        wird übernommen – aber nur die Schlüssel, die sich in der Datei seitdem geändert haben.
+        """
+        cfg = json.loads(json.dumps(self._saved))   # inkl. noch nicht festgeschriebener save_config()-Aufrufe
+        try:
+            mtime = os.path.getmtime(CFG_PATH)
+        except OSError:
+            return cfg
+        if str(mtime) == self._meta("json_mtime"):
+            return cfg
+        data = read_json_config()
+        old = json.loads(self._meta("json_seen") or "null")
+        changed = {k: v for k, v in data.items() if old is None or old.get(k, object()) != v}
+        cfg.update(changed)
+        self.save_config(cfg)
+        self._put("INSERT OR REPLACE INTO meta VALUES ('json_mtime', ?)", (str(mtime),))
+        self._put("INSERT OR REPLACE INTO meta VALUES ('json_seen', ?)", (json.dumps(data, ensure_ascii=False),))
+        self.flush()
+        return cfg
+
+    def save_config(self, cfg):
+        """Nur geänderte Schlüssel schreiben (kein Neuschreiben der ganzen Konfig)."""
+        for k, v in cfg.items():
+            if k not in self._saved or self._saved[k] != v:
+                self._put("INSERT OR REPLACE INTO config VALUES (?, ?)", (k, json.dumps(v, ensure_ascii=False)))
+        self._saved = json.loads(json.dumps(cfg))   # Kopie, auch verschachtelte Werte
+
+    # ----- Verlauf / Statistik -----
+    def record(self, job):
+        """Einen beendeten Job festhalten (aus Worker-Threads, kehrt sofort zurück)."""
+        t = job.timings
+        secs = sum(v for k, v in t.items() if k not in ("first_byte", "bytes"))
+        nbytes = t.get("bytes") or 0
+        self._put("INSERT INTO history (t, url, title, format, quality, state, filepath, bytes, seconds, attempts, "
+                  "error, extractor, video_id) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                  (time.time(), job.url, job.title, job.fmt, job.quality, job.state, job.filepath, nbytes, secs,
+                   job.attempts, job.error, job.extractor, job.video_id))
+        col = {"done": "done", "failed": "failed", "cancelled": "cancelled"}.get(job.state)
+        if col:
+            self._put(f"INSERT INTO daily (day, {col}, bytes, seconds) VALUES (?, 1, ?, ?) "
+                      f"ON CONFLICT(day) DO UPDATE SET {col}={col}+1, bytes=bytes+excluded.bytes, "
+                      "seconds=seconds+excluded.seconds", (date.today().isoformat(), nbytes, secs))
+
+    def history(self, before=None, limit=PAGE, state=None, search=None):
+        """Neueste zuerst; weiterblättern mit `before` = kleinste id der letzten Seite."""
+        sql, args = "SELECT * FROM history WHERE 1=1", []
+        if before is not None:
+            sql += " AND id < ?"; args.append(before)
+        if state:
+            sql += " AND state = ?"; args.append(state)
+        if search:
+            sql += " AND (title LIKE ? OR url LIKE ?)"; args += [f"%{search}%"] * 2
+        sql += " ORDER BY id DESC LIMIT ?"; args.append(int(limit))
+        with self._rlock:
+            cur = self._r.execute(sql, args)
+            cols = [c[0] for c in cur.description]
+            return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+    def history_count(self, state=None):
+        with self._rlock:
+            if state:
+                return self._r.execute("SELECT COUNT(*) FROM history WHERE state=?", (state,)).fetchone()[0]
+            return self._r.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def daily(self, days=30):
+        """Tageswerte (neueste zuerst): [{"day", "done", "failed", "cancelled", "bytes", "seconds"}]."""
+        with self._rlock:
+            cur = self._r.execute("SELECT * FROM daily ORDER BY day DESC LIMIT ?", (int(days),))
+            cols = [c[0] for c in cur.description]
+            return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Gemeinsamer Speicher des Prozesses (beim ersten Aufruf geöffnet, bei Programmende geleert)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = StateStore()
+            atexit.register(_store.close)
+        return _store
+
+def store_exists():
+    return _store is not None or os.path.isfile(STATE_PATH)
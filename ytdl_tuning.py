@@ -0,0 +1,46 @@
+# ytdl_tuning.py – passt die Zahl paralleler Fragment-Verbindungen (DASH/HLS) pro Host an
+import threading
+from urllib.parse import urlparse
+
+def host_of(url: str):
+    return (urlparse(url).hostname or "").lower().removeprefix("www.")
+
+class FragmentTuner:
+    """
+    Einfaches Hill-Climbing je Host: gemessen wird der Gesamtdurchsatz fragmentierter Downloads
+    (gleitender Mittelwert je Verbindungszahl). Gewählt wird die kleinste Stufe, die höchstens
+    um Faktor `gain` unter dem besten Wert liegt – mehr Verbindungen nur, wenn sie sich lohnen,
+    also solange der Durchsatz pro Verbindung nicht einbricht.
+    """
+    def __init__(self, start: int = 4, max_n: int = 32, gain: float = 1.15):
+        self.start, self.max_n, self.gain = start, max_n, gain
+        self._hosts = {}   # host -> {"n": int, "tput": {n: B/s}}
+        self._lock = threading.Lock()
+
+    def suggest(self, url: str) -> int:
+        with self._lock:
+            st = self._hosts.get(host_of(url))
+            return st["n"] if st else self.start
+
+    def record(self, url: str, n: int, nbytes: int, seconds: float):
+        if nbytes <= 0 or seconds <= 0:
+            return
+        tput = nbytes / seconds
+        with self._lock:
+            st = self._hosts.setdefault(host_of(url), {"n": self.start, "tput": {}})
+            old = st["tput"].get(n)
+            st["tput"][n] = tput if old is None else 0.7 * old + 0.3 * tput
+            t = st["tput"]
+            top = max(t.values())
+            best = min(k for k, v in t.items() if v * self.gain >= top)  # wenigste Verbindungen nahe am Maximum
+            up, down = min(best * 2, self.max_n), max(best // 2, 1)
+            if best == max(t) and up not in t:
+                st["n"] = up        # nach oben noch unerforscht
+            elif best == min(t) and down not in t:
+                st["n"] = down      # evtl. reichen auch weniger
+            else:
+                st["n"] = best
+
+    def snapshot(self):
+        with self._lock:
+            return {h: dict(st, tput=dict(st["tput"])) for h, st in self._hosts.items()}